@@ -0,0 +1,194 @@
+"""
+Admission Control Module
+Bounds concurrent work per request class (chat vs. catalog) with a priority queue
+and a wait deadline, so slow LLM calls cannot starve the fast catalog endpoints
+"""
+
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from metrics import get_metrics_registry
+
+
+QUEUE_DEPTH = get_metrics_registry().gauge(
+    "admission_queue_depth", "Requests waiting for an admission slot", labelnames=("pool",)
+)
+IN_FLIGHT = get_metrics_registry().gauge(
+    "admission_in_flight", "Requests holding an admission slot", labelnames=("pool",)
+)
+WAIT_TIME = get_metrics_registry().histogram(
+    "admission_wait_seconds", "Time admitted requests spent queued", labelnames=("pool",)
+)
+REJECTED = get_metrics_registry().counter(
+    "admission_rejected_total", "Requests shed by admission control, by reason (queue_full/timeout)",
+    labelnames=("pool", "reason")
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of admitted"""
+    
+    def __init__(self, pool: str, reason: str, retry_after: int):
+        super().__init__(f"{pool} capacity exhausted ({reason})")
+        self.pool = pool
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    """A queued request; granted is set when a slot is handed over"""
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class AdmissionPool:
+    """Fixed number of slots plus a bounded priority queue with a wait deadline"""
+    
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        """
+        Initialize admission pool
+        
+        Args:
+            name: Pool name used in metrics and errors
+            max_concurrent: Requests allowed to run at once
+            max_queue: Requests allowed to wait; beyond that new requests are rejected at once
+            queue_timeout: Seconds a request may wait before it is rejected
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._queue: List = []  # heap of (priority, sequence, waiter)
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        # Moving average of slot hold time, used for Retry-After
+        self._avg_service_s = 1.0
+    
+    def _retry_after(self) -> int:
+        """Seconds until a slot is likely free for a request arriving now"""
+        waiting = len(self._queue) + 1
+        return max(1, math.ceil(self._avg_service_s * waiting / max(1, self.max_concurrent)))
+    
+    def _publish(self) -> None:
+        QUEUE_DEPTH.set(len(self._queue), pool=self.name)
+        IN_FLIGHT.set(self.in_flight, pool=self.name)
+    
+    def _reject(self, reason: str) -> AdmissionRejected:
+        REJECTED.inc(pool=self.name, reason=reason)
+        return AdmissionRejected(self.name, reason, self._retry_after())
+    
+    def acquire(self, priority: int = 0, timeout: Optional[float] = None) -> None:
+        """
+        Take a slot, waiting in priority order (lower first, FIFO within a priority)
+        
+        Raises:
+            AdmissionRejected: if the queue is full or the wait deadline passes
+        """
+        start = time.perf_counter()
+        with self._lock:
+            if self.in_flight < self.max_concurrent and not self._queue:
+                self.in_flight += 1
+                self._publish()
+                WAIT_TIME.observe(0.0, pool=self.name)
+                return
+            if len(self._queue) >= self.max_queue:
+                raise self._reject("queue_full")
+            waiter = _Waiter()
+            entry = (priority, next(self._sequence), waiter)
+            heapq.heappush(self._queue, entry)
+            self._publish()
+        
+        waiter.event.wait(self.queue_timeout if timeout is None else timeout)
+        
+        with self._lock:
+            if not waiter.granted:
+                # Deadline passed; leave the queue
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._publish()
+                raise self._reject("timeout")
+        WAIT_TIME.observe(time.perf_counter() - start, pool=self.name)
+    
+    def release(self, held_s: Optional[float] = None) -> None:
+        """Return a slot, handing it straight to the next waiter if there is one"""
+        with self._lock:
+            if held_s is not None:
+                self._avg_service_s = 0.8 * self._avg_service_s + 0.2 * held_s
+            if self._queue:
+                _, _, waiter = heapq.heappop(self._queue)
+                waiter.granted = True
+                waiter.event.set()
+            else:
+                self.in_flight -= 1
+            self._publish()
+    
+    @contextmanager
+    def slot(self, priority: int = 0):
+        """Context manager holding one slot for the duration of the block"""
+        self.acquire(priority)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - start)
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "queued": len(self._queue),
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "queue_timeout_s": self.queue_timeout
+            }
+
+
+class AdmissionController:
+    """Named admission pools for the request classes of the API"""
+    
+    def __init__(self, pools: Dict[str, AdmissionPool]):
+        self.pools = pools
+    
+    @contextmanager
+    def admit(self, pool: str, priority: int = 0):
+        """Hold a slot in the named pool; unknown pools are not limited"""
+        admission_pool = self.pools.get(pool)
+        if admission_pool is None:
+            yield
+            return
+        with admission_pool.slot(priority):
+            yield
+    
+    def stats(self) -> Dict[str, Dict]:
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+
+def create_admission_controller() -> AdmissionController:
+    """
+    Factory function to create the chat/catalog admission controller from environment
+    
+    CHAT_MAX_CONCURRENT + CHAT_MAX_QUEUE should stay below the server's request
+    threads so queued chats always leave threads for the catalog endpoints.
+    """
+    import os
+    return AdmissionController({
+        "chat": AdmissionPool(
+            "chat",
+            max_concurrent=int(os.environ.get("CHAT_MAX_CONCURRENT", 4)),
+            max_queue=int(os.environ.get("CHAT_MAX_QUEUE", 4)),
+            queue_timeout=float(os.environ.get("CHAT_QUEUE_TIMEOUT", 10))
+        ),
+        "catalog": AdmissionPool(
+            "catalog",
+            max_concurrent=int(os.environ.get("CATALOG_MAX_CONCURRENT", 8)),
+            max_queue=int(os.environ.get("CATALOG_MAX_QUEUE", 8)),
+            queue_timeout=float(os.environ.get("CATALOG_QUEUE_TIMEOUT", 2))
+        )
+    })
@@ -0,0 +1,195 @@
+"""
+Answer Engine Module
+Answers fully specified catalog questions (compatibility, price, stock) from the
+product record with templated phrasing, without calling the LLM
+A question qualifies only when it names exactly one part (or refers back to the last
+one discussed), asks nothing open-ended, and every fact it asks for is in the catalog
+"""
+
+import re
+import threading
+from typing import Dict, List, Optional
+from answer_templates import render_compatibility_answer, render_price_answer, render_stock_answer
+from metrics import get_metrics_registry
+
+
+# What the customer asks about; a message may ask for several ("available" is not a
+# stock cue: "which parts are available for my model?" is a search)
+COMPATIBILITY_PATTERN = re.compile(r'\b(compatible|compatibility|fits?|work(s)? (with|in|on))\b', re.IGNORECASE)
+PRICE_PATTERN = re.compile(r'\b(price|prices|priced|cost|costs|how much)\b', re.IGNORECASE)
+STOCK_PATTERN = re.compile(r'\b(in stock|out of stock|stock|backorder(ed)?)\b', re.IGNORECASE)
+
+# Anything that needs explanation or judgment goes to the LLM
+OPEN_ENDED_PATTERN = re.compile(
+    r'\b(install\w*|replac\w*|repair\w*|fix\w*|broken|leak\w*|nois\w*|troubleshoot\w*|why|how (do|to|can|should)|'
+    r'recommend\w*|suggest\w*|better|best|cheaper|alternative\w*|compare|difference|instead|other|similar|not working)\b',
+    re.IGNORECASE
+)
+
+# "Is it in stock?" refers to the last part discussed; a bare "this"/"that" only counts
+# at the end of the question ("how much is that?"), not in front of another noun
+REFERENCE_PATTERN = re.compile(r'\b(it|(this|that|the) part|(this|that)(?=\W*$))\b', re.IGNORECASE)
+
+# Longer messages usually carry more than one lookup
+MAX_DIRECT_WORDS = 30
+
+DIRECT_ANSWERS = get_metrics_registry().counter(
+    "chat_direct_answers_total", "Turns answered from the catalog without the LLM, by question kind",
+    labelnames=("kind",)
+)
+DIRECT_ANSWER_SAVED = get_metrics_registry().counter(
+    "chat_direct_answer_saved_seconds_total",
+    "Estimated latency saved by direct answers (mean LLM turn latency minus direct turn latency)"
+)
+
+
+class AnswerEngine:
+    """Deterministic fast path for compatibility, price and stock questions"""
+    
+    def __init__(self, product_service, enabled: bool = True):
+        """
+        Initialize answer engine
+        
+        Args:
+            product_service: ProductService used for part lookups and compatibility checks
+            enabled: Answer qualifying questions directly (False sends everything to the LLM)
+        """
+        self.products = product_service
+        self.enabled = enabled
+        self.turns = 0
+        self.direct_turns = 0
+        self.direct_seconds = 0.0
+        self.llm_turns = 0
+        self.llm_seconds = 0.0
+        self._lock = threading.Lock()
+    
+    def plan(self, message: str, part_numbers: List[str], model_numbers: List[str],
+             session_model: Optional[str] = None, recent_parts: Optional[List[str]] = None) -> Optional[Dict]:
+        """
+        Turn a message into a structured catalog query, if it is one
+        
+        Args:
+            message: The user's message
+            part_numbers: Part numbers extracted from the message
+            model_numbers: Model numbers extracted from the message
+            session_model: Appliance model already known for the session
+            recent_parts: Part numbers discussed earlier in the session, most recent last
+        
+        Returns:
+            Dictionary with kinds (compatibility/price/stock), part_number and model_number,
+            or None when the message needs the LLM
+        """
+        if not self.enabled or len(message.split()) > MAX_DIRECT_WORDS or OPEN_ENDED_PATTERN.search(message):
+            return None
+        
+        kinds = []
+        if COMPATIBILITY_PATTERN.search(message):
+            kinds.append("compatibility")
+        if PRICE_PATTERN.search(message):
+            kinds.append("price")
+        if STOCK_PATTERN.search(message):
+            kinds.append("stock")
+        if not kinds:
+            return None
+        
+        parts = list(dict.fromkeys(part_numbers))
+        if len(parts) > 1:
+            return None
+        if not parts:
+            if not recent_parts or not REFERENCE_PATTERN.search(message):
+                return None
+            parts = [recent_parts[-1]]
+        
+        models = list(dict.fromkeys(model_numbers))
+        if len(models) > 1:
+            return None
+        model_number = models[0] if models else session_model
+        if "compatibility" in kinds and not model_number:
+            return None
+        
+        return {"kinds": kinds, "part_number": parts[0], "model_number": model_number}
+    
+    def answer(self, message: str, part_numbers: List[str], model_numbers: List[str],
+               session_model: Optional[str] = None, recent_parts: Optional[List[str]] = None) -> Optional[Dict]:
+        """
+        Answer a message from the catalog if it is a complete structured query
+        
+        Returns:
+            Dictionary with text, intent, kinds and products, or None when the LLM
+            should handle the message (not a lookup, unknown part, missing price)
+        """
+        query = self.plan(message, part_numbers, model_numbers, session_model, recent_parts)
+        if not query:
+            return None
+        
+        product = self.products.search_by_part_number(query["part_number"])
+        if not product:
+            return None
+        
+        sections = []
+        for kind in query["kinds"]:
+            # Name the part once, then refer back to it
+            subject = "It" if sections else None
+            if kind == "compatibility":
+                sections.append(render_compatibility_answer(self.products, product['id'], query["model_number"]))
+            elif kind == "price":
+                if not product.get('price'):
+                    return None
+                sections.append(render_price_answer(product, subject))
+            elif kind == "stock":
+                sections.append(render_stock_answer(product, subject))
+        
+        return {
+            "text": " ".join(sections),
+            "intent": "compatibility" if "compatibility" in query["kinds"] else "product_info",
+            "kinds": query["kinds"],
+            "products": [product]
+        }
+    
+    def record_turn(self, seconds: float, direct: Optional[Dict] = None, llm: bool = False) -> None:
+        """
+        Record a finished turn
+        
+        Args:
+            seconds: End-to-end turn latency
+            direct: The direct answer, if the turn was served by this engine
+            llm: True if the turn was answered by the LLM (baseline for the latency saved)
+        """
+        with self._lock:
+            self.turns += 1
+            if direct:
+                self.direct_turns += 1
+                self.direct_seconds += seconds
+                saved = self.llm_seconds / self.llm_turns - seconds if self.llm_turns else 0.0
+            elif llm:
+                self.llm_turns += 1
+                self.llm_seconds += seconds
+        
+        if direct:
+            DIRECT_ANSWERS.inc(kind="+".join(direct["kinds"]))
+            if saved > 0:
+                DIRECT_ANSWER_SAVED.inc(saved)
+    
+    def stats(self) -> Dict:
+        """Share of turns served directly and the latency that saved"""
+        with self._lock:
+            mean_direct_ms = self.direct_seconds / self.direct_turns * 1000 if self.direct_turns else 0.0
+            mean_llm_ms = self.llm_seconds / self.llm_turns * 1000 if self.llm_turns else 0.0
+            return {
+                "enabled": self.enabled,
+                "turns": self.turns,
+                "direct_answers": self.direct_turns,
+                "served_fraction": round(self.direct_turns / self.turns, 4) if self.turns else 0.0,
+                "mean_direct_turn_ms": round(mean_direct_ms, 3),
+                "mean_llm_turn_ms": round(mean_llm_ms, 3),
+                "estimated_saved_ms": round(max(0.0, mean_llm_ms - mean_direct_ms) * self.direct_turns, 1) if self.llm_turns else 0.0
+            }
+
+
+def create_answer_engine(product_service) -> AnswerEngine:
+    """Factory function to create an answer engine configured from environment"""
+    import os
+    return AnswerEngine(
+        product_service,
+        enabled=os.environ.get("DIRECT_ANSWERS", "on").lower() not in ("0", "off", "false", "no")
+    )
@@ -0,0 +1,101 @@
+"""
+Answer Templates Module
+Deterministic answers rendered from catalog data, used when the LLM is unavailable
+and for questions the catalog answers on its own (see answer_engine)
+"""
+
+from typing import Dict, List, Optional
+
+
+DEGRADED_NOTICE = "Our AI assistant is temporarily unavailable, so here is what I found in our catalog."
+
+OUT_OF_SCOPE_ANSWER = "I can only help with refrigerator and dishwasher parts. Is there anything I can help you with regarding these?"
+
+
+def render_product_card(product: Dict) -> str:
+    """One product as a short text card"""
+    lines = [f"- {product.get('name', 'Unknown')} (Part Number: {product.get('id')})"]
+    details = []
+    if product.get('price'):
+        details.append(f"Price: {product['price']}")
+    if product.get('in_stock') == False:
+        details.append("Out of stock")
+    elif product.get('in_stock'):
+        details.append("In stock")
+    if details:
+        lines.append(f"  {', '.join(details)}")
+    return "\n".join(lines)
+
+
+def render_product_cards(products: List[Dict], limit: int = 3) -> str:
+    """Several products as text cards"""
+    return "\n".join(render_product_card(p) for p in products[:limit])
+
+
+def render_compatibility_answer(product_service, part_number: str, model_number: str) -> str:
+    """Compatibility verdict from the catalog"""
+    _, message = product_service.check_compatibility(part_number, model_number)
+    return f"{message}."
+
+
+def _product_subject(product: Dict) -> str:
+    """How a templated sentence names a product"""
+    return f"{product.get('name', 'Part')} ({product.get('id')})"
+
+
+def render_price_answer(product: Dict, subject: Optional[str] = None) -> str:
+    """Price of a product (subject replaces the product name, e.g. 'It')"""
+    return f"{subject or _product_subject(product)} costs {product['price']}."
+
+
+def render_stock_answer(product: Dict, subject: Optional[str] = None) -> str:
+    """Stock status of a product (subject replaces the product name, e.g. 'It')"""
+    if product.get('in_stock', True):
+        return f"{subject or _product_subject(product)} is in stock."
+    return f"{subject or _product_subject(product)} is currently out of stock."
+
+
+def render_installation_answer(product_service, product: Dict) -> str:
+    """Installation guide for a product"""
+    guide = product_service.get_installation_guide(product.get('id'))
+    if not guide:
+        return f"I don't have an installation guide for {product.get('id')}."
+    return f"Installation steps for {product.get('name', product.get('id'))} ({product.get('id')}):\n{guide}"
+
+
+def render_degraded_answer(product_service, intent: str, products: List[Dict],
+                           part_number: Optional[str] = None, model_number: Optional[str] = None) -> str:
+    """
+    Answer a turn from catalog data alone
+    
+    Args:
+        product_service: ProductService used for compatibility checks and guides
+        intent: Intent of the turn (from the local classifier)
+        products: Products retrieved for the turn
+        part_number: Part number mentioned in this turn, if any
+        model_number: Appliance model known for the session, if any
+    
+    Returns:
+        Answer text
+    """
+    if intent == "out_of_scope":
+        return OUT_OF_SCOPE_ANSWER
+    
+    sections = [DEGRADED_NOTICE]
+    
+    if intent == "compatibility" and part_number and model_number:
+        sections.append(render_compatibility_answer(product_service, part_number, model_number))
+    elif intent == "compatibility" and model_number and products:
+        sections.append(f"Parts that fit model {model_number}:")
+    elif intent == "installation" and products:
+        sections.append(render_installation_answer(product_service, products[0]))
+        return "\n\n".join(sections)
+    elif intent == "troubleshooting" and products:
+        sections.append("These parts commonly fix this kind of problem:")
+    
+    if products:
+        sections.append(render_product_cards(products))
+    else:
+        sections.append("I couldn't find a matching part. Please share the part number (PS...) or your appliance model number.")
+    
+    return "\n\n".join(sections)
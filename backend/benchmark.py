@@ -0,0 +1,766 @@
+"""
+Benchmark Module
+Reproducible offline benchmarks for the backend hot paths
+
+Builds synthetic catalogs from the SAMPLE_PRODUCTS schema, runs each suite
+against them with a deterministic stub LLM client (no network) and emits JSON
+so results can be compared across commits.
+
+Usage:
+    python benchmark.py
+    python benchmark.py --sizes 1000,100000,1000000 --output bench.json
+    python benchmark.py --suites vector_store,lookups --iterations 500
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from sample_products import SAMPLE_PRODUCTS
+from conversation_memory import summarize_locally
+from deepseek_client import DeepseekClient
+from deepseek_stub import INTENT_PROMPT_PATTERN, canned_intent, canned_completion
+
+
+BRANDS = ['Whirlpool', 'LG', 'Samsung', 'GE', 'Frigidaire', 'Kenmore', 'Maytag', 'KitchenAid']
+
+MODEL_PREFIXES = {
+    'refrigerator': ['WRF', 'WRS', 'RF', 'LFX', 'GSS', 'FFSS'],
+    'dishwasher': ['WDT', 'WDF', 'LDF', 'DW', 'GDT', 'FFBD']
+}
+
+QUERY_TEMPLATES = [
+    "{name}",
+    "{brand} {keyword}",
+    "my {category} {keyword} is broken",
+    "replacement {keyword} for {category}",
+]
+
+CHAT_MESSAGES = [
+    "Tell me about {part}",
+    "Is {part} compatible with my {model}?",
+    "How do I install {part}?",
+    "My {category} {keyword} is not working",
+    "How much does {part} cost?",
+    "What parts fit {model}?",
+]
+
+
+def _model_pool(category: str, size: int, rng: random.Random) -> List[str]:
+    """Generate a pool of synthetic model numbers for a category"""
+    prefixes = MODEL_PREFIXES[category]
+    pool = set()
+    while len(pool) < size:
+        prefix = rng.choice(prefixes)
+        suffix = ''.join(rng.choice('ABCDEFGHJKMSWZ') for _ in range(rng.randint(1, 4)))
+        pool.add(f"{prefix}{rng.randint(100, 999999)}{suffix}")
+    return sorted(pool)
+
+
+def generate_catalog(size: int, seed: int = 42) -> List[Dict]:
+    """
+    Generate a synthetic product catalog following the SAMPLE_PRODUCTS schema
+    
+    Args:
+        size: Number of products
+        seed: Random seed; the same seed always yields the same catalog
+    
+    Returns:
+        List of product dictionaries
+    """
+    rng = random.Random(seed)
+    pool_size = max(50, size // 20)
+    pools = {category: _model_pool(category, pool_size, rng) for category in MODEL_PREFIXES}
+    
+    products = []
+    for i in range(size):
+        template = SAMPLE_PRODUCTS[i % len(SAMPLE_PRODUCTS)]
+        brand = rng.choice(BRANDS)
+        category = template['category']
+        product = dict(template)
+        product.update({
+            'id': f"PS{10000000 + i}",
+            'name': f"{brand} {template['name']}",
+            'description': template['description'].replace('Whirlpool', brand),
+            'price': f"${rng.uniform(5, 400):.2f}",
+            'compatible_models': rng.sample(pools[category], rng.randint(1, 6)),
+            'in_stock': rng.random() > 0.1,
+            'rating': round(rng.uniform(3.0, 5.0), 1),
+            'reviews_count': rng.randint(0, 500),
+            'keywords': list(template['keywords']) + [brand.lower()]
+        })
+        products.append(product)
+    return products
+
+
+def generate_queries(products: List[Dict], count: int, seed: int = 7) -> List[str]:
+    """Generate deterministic free-text search queries against a catalog"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        product = rng.choice(products)
+        queries.append(rng.choice(QUERY_TEMPLATES).format(
+            name=product['name'],
+            brand=product['name'].split()[0],
+            keyword=rng.choice(product['keywords']),
+            category=product['category']
+        ))
+    return queries
+
+
+def generate_chat_messages(products: List[Dict], count: int, seed: int = 11) -> List[str]:
+    """Generate deterministic chat messages that reference real catalog entities"""
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        product = rng.choice(products)
+        messages.append(rng.choice(CHAT_MESSAGES).format(
+            part=product['id'],
+            model=rng.choice(product['compatible_models']),
+            category=product['category'],
+            keyword=rng.choice(product['keywords'])
+        ))
+    return messages
+
+
+class StubDeepseekClient(DeepseekClient):
+    """Deterministic offline stand-in for DeepseekClient"""
+    
+    def __init__(self, latency_ms: float = 0.0):
+        """
+        Initialize stub client
+        
+        Args:
+            latency_ms: Artificial delay per LLM call to emulate network time
+        """
+        super().__init__(api_key="stub")
+        self.latency_ms = latency_ms
+        self.calls = 0
+    
+    def get_response(self, user_message: str, context: str = "", conversation_history: List[Dict] = None,
+                     raise_errors: bool = False, profile: str = "default") -> str:
+        """Return a canned answer (or canned intent JSON for intent prompts)"""
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        
+        match = INTENT_PROMPT_PATTERN.search(user_message)
+        if match:
+            return json.dumps({"intent": canned_intent(match.group(1)), "entities": {}, "confidence": 0.9})
+        
+        return f"Here is what I found for: {user_message[:80]} ({len(context)} chars of context)"
+    
+    def _request_completion(self, payload: Dict, profile: str = "default") -> str:
+        """Answer calls that bypass get_response (e.g. batched intents) from the stub's canned completions"""
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return canned_completion(payload["messages"])
+    
+    def summarize_conversation(self, previous_summary: str, messages: List[Dict], max_tokens: int = 150) -> str:
+        """Summarize locally instead of calling the API"""
+        self.calls += 1
+        return summarize_locally(previous_summary, messages, max_tokens)
+
+
+def measure(fn: Callable[[int], object], iterations: int, warmup: int = 3) -> Dict:
+    """
+    Time a function over several iterations
+    
+    Args:
+        fn: Callable receiving the iteration index
+        iterations: Timed iterations
+        warmup: Untimed iterations run first
+    
+    Returns:
+        Dictionary of latency statistics in milliseconds
+    """
+    for i in range(min(warmup, iterations)):
+        fn(i)
+    
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    
+    samples.sort()
+    total = sum(samples)
+    
+    def percentile(p: float) -> float:
+        return samples[min(len(samples) - 1, int(p * len(samples)))]
+    
+    return {
+        "iterations": iterations,
+        "mean_ms": round(total / iterations, 6),
+        "p50_ms": round(percentile(0.50), 6),
+        "p95_ms": round(percentile(0.95), 6),
+        "p99_ms": round(percentile(0.99), 6),
+        "min_ms": round(samples[0], 6),
+        "max_ms": round(samples[-1], 6),
+        "ops_per_sec": round(iterations * 1000 / total, 3) if total else None
+    }
+
+
+def measure_concurrent(fn: Callable[[int], object], iterations: int, concurrency: int) -> Dict:
+    """
+    Time a function called from several threads at once
+    
+    Args:
+        fn: Callable receiving the iteration index
+        iterations: Total calls, shared by all threads
+        concurrency: Threads calling fn
+    
+    Returns:
+        Per-call latency statistics in milliseconds plus overall throughput
+    """
+    import itertools
+    
+    counter = itertools.count()
+    samples: List[float] = []
+    lock = threading.Lock()
+    
+    def worker():
+        while True:
+            i = next(counter)
+            if i >= iterations:
+                return
+            start = time.perf_counter()
+            fn(i)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                samples.append(elapsed)
+    
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    
+    samples.sort()
+    
+    def percentile(p: float) -> float:
+        return samples[min(len(samples) - 1, int(p * len(samples)))]
+    
+    return {
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "mean_ms": round(sum(samples) / len(samples), 6),
+        "p50_ms": round(percentile(0.50), 6),
+        "p95_ms": round(percentile(0.95), 6),
+        "p99_ms": round(percentile(0.99), 6),
+        "max_ms": round(samples[-1], 6),
+        "ops_per_sec": round(iterations / wall, 3)
+    }
+
+
+# ============================================================================
+# SUITES
+# ============================================================================
+
+# Every suite runs against the global vector store, which run_benchmarks
+# initializes once per catalog size.
+
+def bench_vector_store(products: List[Dict], iterations: int) -> Dict[str, Dict]:
+    """Single, lexical and batched search (index build is timed by run_benchmarks)"""
+    from vector_store import get_vector_store
+    
+    results = {}
+    store = get_vector_store()
+    queries = generate_queries(products, max(iterations, 64))
+    results["search"] = measure(lambda i: store.search(queries[i % len(queries)], top_k=10), iterations)
+    results["search_lexical"] = measure(lambda i: store.search_lexical(queries[i % len(queries)], top_k=10), iterations)
+    
+    batch = queries[:64]
+    batch_stats = measure(lambda i: store.search_batch(batch, top_k=10), max(1, iterations // 10))
+    batch_stats["queries_per_call"] = len(batch)
+    results["search_batch_64"] = batch_stats
+    return results
+
+
+def bench_lookups(products: List[Dict], iterations: int) -> Dict[str, Dict]:
+    """Exact part/model lookups and compatibility checks"""
+    from product_service import ProductService
+    
+    service = ProductService()
+    rng = random.Random(3)
+    picks = [rng.choice(products) for _ in range(max(iterations, 64))]
+    
+    return {
+        "search_by_part_number": measure(lambda i: service.search_by_part_number(picks[i % len(picks)]['id']), iterations),
+        "search_by_model": measure(lambda i: service.search_by_model(picks[i % len(picks)]['compatible_models'][0]), iterations),
+        "check_compatibility": measure(
+            lambda i: service.check_compatibility(picks[i % len(picks)]['id'], picks[-1 - i % len(picks)]['compatible_models'][0]),
+            iterations
+        ),
+        "search_products": measure(lambda i: service.search_products(picks[i % len(picks)]['name'], top_k=5), iterations),
+        "compat_graph_build": {"iterations": 1, **service.compat_graph.refresh()},
+        "related_parts": measure(lambda i: service.related_parts(picks[i % len(picks)]['id']), iterations),
+        "parts_for_model": measure(lambda i: service.parts_for_model(picks[i % len(picks)]['compatible_models'][0]), iterations)
+    }
+
+
+def bench_context(products: List[Dict], iterations: int) -> Dict[str, Dict]:
+    """LLM context assembly from product lists"""
+    from product_service import ProductService
+    
+    service = ProductService()
+    rng = random.Random(5)
+    groups = [rng.sample(products, min(5, len(products))) for _ in range(64)]
+    
+    return {
+        "build_context_string": measure(lambda i: service.build_context_string(groups[i % len(groups)]), iterations),
+        "build_context_string_budgeted": measure(
+            lambda i: service.build_context_string(groups[i % len(groups)], max_tokens=200), iterations
+        )
+    }
+
+
+def bench_chat(products: List[Dict], iterations: int) -> Dict[str, Dict]:
+    """End-to-end ChatHandler.process_message with the stub LLM"""
+    from product_service import ProductService
+    from chat_handler import ChatHandler
+    from session_prefetch import SessionPrefetcher
+    
+    handler = ChatHandler(deepseek_client=StubDeepseekClient(), product_service=ProductService())
+    messages = generate_chat_messages(products, max(iterations, 64))
+    
+    results = {
+        "process_message": measure(
+            lambda i: handler.process_message(messages[i % len(messages)], session_id=f"bench-{i % 16}"),
+            iterations
+        )
+    }
+    # Share of the generated turns the answer engine served without the LLM
+    results["direct_answers"] = {"iterations": 1, **handler.answers.stats()}
+    
+    # Follow-up turns about a model given earlier, with and without the session prefetch
+    models = list(dict.fromkeys(m for p in products[:64] for m in p.get('compatible_models', [])[:1]))[:16]
+    for mode in ("off", "boost"):
+        service = ProductService()
+        follow_up = ChatHandler(deepseek_client=StubDeepseekClient(), product_service=service,
+                                prefetcher=SessionPrefetcher(service, mode=mode))
+        for s, model in enumerate(models):
+            follow_up.process_message(f"What parts fit {model}?", session_id=f"follow-{s}")
+        results[f"follow_up_prefetch_{mode}"] = measure(
+            lambda i: follow_up.process_message("What else fits it?", session_id=f"follow-{i % len(models)}"),
+            iterations
+        )
+    return results
+
+
+def recall_at_k(baseline: List[List[Dict]], candidate: List[List[Dict]], k: int) -> float:
+    """
+    Fraction of the float top-k found by another search, counting score ties as hits
+    
+    The demo embeddings produce many equal scores, so a result counts when its exact
+    score reaches the k-th best exact score rather than only when the ids match.
+    """
+    hits = total = 0
+    for expected, found in zip(baseline, candidate):
+        if not expected:
+            continue
+        threshold = min(p['score'] for p in expected[:k]) - 1e-6
+        exact = {p['id']: p['score'] for p in expected}
+        hits += sum(1 for p in found[:k] if exact.get(p['id'], p['score']) >= threshold)
+        total += min(k, len(expected))
+    return round(hits / total, 4) if total else 1.0
+
+
+def bench_quantization(products: List[Dict], iterations: int) -> Dict[str, Dict]:
+    """
+    int8 index memory, recall@10 against float32 and search latency, with and without re-ranking
+    
+    The int8 memory row counts the float32 re-rank rows (rerank_bytes, total_bytes) next to the codes.
+    """
+    from vector_store import get_vector_store, VectorStore
+    
+    baseline = get_vector_store()
+    if baseline.quantization != "none":
+        baseline = VectorStore(quantization="none")
+        baseline.initialize_from_products(products)
+    # Float rows for re-ranking are stored at build time, so build with re-ranking on
+    quantized = VectorStore(quantization="int8", rerank_factor=int(os.environ.get("VECTOR_RERANK_FACTOR", 4)) or 4)
+    quantized.initialize_from_products(products)
+    
+    k = 10
+    queries = generate_queries(products, max(iterations, 64))
+    expected = baseline.search_batch(queries, top_k=k)
+    
+    results = {"memory_float32": {"iterations": 1, **baseline.memory_usage()},
+               "memory_int8": {"iterations": 1, **quantized.memory_usage()}}
+    
+    rerank_factor = quantized.rerank_factor
+    for name, factor in (("int8_no_rerank", 0), ("int8_rerank", rerank_factor or 4)):
+        quantized.rerank_factor = factor
+        stats = measure(lambda i: quantized.search(queries[i % len(queries)], top_k=k), iterations)
+        stats["recall_at_10"] = recall_at_k(expected, quantized.search_batch(queries, top_k=k), k)
+        stats["rerank_factor"] = factor
+        results[f"search_{name}"] = stats
+    quantized.rerank_factor = rerank_factor
+    
+    results["search_float32"] = measure(lambda i: baseline.search(queries[i % len(queries)], top_k=k), iterations)
+    return results
+
+
+def bench_intent_batching(products: List[Dict], iterations: int) -> Dict[str, Dict]:
+    """
+    Concurrent intent classification against the stub server, one call per message vs. micro-batched
+    
+    The stub answers after a fixed latency and generates at most 4 completions at once,
+    like a provider's per-key concurrency limit, so fewer calls means less queueing.
+    """
+    from deepseek_stub import StubConfig, start_stub_server_in_thread
+    from circuit_breaker import CircuitBreaker
+    from intent_batcher import IntentBatcher
+    
+    server = start_stub_server_in_thread(config=StubConfig(latency="fixed:50", max_concurrency=4))
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    messages = generate_chat_messages(products, max(iterations, 64))
+    # Distinct texts, so identical requests are not coalesced
+    messages = [f"{m} (#{i})" for i, m in enumerate(messages)]
+    
+    results = {}
+    try:
+        for name, batch_size in (("unbatched", 1), ("batch_8", 8), ("batch_16", 16)):
+            client = DeepseekClient(api_key="bench", base_url=base_url,
+                                    breaker=CircuitBreaker("bench", failure_threshold=iterations + 1))
+            batcher = IntentBatcher(client, max_batch_size=batch_size, max_wait_ms=5) if batch_size > 1 else None
+            classify = batcher.classify if batcher else client.analyze_intent
+            
+            stats = measure_concurrent(lambda i: classify(messages[i % len(messages)]), iterations, concurrency=32)
+            # Batches of one are sent as plain analyze_intent calls
+            usage = [client.get_profile_stats().get(profile, {}) for profile in ("intent", "intent_batch")]
+            stats["llm_calls"] = sum(u.get("calls", 0) for u in usage)
+            stats["prompt_tokens_per_message"] = round(sum(u.get("prompt_tokens", 0) for u in usage) / iterations, 1)
+            results[f"classify_{name}"] = stats
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    return results
+
+
+def bench_serialization(products: List[Dict], iterations: int) -> Dict[str, Dict]:
+    """
+    Cost of turning search results into a response body (search itself excluded)
+    
+    Compares formatting every product and encoding the whole response like jsonify
+    with splicing product cards pre-encoded once per catalog version, for a 5-result
+    search and a 50-query batch, plus compressing the batch body.
+    """
+    from product_service import ProductService
+    from product_payloads import encode_json, compress, SUPPORTED_ENCODINGS
+    
+    service = ProductService()
+    queries = generate_queries(products, 64)
+    searches = service.search_products_batch(queries, top_k=5)
+    batches = [list(zip(queries, searches))[i:i + 50] for i in (0, 14)]
+    
+    def envelope(data: Dict) -> Dict:
+        return {"success": True, "response": {"type": "product_results", "content": "", "data": data}}
+    
+    def jsonify_like(payload: Dict) -> bytes:
+        # Flask's default JSON provider outside debug mode
+        return json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    
+    def search_body(i: int, preencoded: bool) -> bytes:
+        results = searches[i % len(searches)]
+        if preencoded:
+            return encode_json(envelope({"products": service.payloads.cards(results), "query": ""}))
+        return jsonify_like(envelope({"products": service.format_products_for_chat(results), "query": ""}))
+    
+    def batch_body(i: int, preencoded: bool) -> bytes:
+        format_products = service.payloads.cards if preencoded else service.format_products_for_chat
+        payload = envelope({"results": [{"query": q, "products": format_products(r)} for q, r in batches[i % 2]]})
+        return encode_json(payload) if preencoded else jsonify_like(payload)
+    
+    results = {}
+    for name, body in (("search_5", search_body), ("batch_50x5", batch_body)):
+        for variant, preencoded in (("jsonify", False), ("preencoded", True)):
+            stats = measure(lambda i: body(i, preencoded), iterations)
+            stats["bytes"] = len(body(0, preencoded))
+            results[f"{name}_{variant}"] = stats
+    
+    batch = batch_body(0, True)
+    for encoding in SUPPORTED_ENCODINGS:
+        stats = measure(lambda i: compress(batch, encoding), max(1, iterations // 10))
+        stats["bytes"] = len(compress(batch, encoding))
+        results[f"batch_50x5_{encoding}"] = stats
+    return results
+
+
+def bench_sharding(products: List[Dict], iterations: int) -> Dict[str, Dict]:
+    """
+    Search latency against shard count at a fixed catalog size
+    
+    In-process shards are searched on a thread pool; the processes_4 variant puts
+    4 shards in search server processes. recall_at_10 compares with the unsharded
+    store (exact search, so it should be 1.0).
+    """
+    from vector_store import VectorStore
+    from sharded_store import ShardedVectorStore, start_shard_processes
+    
+    k = 10
+    queries = generate_queries(products, max(iterations, 64))
+    batch = queries[:64]
+    baseline = VectorStore()
+    baseline.initialize_from_products(products)
+    expected = baseline.search_batch(batch, top_k=k)
+    
+    def run(name: str, store: VectorStore, build_seconds: float) -> None:
+        stats = measure(lambda i: store.search(queries[i % len(queries)], top_k=k), iterations)
+        stats["build_s"] = round(build_seconds, 3)
+        stats["recall_at_10"] = recall_at_k(expected, store.search_batch(batch, top_k=k), k)
+        results[f"search_{name}"] = stats
+        batch_stats = measure(lambda i: store.search_batch(batch, top_k=k), max(1, iterations // 10))
+        batch_stats["queries_per_call"] = len(batch)
+        results[f"search_batch_64_{name}"] = batch_stats
+    
+    results = {}
+    for num_shards in (1, 2, 4, 8):
+        start = time.perf_counter()
+        store = ShardedVectorStore(num_shards=num_shards)
+        store.initialize_from_products(products)
+        run(f"shards_{num_shards}", store, time.perf_counter() - start)
+        store.close()
+    
+    paths, processes = start_shard_processes(4)
+    try:
+        start = time.perf_counter()
+        store = ShardedVectorStore(shard_sockets=paths)
+        store.initialize_from_products(products)
+        run("processes_4", store, time.perf_counter() - start)
+        store.close()
+    finally:
+        for process in processes:
+            process.terminate()
+    return results
+
+
+def _resident_mb() -> float:
+    """This process's resident set size in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class _CatalogCopy:
+    """A worker-held copy of the server's catalog, as RemoteVectorStore kept before"""
+    
+    def __init__(self, remote):
+        self.version = remote.version
+        self.metadata = remote.metadata
+
+
+def _measure_worker(mode: str, socket_path: str, catalog_path: str, queries: List[str], results) -> None:
+    """
+    Worker process: set up the product service like main.py does, serve a few requests, report RSS
+    
+    Modes: imports (modules only), local (index built in the worker), remote_full_catalog
+    (search server client holding the whole catalog and its own catalog indexes) and
+    remote (search server client asking the server for products and catalog lookups).
+    """
+    import gc
+    from compat_graph import CompatGraph
+    from entity_extractor import EntityExtractor
+    from product_service import ProductService
+    from search_server import RemoteVectorStore
+    from suggest_index import SuggestIndex
+    from vector_store import initialize_vector_store, set_vector_store
+    
+    with contextlib.redirect_stdout(sys.stderr):
+        if mode != "imports":
+            if mode == "local":
+                with open(catalog_path) as f:
+                    initialize_vector_store(json.load(f))
+            else:
+                set_vector_store(RemoteVectorStore(socket_path))
+            
+            service = ProductService()
+            if mode == "remote_full_catalog":
+                catalog = _CatalogCopy(service.vector_store)
+                service.entity_extractor = EntityExtractor(catalog)
+                service.suggest_index = SuggestIndex(catalog)
+                service.compat_graph = CompatGraph(catalog)
+            
+            service.compat_graph.refresh()
+            for query in queries:
+                service.search_products_for_display(query, top_k=5)
+                service.entity_extractor.extract(query)
+                service.suggest(query[:3])
+        gc.collect()
+    results.put((mode, _resident_mb()))
+
+
+def bench_worker_memory(products: List[Dict], iterations: int) -> Dict[str, Dict]:
+    """
+    Resident memory of one backend worker after start-up and a few requests
+    
+    Each variant runs in a fresh process (spawned, so nothing is inherited from this
+    one): local builds the index in the worker; remote_full_catalog is a search server
+    client that keeps the whole catalog and builds the entity vocabulary, suggest index
+    and compatibility graph itself, as workers did before those moved to the server;
+    remote is the current client. catalog_mb is the RSS above a worker that only
+    imported the modules, and the remote row reports its saving against
+    remote_full_catalog per worker.
+    """
+    import multiprocessing
+    import tempfile
+    from search_server import start_search_server_in_thread
+    from vector_store import VectorStore
+    
+    store = VectorStore()
+    store.initialize_from_products(products)
+    queries = generate_queries(products, 32)
+    context = multiprocessing.get_context("spawn")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, "search.sock")
+        catalog_path = os.path.join(directory, "catalog.json")
+        with open(catalog_path, "w") as f:
+            json.dump(products, f)
+        server = start_search_server_in_thread(store, socket_path)
+        
+        rss = {}
+        try:
+            for mode in ("imports", "local", "remote_full_catalog", "remote"):
+                queue = context.Queue()
+                process = context.Process(target=_measure_worker, args=(mode, socket_path, catalog_path, queries, queue))
+                process.start()
+                _, rss[mode] = queue.get(timeout=600)
+                process.join()
+        finally:
+            server.shutdown()
+            server.server_close()
+    
+    results = {}
+    for mode in ("local", "remote_full_catalog", "remote"):
+        results[f"worker_rss_{mode}"] = {
+            "iterations": 1,
+            "rss_mb": round(rss[mode], 1),
+            "catalog_mb": round(rss[mode] - rss["imports"], 1)
+        }
+    saved = rss["remote_full_catalog"] - rss["remote"]
+    catalog_before = rss["remote_full_catalog"] - rss["imports"]
+    results["worker_rss_remote"]["saved_mb_per_worker"] = round(saved, 1)
+    results["worker_rss_remote"]["saved_pct"] = round(100 * saved / catalog_before, 1) if catalog_before > 0 else 0.0
+    return results
+
+
+SUITES: Dict[str, Callable[[List[Dict], int], Dict[str, Dict]]] = {
+    "vector_store": bench_vector_store,
+    "lookups": bench_lookups,
+    "context": bench_context,
+    "chat": bench_chat,
+    "quantization": bench_quantization,
+    "intent_batching": bench_intent_batching,
+    "serialization": bench_serialization,
+    "sharding": bench_sharding,
+    "worker_memory": bench_worker_memory,
+}
+
+
+def _git_commit() -> Optional[str]:
+    """Current git commit, if available"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def run_benchmarks(sizes: List[int], suites: List[str], iterations: int, seed: int = 42) -> Dict:
+    """
+    Run the selected suites at every catalog size
+    
+    Returns:
+        JSON-serializable report
+    """
+    import numpy as np
+    from vector_store import initialize_vector_store
+    
+    try:
+        import faiss  # noqa: F401
+        faiss_available = True
+    except ImportError:
+        faiss_available = False
+    
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "faiss": faiss_available,
+            "seed": seed,
+            "iterations": iterations
+        },
+        "results": []
+    }
+    
+    for size in sizes:
+        print(f"Generating catalog with {size} products...", file=sys.stderr)
+        products = generate_catalog(size, seed=seed)
+        
+        start = time.perf_counter()
+        initialize_vector_store(products)
+        build_ms = (time.perf_counter() - start) * 1000
+        report["results"].append({"suite": "vector_store", "benchmark": "build_index", "catalog_size": size,
+                                  "iterations": 1, "mean_ms": round(build_ms, 3)})
+        
+        for suite in suites:
+            print(f"  Running suite '{suite}'...", file=sys.stderr)
+            for name, stats in SUITES[suite](products, iterations).items():
+                report["results"].append({"suite": suite, "benchmark": name, "catalog_size": size, **stats})
+    
+    return report
+
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the backend hot paths")
+    parser.add_argument("--sizes", default="1000,100000", help="Comma-separated catalog sizes (e.g. 1000,100000,1000000)")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"Comma-separated suites: {', '.join(SUITES)}")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed iterations per benchmark")
+    parser.add_argument("--seed", type=int, default=42, help="Catalog generation seed")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+    
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    suites = [s for s in args.suites.split(",") if s]
+    unknown = [s for s in suites if s not in SUITES]
+    if unknown:
+        parser.error(f"Unknown suites: {', '.join(unknown)}")
+    
+    # Keep stdout clean for the JSON report; service modules log with print
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run_benchmarks(sizes, suites, args.iterations, seed=args.seed)
+    output = json.dumps(report, indent=2)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+        print(f"Benchmark report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
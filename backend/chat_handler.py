@@ -3,9 +3,46 @@ Chat Handler Module
 Orchestrates the chat flow, maintains conversation history, and coordinates services
 """
 
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
 from typing import Dict, List, Optional, Tuple
-from deepseek_client import create_deepseek_client, DeepseekClient
+from deepseek_client import create_deepseek_client, DeepseekClient, INTENTS
 from product_service import create_product_service, ProductService
+from context_builder import estimate_tokens, truncate_to_tokens
+from conversation_memory import ConversationMemory, ConversationMemoryManager
+from answer_templates import render_degraded_answer
+from answer_engine import create_answer_engine, AnswerEngine
+from intent_batcher import create_intent_batcher, IntentBatcher
+from session_prefetch import create_session_prefetcher, SessionPrefetcher, ModelPrefetch
+from event_log import create_event_log, EventLog
+from admission import AdmissionPool, AdmissionRejected
+from metrics import get_metrics_registry, StageTimer
+
+
+STAGE_LATENCY = get_metrics_registry().histogram(
+    "chat_stage_seconds", "Latency of each chat pipeline stage", labelnames=("stage",)
+)
+TURN_LATENCY = get_metrics_registry().histogram(
+    "chat_turn_seconds", "End-to-end latency of process_message", labelnames=("intent",)
+)
+SPECULATIVE_RETRIEVALS = get_metrics_registry().counter(
+    "chat_speculative_retrievals_total",
+    "Retrieval branches started before the intent was known, by outcome (used/discarded/cancelled/miss)",
+    labelnames=("outcome",)
+)
+DEGRADED_TURNS = get_metrics_registry().counter(
+    "chat_degraded_turns_total", "Turns answered from catalog templates because the LLM was unavailable",
+    labelnames=("intent",)
+)
+
+# Product cards per related-parts rail (other parts for the model, frequently paired parts)
+RELATED_LIMIT = 3
+
+# Products a generic search returns to the chat pipeline
+SEARCH_TOP_K = 5
+
+# Retrieved part ids recorded per turn in the event log
+EVENT_MAX_IDS = 20
 
 
 class ChatSession:
@@ -18,6 +55,9 @@ class ChatSession:
         self.context_products: List[Dict] = []  # Products mentioned in this session
         self.user_model: Optional[str] = None  # User's appliance model if provided
         self.last_intent: Optional[str] = None  # Last detected intent
+        self.history_start = 0  # First message still sent as history (prefix_cache layout)
+        self.memory = ConversationMemory()  # Rolling summary and facts for older turns
+        self.prefetch: Optional[ModelPrefetch] = None  # Parts compatible with user_model, computed in the background
     
     def add_message(self, role: str, content: str) -> None:
         """Add a message to history"""
@@ -27,29 +67,60 @@ class ChatSession:
         })
     
     def get_history(self, last_n: int = 6) -> List[Dict]:
-        """Get last N messages for context (excluding system messages)"""
-        return [m for m in self.messages[-last_n:] if m.get("role") in ["user", "assistant"]]
+        """Get last N messages not yet folded into the summary (excluding system messages)"""
+        start = max(self.memory.summarized_upto, len(self.messages) - last_n)
+        return [m for m in self.messages[start:] if m.get("role") in ["user", "assistant"]]
     
     def clear_history(self) -> None:
         """Clear conversation history"""
         self.messages = []
         self.context_products = []
+        self.history_start = 0
+        self.memory = ConversationMemory()
 
 
 class ChatHandler:
     """Main chat handler coordinating services"""
     
-    def __init__(self, deepseek_client: Optional[DeepseekClient] = None, product_service: Optional[ProductService] = None):
+    def __init__(self, deepseek_client: Optional[DeepseekClient] = None, product_service: Optional[ProductService] = None,
+                 fanout_workers: int = 8, max_speculative_branches: int = 3,
+                 memory_manager: Optional[ConversationMemoryManager] = None, answer_engine: Optional[AnswerEngine] = None,
+                 intent_batcher: Optional[IntentBatcher] = None, prefetcher: Optional[SessionPrefetcher] = None,
+                 event_log: Optional[EventLog] = None, llm_slots: Optional[AdmissionPool] = None):
         """
         Initialize chat handler
         
         Args:
             deepseek_client: Deepseek client instance (created if not provided)
             product_service: Product service instance (created if not provided)
+            fanout_workers: Threads shared by all turns for speculative retrieval while the
+                request thread classifies the intent (0 = run serially)
+            max_speculative_branches: Distinct retrievals started while the intent call is in flight
+            memory_manager: Summarizes older turns in the background (created if not provided)
+            answer_engine: Answers compatibility/price/stock lookups without the LLM (created if not provided)
+            intent_batcher: Shares intent LLM calls between concurrent turns (from environment
+                if not provided, with the batch size capped at llm_slots' max_concurrent;
+                None there means one call per turn)
+            prefetcher: Prefetches the parts for each session's model (from environment if not provided)
+            event_log: Records one event per turn (from environment if not provided; None there
+                means no event log)
+            llm_slots: Admission pool held by each turn across its Deepseek calls (intent and
+                answer) and by background summary calls, so turns answered from the catalog
+                never wait for a slot (None = not limited)
         """
         self.llm = deepseek_client or create_deepseek_client()
         self.products = product_service or create_product_service()
         self.sessions: Dict[str, ChatSession] = {}
+        self.max_speculative_branches = max_speculative_branches
+        self.memory = memory_manager or ConversationMemoryManager(self.llm, llm_slots=llm_slots)
+        self.answers = answer_engine or create_answer_engine(self.products)
+        self.intent_batcher = intent_batcher or create_intent_batcher(
+            self.llm, max_callers=llm_slots.max_concurrent if llm_slots is not None else None
+        )
+        self.prefetcher = prefetcher or create_session_prefetcher(self.products)
+        self.event_log = event_log or create_event_log()
+        self.llm_slots = llm_slots
+        self._executor = ThreadPoolExecutor(max_workers=fanout_workers, thread_name_prefix="chat-fanout") if fanout_workers > 0 else None
     
     def get_or_create_session(self, session_id: str) -> ChatSession:
         """Get existing session or create new one"""
@@ -68,122 +139,396 @@ class ChatHandler:
         Returns:
             Dictionary with:
             - response_text: LLM response
-            - products: Relevant products to display
+            - products: Product cards to display (pre-encoded JSON array, see json_response in main)
             - suggestions: Next suggested actions
+            - related: Related-part rails with product cards (see _related_products)
             - intent: Detected user intent
             - metadata: Additional metadata
+        
+        Raises:
+            AdmissionRejected: if the turn needs the LLM and no slot frees up in time
+                (the user message is then left out of the session history)
         """
+        timer = StageTimer(STAGE_LATENCY)
+        # Turns of ongoing conversations go ahead of new sessions for LLM slots
+        priority = 0 if session_id in self.sessions else 1
         session = self.get_or_create_session(session_id)
         
         # Add user message to history
         session.add_message("user", user_message)
         
         # Extract entities
-        part_number = self.llm.extract_part_number(user_message)
-        model_number = self.llm.extract_model_number(user_message)
+        with timer.stage("entity_extraction"):
+            entities = self.products.entity_extractor.extract(user_message)
+            part_number = entities["part_numbers"][0] if entities["part_numbers"] else None
+            model_number = entities["model_numbers"][0] if entities["model_numbers"] else None
         
         # Update session context
         if model_number:
             session.user_model = model_number
-        
-        # Analyze intent
-        intent_analysis = self.llm.analyze_intent(user_message)
-        intent = intent_analysis.get("intent", "product_info")
-        session.last_intent = intent
-        
-        # Get relevant products based on intent
-        products = self._get_products_for_intent(user_message, intent, part_number, model_number)
-        session.context_products = products
-        
-        # Build context for LLM
-        context = self._build_context(user_message, products, intent, model_number)
-        
-        # Get LLM response
-        response_text = self.llm.get_response(
-            user_message=user_message,
-            context=context,
-            conversation_history=session.get_history()
-        )
+        if session.user_model:
+            # Follow-up turns are mostly about this model; gather its parts off the request path
+            session.prefetch = self.prefetcher.start(session.user_model, session.prefetch)
+        
+        # Lookups the catalog answers on its own skip intent classification and the LLM
+        with timer.stage("direct_answer"):
+            direct = self.answers.answer(user_message, entities["part_numbers"], entities["model_numbers"],
+                                         session.user_model, session.memory.facts()["parts"])
+        
+        # A turn that needs the LLM holds one chat slot from intent classification through the
+        # answer, so slow Deepseek calls never tie up more request threads than the pool allows
+        slot_start = None
+        if not direct and self.llm_slots is not None and self.llm.is_available():
+            with timer.stage("llm_queue"):
+                try:
+                    self.llm_slots.acquire(priority)
+                except AdmissionRejected:
+                    session.messages.pop()  # The turn is not answered; let the client retry it
+                    raise
+            slot_start = time.perf_counter()
+        
+        usage = None
+        try:
+            if direct:
+                intent, products = direct["intent"], direct["products"]
+                retrieval, intent_usage = "direct", None
+            else:
+                # Classify intent and retrieve products concurrently
+                intent, products, retrieval, intent_usage = self._resolve_intent_and_products(
+                    user_message, part_number, model_number, timer, session
+                )
+            session.last_intent = intent
+            session.context_products = products
+            
+            # While the API is down, answer from catalog data without touching the network
+            degraded = not direct and not self.llm.is_available()
+            
+            if direct:
+                response_text = direct["text"]
+            elif not degraded:
+                with timer.stage("context"):
+                    # Fit history into the prompt budget; whatever is left goes to context
+                    history, context_budget = self._fit_history(session, user_message)
+                    
+                    # Build context for LLM
+                    context = self._build_context(user_message, products, intent, model_number, max_tokens=context_budget,
+                                                  memory=session.memory.render())
+                
+                # Get LLM response
+                with timer.stage("llm_response"):
+                    self.llm.take_last_usage()  # Forget calls made earlier on this thread
+                    try:
+                        response_text = self.llm.get_response(
+                            user_message=user_message,
+                            context=context,
+                            conversation_history=history,
+                            raise_errors=True,
+                            profile=intent
+                        )
+                        usage = self.llm.take_last_usage()
+                    except Exception as e:
+                        print(f"LLM response failed, answering from catalog: {str(e)}")
+                        degraded = True
+        finally:
+            # Degraded answers are rendered from the catalog after the slot is returned
+            if slot_start is not None:
+                self.llm_slots.release(time.perf_counter() - slot_start)
+        
+        if degraded:
+            with timer.stage("degraded_answer"):
+                response_text = render_degraded_answer(self.products, intent, products, part_number, session.user_model)
+            DEGRADED_TURNS.inc(intent=intent)
         
         # Add assistant response to history
         session.add_message("assistant", response_text)
         
-        # Generate suggestions
-        suggestions = self._generate_suggestions(intent, products)
-        
-        # Format products for frontend
-        formatted_products = self.products.format_products_for_chat(products[:3])
+        # Update session memory; older turns are summarized in the background
+        self.memory.record_turn(session.memory, user_message, response_text, session.user_model, intent)
+        self.memory.maybe_refresh(session.memory, session.messages)
+        
+        with timer.stage("formatting"):
+            # Generate suggestions
+            suggestions = self._generate_suggestions(intent, products)
+            
+            # Product cards for the frontend, encoded once per catalog version
+            shown = products[:3]
+            product_cards = self.products.payloads.cards(shown)
+            related = self._related_products(intent, shown, part_number, session.user_model)
+        
+        turn_seconds = timer.total_ms() / 1000
+        TURN_LATENCY.observe(turn_seconds, intent=intent)
+        self.answers.record_turn(turn_seconds, direct=direct, llm=not direct and not degraded)
+        timings = timer.summary()
+        
+        if self.event_log is not None:
+            turn_usage = self._turn_usage(intent_usage, usage)
+            # Queued for the writer thread; never blocks the turn
+            self.event_log.log(
+                "chat_turn",
+                session_id=session_id,
+                message_count=len(session.messages),
+                intent=intent,
+                part_number=part_number,
+                model_number=model_number,
+                user_model=session.user_model,
+                direct_answer=direct["kinds"] if direct else None,
+                degraded=degraded,
+                retrieved_ids=[p.get('id') for p in products[:EVENT_MAX_IDS]],
+                retrieved_count=len(products),
+                shown_ids=[p.get('id') for p in shown],
+                usage=turn_usage,
+                cache={
+                    "retrieval": retrieval,
+                    "prefetch": (("ready" if session.prefetch.ready() else "pending") if session.prefetch else None),
+                    "prompt_cache_hit_tokens": turn_usage["prompt_cache_hit_tokens"] if turn_usage else None
+                },
+                timings_ms=timings
+            )
         
         return {
             "response_text": response_text,
-            "products": formatted_products,
+            "products": product_cards,
             "suggestions": suggestions,
+            "related": related,
             "intent": intent,
             "extracted_part_number": part_number,
             "extracted_model_number": model_number,
             "metadata": {
                 "session_id": session_id,
                 "message_count": len(session.messages),
-                "user_model": session.user_model
+                "user_model": session.user_model,
+                "degraded": degraded,
+                "direct_answer": direct["kinds"] if direct else None,
+                "timings_ms": timings
             }
         }
     
-    def _get_products_for_intent(self, message: str, intent: str, part_number: Optional[str], model_number: Optional[str]) -> List[Dict]:
-        """Get relevant products based on intent and extracted entities"""
+    def _fit_history(self, session: ChatSession, user_message: str) -> Tuple[List[Dict], int]:
+        """
+        Pick the history sent with this turn and the context budget left over
+        
+        The current user message is sent as its own turn, so it is left out of the
+        history, as are turns already folded into the session summary. With the
+        prefix_cache layout history is append-only from session.history_start; when
+        it outgrows the budget the start jumps ahead by at least half the window, so
+        the following turns share a stable prefix again.
+        """
+        builder = self.products.context_builder
+        system_prompt = self.llm.SYSTEM_PROMPT
+        
+        if getattr(self.llm, 'prompt_layout', None) != "prefix_cache":
+            return builder.fit_history(system_prompt, user_message, session.get_history()[:-1])
+        
+        session.history_start = max(session.history_start, session.memory.summarized_upto)
+        window = session.messages[session.history_start:-1]
+        history, context_budget = builder.fit_history(system_prompt, user_message, window)
+        if len(history) < len(window):
+            start = session.history_start + max(len(window) - len(history), len(window) // 2)
+            # Keep the window starting on a user turn
+            while start < len(session.messages) - 1 and session.messages[start].get("role") != "user":
+                start += 1
+            session.history_start = start
+            history, context_budget = builder.fit_history(system_prompt, user_message, session.messages[start:-1])
+        
+        return history, context_budget
+    
+    def _resolve_intent_and_products(self, message: str, part_number: Optional[str], model_number: Optional[str], timer: StageTimer,
+                                     session: Optional[ChatSession] = None) -> Tuple[str, List[Dict], str, Optional[Dict]]:
+        """
+        Run intent classification and retrieval for the likely intents at the same time
+        
+        Retrieval only depends on the intent through a handful of distinct plans, so the
+        plans for the locally predicted intent (and the next most common ones) start on the
+        fanout executor while the request thread classifies the intent. Once the intent
+        arrives, the matching branch is used and the rest are cancelled, making the critical
+        path max(intent, retrieval). Classification stays on the request thread, so turns
+        waiting for an intent batch never hold executor threads.
+        Retrieval reads the session's model and prefetched parts when a session is given.
+        
+        Returns:
+            Tuple of (intent, products, how retrieval ran: serial/speculative/miss, token
+            usage of the intent call or None)
+        """
+        session_model = session.user_model if session else None
+        prefetch = session.prefetch if session else None
+        
+        if self._executor is None or not self.llm.is_available():
+            with timer.stage("intent"):
+                result, intent_usage = self._analyze_intent(message)
+                intent = result.get("intent", "product_info")
+            with timer.stage("retrieval"):
+                products = self._get_products_for_intent(message, intent, part_number, model_number, session_model, prefetch)
+            return intent, products, "serial", intent_usage
+        
+        with timer.stage("intent"):
+            predicted = self.llm.classify_intent_locally(message).get("intent")
+            branches: Dict[Tuple, Future] = {}
+            for candidate in (predicted,) + INTENTS:
+                plan = self._retrieval_plan(message, candidate, part_number, model_number, session_model)
+                if plan in branches:
+                    continue
+                if len(branches) >= self.max_speculative_branches:
+                    break
+                branches[plan] = self._executor.submit(self._run_retrieval, plan, prefetch)
+            
+            result, intent_usage = self._analyze_intent(message)
+            intent = result.get("intent", "product_info")
+        
+        with timer.stage("retrieval"):
+            plan = self._retrieval_plan(message, intent, part_number, model_number, session_model)
+            chosen = branches.pop(plan, None)
+            if chosen is not None:
+                SPECULATIVE_RETRIEVALS.inc(outcome="used")
+                products = chosen.result()
+                retrieval = "speculative"
+            else:
+                SPECULATIVE_RETRIEVALS.inc(outcome="miss")
+                products = self._run_retrieval(plan, prefetch)
+                retrieval = "miss"
+            
+            for future in branches.values():
+                SPECULATIVE_RETRIEVALS.inc(outcome="cancelled" if future.cancel() else "discarded")
+        
+        return intent, products, retrieval, intent_usage
+    
+    def _analyze_intent(self, message: str) -> Tuple[Dict, Optional[Dict]]:
+        """
+        Classify intent through the micro-batcher when batching is on
+        
+        Returns:
+            Tuple of (analyze_intent result, token usage of the call made on this thread or
+            None: keyword fallback, coalesced call, or a batch sent by another turn)
+        """
+        self.llm.take_last_usage()  # Request threads are reused; drop usage of earlier calls
+        if self.intent_batcher is not None:
+            result = self.intent_batcher.classify(message)
+        else:
+            result = self.llm.analyze_intent(message)
+        return result, self.llm.take_last_usage()
+    
+    @staticmethod
+    def _turn_usage(*calls: Optional[Dict]) -> Optional[Dict]:
+        """Token usage summed over a turn's LLM calls (intent, answer), with each call listed"""
+        calls = [usage for usage in calls if usage]
+        if not calls:
+            return None
+        totals = {key: sum(usage[key] for usage in calls)
+                  for key in ("prompt_tokens", "completion_tokens", "prompt_cache_hit_tokens", "prompt_cache_miss_tokens")}
+        return {**totals, "calls": calls}
+    
+    def _retrieval_plan(self, message: str, intent: str, part_number: Optional[str], model_number: Optional[str],
+                        session_model: Optional[str] = None) -> Tuple:
+        """Map an intent and extracted entities to the retrieval it needs, as a hashable plan"""
         
         if intent == "product_info" and part_number:
             # Search by part number
-            product = self.products.search_by_part_number(part_number)
-            return [product] if product else []
+            return ("part", part_number)
         
         elif intent == "compatibility":
             if part_number and model_number:
                 # Check compatibility
-                product = self.products.search_by_part_number(part_number)
-                return [product] if product else []
-            elif model_number:
-                # Find parts for model
-                return self.products.search_by_model(model_number)
+                return ("part", part_number)
+            elif model_number or session_model:
+                # Find parts for model (a follow-up turn uses the model given earlier)
+                return ("model", model_number or session_model)
             else:
-                return self.products.search_products(message)
+                return ("search", message)
         
         elif intent == "installation" and part_number:
             # Get installation guide
-            product = self.products.search_by_part_number(part_number)
-            return [product] if product else []
+            return ("part", part_number)
         
         elif intent == "troubleshooting":
             # Get troubleshooting guides
-            return self.products.get_troubleshooting_guide(message)
+            return ("troubleshooting", message)
         
-        elif intent == "order":
-            # Generic product search
-            return self.products.search_products(message)
+        else:
+            # Orders and everything else: generic product search
+            return ("search", message)
+    
+    def _run_retrieval(self, plan: Tuple, prefetch: Optional[ModelPrefetch] = None) -> List[Dict]:
+        """
+        Execute a retrieval plan from _retrieval_plan
         
+        With a session prefetch, model plans read the prefetched parts and searches
+        are re-ranked towards parts that fit the session's model.
+        """
+        kind, argument = plan
+        
+        if kind == "part":
+            product = self.products.search_by_part_number(argument)
+            return [product] if product else []
+        elif kind == "model":
+            parts = self.prefetcher.model_parts(argument, prefetch)
+            return parts if parts is not None else self.products.search_by_model(argument)
+        elif kind == "troubleshooting":
+            return self.prefetcher.rank(self.products.get_troubleshooting_guide(argument), prefetch)
+        elif self.prefetcher.boosting(prefetch):
+            # Widen the candidates so compatible parts just below the cut can move up
+            candidates = self.products.search_products(argument, top_k=SEARCH_TOP_K * 2)
+            return self.prefetcher.rank(candidates, prefetch, top_k=SEARCH_TOP_K)
         else:
-            # Default: general search
-            return self.products.search_products(message)
+            return self.products.search_products(argument, top_k=SEARCH_TOP_K)
+    
+    def _get_products_for_intent(self, message: str, intent: str, part_number: Optional[str], model_number: Optional[str],
+                                 session_model: Optional[str] = None, prefetch: Optional[ModelPrefetch] = None) -> List[Dict]:
+        """Get relevant products based on intent and extracted entities"""
+        return self._run_retrieval(self._retrieval_plan(message, intent, part_number, model_number, session_model), prefetch)
     
-    def _build_context(self, message: str, products: List[Dict], intent: str, model_number: Optional[str]) -> str:
-        """Build context string for LLM"""
+    def _build_context(self, message: str, products: List[Dict], intent: str, model_number: Optional[str], max_tokens: Optional[int] = None,
+                       memory: str = "") -> str:
+        """
+        Build context string for LLM
+        
+        With max_tokens set, everything around the products is charged first: the labels
+        the client wraps context and the customer message in, the model notes and the
+        conversation memory block (cut down if it alone would overflow). The installation
+        guide then gets at most half of the remaining budget and products are trimmed by
+        relevance to fit the rest.
+        """
+        notes = []
+        if intent == "compatibility" and model_number:
+            notes.append(f"\nUser's appliance model: {model_number}")
+        
+        # Add user model if known
+        if model_number:
+            notes.append(f"\nNote: User has model {model_number}")
+        
+        guide = None
+        if intent == "installation" and products:
+            guide = self.products.get_installation_guide(products[0].get('id'))
+        
+        guide_budget = None
+        products_budget = None
+        if max_tokens is not None:
+            remaining = (max_tokens - estimate_tokens(DeepseekClient.CONTEXT_LABEL) - estimate_tokens(DeepseekClient.MESSAGE_LABEL)
+                         - sum(estimate_tokens(n) for n in notes))
+            if memory:
+                memory = truncate_to_tokens(memory, remaining - 1)
+                remaining -= estimate_tokens(f"\n{memory}") if memory else 0
+            remaining = max(0, remaining)
+            guide_budget = min(estimate_tokens(guide) + 1, remaining // 2) if guide else 0
+            products_budget = remaining - guide_budget
+        
+        if memory:
+            notes.insert(0, f"\n{memory}")
+        
         context_parts = []
         
         # Add product information
         if products:
-            context_parts.append(self.products.build_context_string(products))
+            block = self.products.build_context_string(products, max_tokens=products_budget)
+            if products_budget is None or estimate_tokens(block) <= products_budget:
+                context_parts.append(block)
         
         # Add intent-specific context
-        if intent == "installation" and products:
-            guide = self.products.get_installation_guide(products[0].get('id'))
+        if guide:
+            if guide_budget is not None:
+                guide = truncate_to_tokens(guide, guide_budget - estimate_tokens("\nInstallation Guide:\n"))
             if guide:
                 context_parts.append(f"\nInstallation Guide:\n{guide}")
         
-        elif intent == "compatibility" and model_number:
-            context_parts.append(f"\nUser's appliance model: {model_number}")
-        
-        # Add user model if known
-        if model_number:
-            context_parts.append(f"\nNote: User has model {model_number}")
+        context_parts.extend(notes)
         
         return "\n".join(context_parts) if context_parts else ""
     
@@ -220,10 +565,50 @@ class ChatHandler:
         
         return suggestions
     
+    def _related_products(self, intent: str, shown: List[Dict], part_number: Optional[str],
+                          model_number: Optional[str]) -> List[Dict]:
+        """
+        Related parts for the turn, read from the precomputed compatibility graph
+        
+        Costs O(degree) per rail, with no vector search or LLM call, so "View other
+        compatible parts" is answered before it is asked.
+        
+        Returns:
+            List of rails, each with kind ('model_parts' or 'paired_parts'), title and
+            products (pre-encoded card array); parts already shown are left out
+        """
+        if intent == "out_of_scope":
+            return []
+        
+        seen = [p.get('id') for p in shown]
+        rails = []
+        if model_number:
+            parts = self.products.parts_for_model(model_number, limit=RELATED_LIMIT, exclude=seen)
+            if parts:
+                rails.append({
+                    "kind": "model_parts",
+                    "title": f"Other parts for {model_number}",
+                    "products": self.products.payloads.cards(parts)
+                })
+                seen += [p.get('id') for p in parts]
+        
+        anchor = part_number or (shown[0].get('id') if shown else None)
+        if anchor:
+            parts = self.products.related_parts(anchor, limit=RELATED_LIMIT, exclude=seen)
+            if parts:
+                rails.append({
+                    "kind": "paired_parts",
+                    "title": f"Frequently paired with {anchor}",
+                    "products": self.products.payloads.cards(parts)
+                })
+        
+        return rails
+    
     def clear_session(self, session_id: str) -> None:
         """Clear a specific session"""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        session = self.sessions.pop(session_id, None)
+        if session and session.prefetch:
+            session.prefetch.cancel()
     
     def get_session_info(self, session_id: str) -> Dict:
         """Get information about a session"""
@@ -236,12 +621,14 @@ class ChatHandler:
             "message_count": len(session.messages),
             "user_model": session.user_model,
             "last_intent": session.last_intent,
-            "products_mentioned": len(session.context_products)
+            "products_mentioned": len(session.context_products),
+            "prefetch": session.prefetch.stats() if session.prefetch else None,
+            "memory": {**session.memory.facts(), "summary": session.memory.summary}
         }
 
 
-def create_chat_handler(deepseek_api_key: Optional[str] = None) -> ChatHandler:
+def create_chat_handler(deepseek_api_key: Optional[str] = None, llm_slots: Optional[AdmissionPool] = None) -> ChatHandler:
     """Factory function to create chat handler with all dependencies"""
     llm = create_deepseek_client(api_key=deepseek_api_key)
     products = create_product_service()
-    return ChatHandler(deepseek_client=llm, product_service=products)
\ No newline at end of file
+    return ChatHandler(deepseek_client=llm, product_service=products, llm_slots=llm_slots)
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+Circuit Breaker Module
+Stops calling a failing upstream after consecutive failures and probes it again later
+States: closed (normal), open (fail fast), half_open (let a probe through)
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+from metrics import get_metrics_registry
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Numeric state for the gauge
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+BREAKER_STATE = get_metrics_registry().gauge(
+    "circuit_breaker_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)", labelnames=("name",)
+)
+BREAKER_TRANSITIONS = get_metrics_registry().counter(
+    "circuit_breaker_transitions_total", "Circuit breaker state changes", labelnames=("name", "state")
+)
+BREAKER_REJECTED = get_metrics_registry().counter(
+    "circuit_breaker_rejected_total", "Calls refused without reaching upstream", labelnames=("name",)
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit is open"""
+    pass
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with timed half-open probing"""
+    
+    def __init__(self, name: str = "deepseek", failure_threshold: int = 3, recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1):
+        """
+        Initialize circuit breaker
+        
+        Args:
+            name: Name used in metrics
+            failure_threshold: Consecutive failures (errors or timeouts) that open the circuit
+            recovery_timeout: Seconds the circuit stays open before a probe is allowed
+            half_open_max_calls: Concurrent probe calls allowed while half-open
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        BREAKER_STATE.set(STATE_VALUES[CLOSED], name=name)
+    
+    def _transition(self, state: str) -> None:
+        """Change state (caller holds the lock)"""
+        if state == self.state:
+            return
+        self.state = state
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        self._probes = 0
+        BREAKER_STATE.set(STATE_VALUES[state], name=self.name)
+        BREAKER_TRANSITIONS.inc(name=self.name, state=state)
+        print(f"Circuit breaker '{self.name}' is now {state}")
+    
+    def is_open(self) -> bool:
+        """True while calls would be refused (no side effects; use to pick a degraded path)"""
+        with self._lock:
+            if self.state == OPEN:
+                return time.monotonic() - self.opened_at < self.recovery_timeout
+            if self.state == HALF_OPEN:
+                return self._probes >= self.half_open_max_calls
+            return False
+    
+    def allow_request(self) -> bool:
+        """Reserve the right to call upstream; every allowed call must record its outcome"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    BREAKER_REJECTED.inc(name=self.name)
+                    return False
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    BREAKER_REJECTED.inc(name=self.name)
+                    return False
+                self._probes += 1
+            return True
+    
+    def record_success(self) -> None:
+        """Report a successful call; closes a half-open circuit"""
+        with self._lock:
+            self.consecutive_failures = 0
+            self._transition(CLOSED)
+    
+    def record_neutral(self) -> None:
+        """Report a call that says nothing about upstream health (e.g. a rejected request); frees its probe slot"""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+    
+    def record_failure(self) -> None:
+        """Report a failed call; a failed probe or too many failures open the circuit"""
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self._transition(OPEN)
+                # Re-arm the timer even when already open
+                self.opened_at = time.monotonic()
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout_s": self.recovery_timeout
+            }
+
+
+def create_circuit_breaker(name: str = "deepseek") -> CircuitBreaker:
+    """Factory function to create a circuit breaker configured from environment"""
+    import os
+    return CircuitBreaker(
+        name=name,
+        failure_threshold=int(os.environ.get("LLM_BREAKER_FAILURES", 3)),
+        recovery_timeout=float(os.environ.get("LLM_BREAKER_RECOVERY_SECONDS", 30))
+    )
@@ -0,0 +1,176 @@
+"""
+Compatibility Graph Module
+Precomputed links between parts that fit the same appliance models
+Compressed adjacency arrays (offsets + targets, as in CSR) map each model to its
+parts and each part to the parts it shares most models with, so related parts are
+read in O(degree) during a turn; the graph is rebuilt when the catalog changes
+"""
+
+import heapq
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+import numpy as np
+from entity_extractor import normalize_model
+
+
+class _Adjacency:
+    """One catalog version's graph (replaced whole, never mutated)"""
+    
+    def __init__(self, part_ids: Dict[str, int], model_ids: Dict[str, int], model_offsets: np.ndarray, model_parts: np.ndarray,
+                 neighbor_offsets: np.ndarray, neighbors: np.ndarray, shared_models: np.ndarray):
+        self.part_ids = part_ids                  # upper-cased part id -> catalog position
+        self.model_ids = model_ids                # normalized model -> model id
+        self.model_offsets = model_offsets        # model id -> slice of model_parts
+        self.model_parts = model_parts            # catalog positions, most reviewed first
+        self.neighbor_offsets = neighbor_offsets  # catalog position -> slice of neighbors
+        self.neighbors = neighbors                # catalog positions, most shared models first
+        self.shared_models = shared_models        # models shared with each neighbor
+
+
+class CompatGraph:
+    """Model -> parts and part -> co-compatible parts adjacency over the catalog"""
+    
+    def __init__(self, vector_store, max_neighbors: int = 16, max_model_degree: int = 500):
+        """
+        Initialize compatibility graph
+        
+        Args:
+            vector_store: Vector store whose metadata is indexed
+            max_neighbors: Co-compatible parts kept per part
+            max_model_degree: Models fitting more parts than this still list their parts,
+                but do not link them to each other (they say little about pairing and
+                would make the build quadratic)
+        """
+        self.vector_store = vector_store
+        self.max_neighbors = max_neighbors
+        self.max_model_degree = max_model_degree
+        self.build_seconds = 0.0
+        self._catalog_version: Optional[int] = None
+        self._graph: Optional[_Adjacency] = None
+        self._lock = threading.Lock()
+    
+    def _build(self) -> _Adjacency:
+        """Index every product's compatible models, then count models shared between parts"""
+        metadata = self.vector_store.metadata
+        popularity = np.array([int(p.get('reviews_count') or 0) for p in metadata], dtype=np.int64)
+        
+        model_ids: Dict[str, int] = {}
+        part_models: List[List[int]] = []
+        for product in metadata:
+            compat_models = product.get('compatible_models', [])
+            if isinstance(compat_models, str):
+                compat_models = [compat_models]
+            keys = dict.fromkeys(normalize_model(str(m)) for m in compat_models)
+            part_models.append([model_ids.setdefault(key, len(model_ids)) for key in keys if key])
+        
+        # model -> parts: sort (model, part) pairs by model, then by review count
+        lengths = np.fromiter((len(models) for models in part_models), dtype=np.int64, count=len(part_models))
+        owners = np.repeat(np.arange(len(metadata), dtype=np.int64), lengths)
+        models = np.fromiter((m for ms in part_models for m in ms), dtype=np.int64, count=int(lengths.sum()))
+        order = np.lexsort((-popularity[owners], models))
+        model_parts = owners[order].astype(np.int32)
+        model_offsets = np.zeros(len(model_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(models, minlength=len(model_ids)), out=model_offsets[1:])
+        
+        # part -> co-compatible parts, weighted by shared models
+        members = [
+            model_parts[model_offsets[m]:model_offsets[m + 1]].tolist()
+            if model_offsets[m + 1] - model_offsets[m] <= self.max_model_degree else []
+            for m in range(len(model_ids))
+        ]
+        neighbor_offsets = np.zeros(len(metadata) + 1, dtype=np.int64)
+        neighbors: List[int] = []
+        shared: List[int] = []
+        for position, part_model_ids in enumerate(part_models):
+            counts = Counter()
+            for m in part_model_ids:
+                counts.update(members[m])
+            counts.pop(position, None)
+            best = heapq.nlargest(self.max_neighbors, counts.items(), key=lambda item: (item[1], popularity[item[0]]))
+            neighbors.extend(q for q, _ in best)
+            shared.extend(c for _, c in best)
+            neighbor_offsets[position + 1] = len(neighbors)
+        
+        part_ids = {str(p.get('id', '')).upper(): i for i, p in enumerate(metadata)}
+        return _Adjacency(part_ids, model_ids, model_offsets, model_parts, neighbor_offsets,
+                          np.array(neighbors, dtype=np.int32), np.array(shared, dtype=np.int32))
+    
+    def _check_version(self) -> _Adjacency:
+        """Rebuild when the catalog has been reloaded"""
+        version = getattr(self.vector_store, 'version', None)
+        if version != self._catalog_version:
+            with self._lock:
+                if version != self._catalog_version:
+                    start = time.perf_counter()
+                    self._graph = self._build()
+                    self.build_seconds = time.perf_counter() - start
+                    self._catalog_version = version
+        return self._graph
+    
+    def refresh(self) -> Dict:
+        """Build the graph now (at start-up) instead of on the first lookup"""
+        self._check_version()
+        return self.stats()
+    
+    def parts_for_model(self, model_number: str, limit: int = 3, exclude: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Parts compatible with a model, most reviewed first
+        
+        Args:
+            model_number: Appliance model (case, dashes and spaces are ignored)
+            limit: Maximum parts
+            exclude: Part ids to leave out (e.g. those already shown)
+        
+        Returns:
+            Product dictionaries
+        """
+        graph = self._check_version()
+        model_id = graph.model_ids.get(normalize_model(model_number or ""))
+        if model_id is None:
+            return []
+        
+        metadata = self.vector_store.metadata
+        excluded = {str(e).upper() for e in exclude or []}
+        results = []
+        for position in graph.model_parts[graph.model_offsets[model_id]:graph.model_offsets[model_id + 1]]:
+            product = metadata[position]
+            if str(product.get('id', '')).upper() not in excluded:
+                results.append(product)
+                if len(results) >= limit:
+                    break
+        return results
+    
+    def related_parts(self, part_id: str, limit: int = 3, exclude: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Parts that fit the most of the same models as a part
+        
+        Returns:
+            Product dictionaries, each with shared_models (number of models in common)
+        """
+        graph = self._check_version()
+        position = graph.part_ids.get(str(part_id or '').upper())
+        if position is None:
+            return []
+        
+        metadata = self.vector_store.metadata
+        excluded = {str(e).upper() for e in exclude or []}
+        results = []
+        start, end = graph.neighbor_offsets[position], graph.neighbor_offsets[position + 1]
+        for neighbor, shared in zip(graph.neighbors[start:end], graph.shared_models[start:end]):
+            product = metadata[neighbor]
+            if str(product.get('id', '')).upper() not in excluded:
+                results.append(dict(product, shared_models=int(shared)))
+                if len(results) >= limit:
+                    break
+        return results
+    
+    def stats(self) -> Dict:
+        graph = self._graph
+        return {
+            "catalog_version": self._catalog_version,
+            "models": len(graph.model_ids) if graph else 0,
+            "edges": len(graph.neighbors) if graph else 0,
+            "build_seconds": round(self.build_seconds, 3)
+        }
@@ -0,0 +1,162 @@
+"""
+Context Builder Module
+Assembles LLM product context from cached, pre-rendered product snippets
+and keeps the whole prompt within a hard token budget
+"""
+
+from typing import List, Dict, Optional, Tuple
+
+
+# Rough characters-per-token ratio for English text with the Deepseek tokenizer
+CHARS_PER_TOKEN = 4
+
+# Per-message framing tokens added by the chat template (role markers etc.)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a string without running a tokenizer"""
+    if not text:
+        return 0
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def estimate_message_tokens(messages: List[Dict]) -> int:
+    """Estimate the token count of a list of chat messages"""
+    return sum(estimate_tokens(m.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to roughly max_tokens, marking the cut with an ellipsis"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 1:
+        return ""
+    return text[:(max_tokens - 1) * CHARS_PER_TOKEN].rstrip() + "..."
+
+
+class ContextBuilder:
+    """Builds token-bounded product context with a per-product snippet cache"""
+    
+    HEADER = "Here are relevant products from our catalog:"
+    
+    def __init__(self, vector_store, max_prompt_tokens: int = 2000, min_context_tokens: int = 300, description_chars: int = 150):
+        """
+        Initialize context builder
+        
+        Args:
+            vector_store: Vector store whose catalog version invalidates the cache
+            max_prompt_tokens: Hard budget for system prompt, history, context and user turn
+            min_context_tokens: Context space reserved before history is allowed to use the rest
+            description_chars: Maximum description length inside a snippet
+        """
+        self.vector_store = vector_store
+        self.max_prompt_tokens = max_prompt_tokens
+        self.min_context_tokens = min_context_tokens
+        self.description_chars = description_chars
+        self._snippets: Dict[str, Tuple[str, int]] = {}
+        self._catalog_version: Optional[int] = None
+    
+    def _check_version(self) -> None:
+        """Drop cached snippets when the catalog has been rebuilt"""
+        version = getattr(self.vector_store, 'version', None)
+        if version != self._catalog_version:
+            self._snippets = {}
+            self._catalog_version = version
+    
+    def _render_snippet(self, product: Dict) -> str:
+        """Render the context lines for one product (without its list number)"""
+        lines = [product.get('name', 'Unknown')]
+        lines.append(f"   Part Number: {product.get('id')}")
+        lines.append(f"   Category: {product.get('category')}")
+        
+        models = product.get('compatible_models')
+        if models:
+            if isinstance(models, list):
+                models = ', '.join(models[:3])
+            lines.append(f"   Compatible with: {models}")
+        
+        price = product.get('price')
+        if price:
+            lines.append(f"   Price: {price}")
+        
+        description = product.get('description')
+        if description:
+            if len(description) > self.description_chars:
+                description = description[:self.description_chars] + "..."
+            lines.append(f"   Description: {description}")
+        
+        if product.get('in_stock') == False:
+            lines.append("   Status: OUT OF STOCK")
+        
+        return "\n".join(lines)
+    
+    def get_snippet(self, product: Dict) -> Tuple[str, int]:
+        """Get the cached snippet and its token estimate for a product"""
+        self._check_version()
+        product_id = product.get('id')
+        cached = self._snippets.get(product_id)
+        if cached is None:
+            snippet = self._render_snippet(product)
+            cached = (snippet, estimate_tokens(snippet))
+            if product_id is not None:
+                self._snippets[product_id] = cached
+        return cached
+    
+    def build_products_context(self, products: List[Dict], max_tokens: Optional[int] = None) -> str:
+        """
+        Build the product block, dropping the lowest-relevance products first
+        
+        Args:
+            products: Products in display order
+            max_tokens: Token budget for the block (unbounded if None)
+        
+        Returns:
+            Formatted context string for LLM
+        """
+        if not products:
+            return "No products found."
+        
+        snippets = [self.get_snippet(p) for p in products]
+        
+        if max_tokens is None:
+            keep = set(range(len(products)))
+        else:
+            # Rank by relevance score when present, otherwise by list position
+            ranked = sorted(range(len(products)), key=lambda i: (-products[i].get('score', 0), i))
+            remaining = max_tokens - estimate_tokens(self.HEADER)
+            keep = set()
+            for i in ranked:
+                cost = snippets[i][1] + 1
+                if cost > remaining:
+                    continue
+                keep.add(i)
+                remaining -= cost
+            if not keep:
+                return "No products found."
+        
+        lines = [self.HEADER]
+        for number, i in enumerate(sorted(keep), 1):
+            lines.append(f"\n{number}. {snippets[i][0]}")
+        
+        return "\n".join(lines)
+    
+    def fit_history(self, system_prompt: str, user_message: str, history: List[Dict]) -> Tuple[List[Dict], int]:
+        """
+        Trim conversation history to the budget and compute the space left for context
+        
+        History keeps its newest messages and never eats into the space
+        reserved for context (min_context_tokens).
+        
+        Returns:
+            Tuple of (trimmed_history, context_token_budget)
+        """
+        fixed = estimate_tokens(system_prompt) + estimate_tokens(user_message) + 2 * MESSAGE_OVERHEAD_TOKENS
+        history_budget = max(0, self.max_prompt_tokens - fixed - self.min_context_tokens)
+        
+        trimmed = list(history)
+        while trimmed and estimate_message_tokens(trimmed) > history_budget:
+            trimmed.pop(0)
+        
+        context_budget = max(0, self.max_prompt_tokens - fixed - estimate_message_tokens(trimmed))
+        return trimmed, context_budget
@@ -0,0 +1,200 @@
+"""
+Conversation Memory Module
+Keeps a compact rolling summary plus structured facts for each chat session
+Older turns are folded into the summary on a background thread, so the prompt
+sent per turn stays roughly the same size however long the conversation runs
+"""
+
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from context_builder import estimate_tokens, truncate_to_tokens
+from entity_extractor import find_part_numbers
+from admission import AdmissionRejected
+from metrics import get_metrics_registry
+
+
+SUMMARY_REFRESHES = get_metrics_registry().counter(
+    "chat_summary_refreshes_total", "Background conversation summary refreshes by source (llm/local)",
+    labelnames=("source",)
+)
+SUMMARY_LATENCY = get_metrics_registry().histogram(
+    "chat_summary_seconds", "Latency of background conversation summary refreshes"
+)
+
+# Queue priority of summary calls for a chat slot: behind every waiting turn
+SUMMARY_PRIORITY = 2
+
+
+class ConversationMemory:
+    """Rolling summary and structured facts for one session"""
+    
+    def __init__(self, max_parts: int = 10):
+        """Initialize empty memory"""
+        self.summary = ""  # Summary of messages[:summarized_upto]
+        self.summarized_upto = 0  # Messages before this index are covered by the summary
+        self.model_number: Optional[str] = None
+        self.parts: List[str] = []  # Part numbers discussed, most recent last
+        self.last_intent: Optional[str] = None
+        self.max_parts = max_parts
+        self.refresh_pending = False
+        self.lock = threading.Lock()
+    
+    def note_parts(self, text: str) -> None:
+        """Remember part numbers mentioned in a message"""
+        for part in find_part_numbers(text):
+            with self.lock:
+                if part in self.parts:
+                    self.parts.remove(part)
+                self.parts.append(part)
+                del self.parts[:-self.max_parts]
+    
+    def update_facts(self, model_number: Optional[str] = None, intent: Optional[str] = None) -> None:
+        """Record the latest known appliance model and intent"""
+        with self.lock:
+            if model_number:
+                self.model_number = model_number
+            if intent:
+                self.last_intent = intent
+    
+    def facts(self) -> Dict:
+        """Structured facts as a dictionary"""
+        with self.lock:
+            return {
+                "model_number": self.model_number,
+                "parts": list(self.parts),
+                "last_intent": self.last_intent
+            }
+    
+    def render(self) -> str:
+        """Render summary and facts as a context block ('' when nothing is known yet)"""
+        facts = self.facts()
+        lines = []
+        if facts["model_number"]:
+            lines.append(f"Customer's appliance model: {facts['model_number']}")
+        if facts["parts"]:
+            lines.append(f"Parts discussed: {', '.join(facts['parts'])}")
+        if facts["last_intent"]:
+            lines.append(f"Previous request type: {facts['last_intent']}")
+        if self.summary:
+            lines.append(f"Earlier in this conversation: {self.summary}")
+        
+        if not lines:
+            return ""
+        return "Conversation memory:\n" + "\n".join(lines)
+
+
+def summarize_locally(previous_summary: str, messages: List[Dict], max_tokens: int = 150) -> str:
+    """
+    Extractive fallback summary: the customer's requests, newest kept when space runs out
+    
+    Used when the LLM summary call fails or no client is configured.
+    """
+    asks = []
+    for m in messages:
+        if m.get("role") != "user":
+            continue
+        sentence = re.split(r'(?<=[.!?])\s', m.get("content", "").strip(), maxsplit=1)[0]
+        if sentence:
+            asks.append(sentence[:120])
+    
+    summary = previous_summary
+    if asks:
+        summary = (summary + " " if summary else "") + "Customer asked: " + "; ".join(asks) + "."
+    
+    if estimate_tokens(summary) > max_tokens:
+        # Drop the oldest text first
+        summary = "..." + summary[-(max_tokens - 1) * 4:]
+    return summary
+
+
+class ConversationMemoryManager:
+    """Refreshes session summaries off the request path"""
+    
+    def __init__(self, llm=None, keep_recent_messages: int = 4, refresh_every_messages: int = 4,
+                 max_summary_tokens: int = 150, workers: int = 1, llm_slots=None):
+        """
+        Initialize memory manager
+        
+        Args:
+            llm: Client with summarize_conversation() (local summaries only if None)
+            keep_recent_messages: Raw messages always left out of the summary
+            refresh_every_messages: Unsummarized messages beyond keep_recent that trigger a refresh
+            max_summary_tokens: Size cap for the summary text
+            workers: Background summary threads (0 = refresh inline, for tests and benchmarks)
+            llm_slots: Admission pool shared with chat turns; each summary call holds a slot
+                and falls back to the local summary when none frees up (None = not limited)
+        """
+        self.llm = llm
+        self.keep_recent_messages = keep_recent_messages
+        self.refresh_every_messages = refresh_every_messages
+        self.max_summary_tokens = max_summary_tokens
+        self.llm_slots = llm_slots
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chat-summary") if workers > 0 else None
+    
+    def record_turn(self, memory: ConversationMemory, user_message: str, response_text: str,
+                    model_number: Optional[str], intent: Optional[str]) -> None:
+        """Update facts from a finished turn"""
+        memory.update_facts(model_number=model_number, intent=intent)
+        memory.note_parts(user_message)
+        memory.note_parts(response_text)
+    
+    def maybe_refresh(self, memory: ConversationMemory, messages: List[Dict]) -> bool:
+        """
+        Schedule a summary refresh once enough turns have piled up
+        
+        Args:
+            memory: The session's memory
+            messages: The session's full message list
+        
+        Returns:
+            True if a refresh was started
+        """
+        cut = len(messages) - self.keep_recent_messages
+        with memory.lock:
+            if memory.refresh_pending or cut - memory.summarized_upto < self.refresh_every_messages:
+                return False
+            memory.refresh_pending = True
+            start = memory.summarized_upto
+            previous_summary = memory.summary
+        
+        # Never split a turn: the kept window starts at a user message
+        while cut > start and messages[cut].get("role") != "user":
+            cut -= 1
+        batch = list(messages[start:cut])
+        
+        if self._executor is None:
+            self._refresh(memory, previous_summary, batch, cut)
+        else:
+            self._executor.submit(self._refresh, memory, previous_summary, batch, cut)
+        return True
+    
+    def _refresh(self, memory: ConversationMemory, previous_summary: str, batch: List[Dict], cut: int) -> None:
+        """Summarize one batch of turns and publish the result"""
+        with SUMMARY_LATENCY.time():
+            source = "llm"
+            summary = None
+            if self.llm is not None and batch:
+                try:
+                    summary = self._summarize(previous_summary, batch)
+                except AdmissionRejected:
+                    pass  # Chat turns keep the slots; the local summary is good enough
+                except Exception as e:
+                    print(f"Summary refresh failed, using local summary: {str(e)}")
+            if not summary:
+                source = "local"
+                summary = summarize_locally(previous_summary, batch, self.max_summary_tokens)
+        
+        with memory.lock:
+            memory.summary = truncate_to_tokens(summary, self.max_summary_tokens)
+            memory.summarized_upto = cut
+            memory.refresh_pending = False
+        SUMMARY_REFRESHES.inc(source=source)
+    
+    def _summarize(self, previous_summary: str, batch: List[Dict]) -> Optional[str]:
+        """Summarize with the LLM, inside a chat slot when the manager has a pool"""
+        if self.llm_slots is None:
+            return self.llm.summarize_conversation(previous_summary, batch, max_tokens=self.max_summary_tokens)
+        with self.llm_slots.slot(SUMMARY_PRIORITY):
+            return self.llm.summarize_conversation(previous_summary, batch, max_tokens=self.max_summary_tokens)
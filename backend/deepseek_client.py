@@ -4,8 +4,51 @@ Handles all interactions with the Deepseek language model API
 """
 
 import requests
+import hashlib
 import json
+import threading
+import time
 from typing import Dict, List, Optional
+from metrics import get_metrics_registry
+from entity_extractor import extract_part_number, extract_model_number
+from circuit_breaker import create_circuit_breaker, CircuitBreaker, CircuitOpenError
+
+
+LLM_LATENCY = get_metrics_registry().histogram(
+    "llm_request_seconds", "Latency of Deepseek chat completion calls", labelnames=("outcome",)
+)
+LLM_TOKENS = get_metrics_registry().counter(
+    "llm_tokens_total", "Tokens reported by the Deepseek usage field, by generation profile", labelnames=("kind", "profile")
+)
+LLM_TRUNCATED = get_metrics_registry().counter(
+    "llm_truncated_total", "Completions cut off by the profile's max_tokens (finish_reason 'length')", labelnames=("profile",)
+)
+LLM_CALLS = get_metrics_registry().counter(
+    "llm_calls_total", "Completion requests by whether they reached upstream or joined an identical in-flight call",
+    labelnames=("path",)
+)
+
+
+# Every intent analyze_intent can return, in rough order of frequency
+INTENTS = ("product_info", "compatibility", "troubleshooting", "installation", "order", "out_of_scope")
+
+# Shared by the single and batched classification prompts
+INTENT_EXAMPLES = """Examples of intents:
+- product_info: "What is this part?", "Tell me about PS123456"
+- compatibility: "Is this compatible with my WDT780SAEM1?", "Will this work?"
+- installation: "How do I install this?", "Installation steps"
+- troubleshooting: "My ice maker isn't working", "How do I fix..."
+- order: "How do I buy this?", "Add to cart"
+- out_of_scope: anything not related to fridge/dishwasher parts"""
+
+
+class _InflightCall:
+    """A completion request in flight that identical concurrent requests can wait on"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[str] = None
+        self.error: Optional[Exception] = None
 
 
 class DeepseekClient:
@@ -32,23 +75,84 @@ IMPORTANT RULES:
 
 Current date: You are helpful and knowledgeable."""
     
-    def __init__(self, api_key: Optional[str] = None, base_url: str = "https://api.deepseek.com/v1"):
+    # Label placed in front of per-turn product context
+    CONTEXT_LABEL = "Context Information:\n"
+    
+    # Separates per-turn context from the customer's words (prefix_cache layout)
+    MESSAGE_LABEL = "\n\nCustomer message:\n"
+    
+    # Prompt layouts accepted by get_response
+    PROMPT_LAYOUTS = ("prefix_cache", "system_context")
+    
+    # Sampling settings per kind of call; chat answers use the profile of the detected
+    # intent. Caps are sized to what each answer needs (tune from llm_tokens_total and
+    # llm_truncated_total), and the stop sequences end the completion if the model starts
+    # writing the next customer turn itself.
+    GENERATION_PROFILES = {
+        "default": {"temperature": 0.7, "max_tokens": 500, "top_p": 0.95},
+        "intent": {"temperature": 0.0, "max_tokens": 60, "response_format": {"type": "json_object"}},
+        "intent_batch": {"temperature": 0.0, "response_format": {"type": "json_object"}},  # max_tokens set per batch
+        "summary": {"temperature": 0.2, "max_tokens": 150},
+        "compatibility": {"temperature": 0.3, "max_tokens": 150, "top_p": 0.95, "stop": ["\nCustomer message:", "\nUser:"]},
+        "product_info": {"temperature": 0.5, "max_tokens": 250, "top_p": 0.95, "stop": ["\nCustomer message:", "\nUser:"]},
+        "order": {"temperature": 0.5, "max_tokens": 150, "top_p": 0.95, "stop": ["\nCustomer message:", "\nUser:"]},
+        "installation": {"temperature": 0.3, "max_tokens": 500, "top_p": 0.95, "stop": ["\nCustomer message:", "\nUser:"]},
+        "troubleshooting": {"temperature": 0.5, "max_tokens": 400, "top_p": 0.95, "stop": ["\nCustomer message:", "\nUser:"]},
+        "out_of_scope": {"temperature": 0.0, "max_tokens": 60, "stop": ["\n\n"]},
+    }
+    
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None, prompt_layout: Optional[str] = None,
+                 breaker: Optional[CircuitBreaker] = None):
         """
         Initialize Deepseek client
         
         Args:
             api_key: Deepseek API key (can be set via environment variable DEEPSEEK_API_KEY)
-            base_url: Base URL for Deepseek API
+            base_url: Base URL for Deepseek API (can be set via DEEPSEEK_API_BASE_URL,
+                e.g. to point at the local stub server in deepseek_stub.py)
+            prompt_layout: 'prefix_cache' (default) keeps the system prompt and history
+                byte-stable and sends per-turn context with the latest user message;
+                'system_context' appends context to the system prompt (can be set via
+                DEEPSEEK_PROMPT_LAYOUT)
+            breaker: Circuit breaker guarding API calls (created from environment if not provided)
         """
         import os
         self.api_key = api_key or os.environ.get("DEEPSEEK_API_KEY")
-        self.base_url = base_url
+        self.base_url = (base_url or os.environ.get("DEEPSEEK_API_BASE_URL") or "https://api.deepseek.com/v1").rstrip("/")
         self.model = "deepseek-chat"
+        self.prompt_layout = prompt_layout or os.environ.get("DEEPSEEK_PROMPT_LAYOUT", "prefix_cache")
+        
+        if self.prompt_layout not in self.PROMPT_LAYOUTS:
+            raise ValueError(f"Unknown prompt layout '{self.prompt_layout}'. Use one of: {', '.join(self.PROMPT_LAYOUTS)}")
         
         if not self.api_key:
             raise ValueError("Deepseek API key not provided. Set DEEPSEEK_API_KEY environment variable.")
+        
+        # Single-flight state: request fingerprint -> in-flight call
+        self._inflight: Dict[str, _InflightCall] = {}
+        self._inflight_lock = threading.Lock()
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+        
+        # Fail fast while the API is down
+        self.breaker = breaker or create_circuit_breaker()
+        
+        # Prompt tokens served from / missing the provider's prefix cache
+        self.prompt_cache_hit_tokens = 0
+        self.prompt_cache_miss_tokens = 0
+        
+        # Per-profile calls, tokens and truncations
+        self.profile_usage: Dict[str, Dict[str, int]] = {}
+        
+        # Usage of the last completion sent from each thread (see take_last_usage)
+        self._thread_usage = threading.local()
     
-    def get_response(self, user_message: str, context: str = "", conversation_history: List[Dict] = None) -> str:
+    def is_available(self) -> bool:
+        """False while the circuit breaker is refusing API calls"""
+        return not self.breaker.is_open()
+    
+    def get_response(self, user_message: str, context: str = "", conversation_history: List[Dict] = None,
+                     raise_errors: bool = False, profile: str = "default") -> str:
         """
         Get response from Deepseek API
         
@@ -56,10 +160,52 @@ Current date: You are helpful and knowledgeable."""
             user_message: The user's current message
             context: Additional context (e.g., product information)
             conversation_history: Previous messages in format [{"role": "user"/"assistant", "content": "..."}]
+            raise_errors: Raise on failure instead of returning an error message as the text
+            profile: Generation profile (GENERATION_PROFILES key, usually the intent);
+                unknown names use 'default'
         
         Returns:
             Response text from the model
         """
+        payload = self.build_payload(self.build_messages(user_message, context, conversation_history), profile)
+        return self._complete(payload, raise_errors=raise_errors, profile=profile)
+    
+    def build_payload(self, messages: List[Dict], profile: str = "default", **overrides) -> Dict:
+        """
+        Completion request body with the sampling settings of a generation profile
+        
+        Args:
+            messages: Chat messages
+            profile: GENERATION_PROFILES key (unknown names use 'default')
+            overrides: Settings replacing the profile's (e.g. max_tokens)
+        
+        Returns:
+            Payload for /chat/completions
+        """
+        payload = {"model": self.model, "messages": messages}
+        payload.update(self.GENERATION_PROFILES.get(profile, self.GENERATION_PROFILES["default"]))
+        payload.update(overrides)
+        return payload
+    
+    def build_messages(self, user_message: str, context: str = "", conversation_history: List[Dict] = None) -> List[Dict]:
+        """
+        Assemble the chat messages for a completion according to prompt_layout
+        
+        With 'prefix_cache' the request starts with the fixed system prompt followed by
+        the append-only history, so consecutive turns share a byte-identical prefix that
+        provider-side prompt caching can reuse; only the final user message varies.
+        """
+        if self.prompt_layout == "prefix_cache":
+            messages = [{"role": "system", "content": self.SYSTEM_PROMPT}]
+            if conversation_history:
+                messages.extend(conversation_history)
+            
+            content = user_message
+            if context:
+                content = f"{self.CONTEXT_LABEL}{context}{self.MESSAGE_LABEL}{user_message}"
+            messages.append({"role": "user", "content": content})
+            return messages
+        
         # Build messages list
         messages = []
         
@@ -70,11 +216,160 @@ Current date: You are helpful and knowledgeable."""
         # Add system prompt with context
         system_msg = self.SYSTEM_PROMPT
         if context:
-            system_msg += f"\n\nContext Information:\n{context}"
+            system_msg += f"\n\n{self.CONTEXT_LABEL}{context}"
         
         # Add user message
         messages.append({"role": "user", "content": user_message})
         
+        return [{"role": "system", "content": system_msg}] + messages
+    
+    @staticmethod
+    def _fingerprint(payload: Dict) -> str:
+        """Stable hash of a request payload (model, messages and sampling params)"""
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    
+    def _complete(self, payload: Dict, raise_errors: bool = False, profile: str = "default") -> str:
+        """
+        Run a completion with single-flight coalescing
+        
+        Concurrent calls with an identical payload share one upstream request:
+        the first caller performs it and the others wait for its result (or error).
+        """
+        key = self._fingerprint(payload)
+        
+        with self._inflight_lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = _InflightCall()
+                self._inflight[key] = call
+                self.upstream_calls += 1
+            else:
+                self.coalesced_calls += 1
+        
+        if not leader:
+            LLM_CALLS.inc(path="coalesced")
+            call.done.wait()
+        else:
+            LLM_CALLS.inc(path="upstream")
+            try:
+                call.result = self._request_completion(payload, profile)
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._inflight_lock:
+                    del self._inflight[key]
+                call.done.set()
+        
+        if call.error is not None:
+            if raise_errors:
+                raise call.error
+            return self._error_message(call.error)
+        return call.result
+    
+    def get_coalescing_stats(self) -> Dict[str, int]:
+        """Counters for upstream vs. coalesced completion calls"""
+        with self._inflight_lock:
+            return {
+                "upstream_calls": self.upstream_calls,
+                "coalesced_calls": self.coalesced_calls,
+                "in_flight": len(self._inflight)
+            }
+    
+    def _record_usage(self, usage: Dict, profile: str = "default", truncated: bool = False) -> None:
+        """
+        Record token usage per generation profile, splitting prompt tokens into cache hits and misses
+        
+        Deepseek reports prompt_cache_hit_tokens / prompt_cache_miss_tokens; OpenAI-style
+        servers report prompt_tokens_details.cached_tokens instead.
+        """
+        if profile not in self.GENERATION_PROFILES:
+            profile = "default"
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        hit = usage.get("prompt_cache_hit_tokens")
+        if hit is None:
+            hit = (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+        miss = usage.get("prompt_cache_miss_tokens", max(prompt_tokens - hit, 0))
+        
+        LLM_TOKENS.inc(prompt_tokens, kind="prompt", profile=profile)
+        LLM_TOKENS.inc(completion_tokens, kind="completion", profile=profile)
+        LLM_TOKENS.inc(hit, kind="prompt_cache_hit", profile=profile)
+        LLM_TOKENS.inc(miss, kind="prompt_cache_miss", profile=profile)
+        if truncated:
+            LLM_TRUNCATED.inc(profile=profile)
+        
+        self._thread_usage.last = {
+            "profile": profile,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "prompt_cache_hit_tokens": hit,
+            "prompt_cache_miss_tokens": miss,
+            "truncated": truncated
+        }
+        
+        with self._inflight_lock:
+            self.prompt_cache_hit_tokens += hit
+            self.prompt_cache_miss_tokens += miss
+            stats = self.profile_usage.setdefault(
+                profile, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "truncated": 0}
+            )
+            stats["calls"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            stats["truncated"] += int(truncated)
+    
+    def take_last_usage(self) -> Optional[Dict]:
+        """
+        Token usage of the last completion this thread sent, cleared once read
+        
+        Returns:
+            Dictionary with profile, prompt/completion tokens, prompt cache hit/miss
+            tokens and truncated, or None (no call since the last read, or the call
+            was coalesced into another thread's request)
+        """
+        usage = getattr(self._thread_usage, "last", None)
+        self._thread_usage.last = None
+        return usage
+    
+    def get_prompt_cache_stats(self) -> Dict[str, float]:
+        """Cached vs. uncached prompt tokens reported by the API so far"""
+        with self._inflight_lock:
+            hit, miss = self.prompt_cache_hit_tokens, self.prompt_cache_miss_tokens
+        total = hit + miss
+        return {
+            "prompt_layout": self.prompt_layout,
+            "cache_hit_tokens": hit,
+            "cache_miss_tokens": miss,
+            "hit_ratio": round(hit / total, 4) if total else 0.0
+        }
+    
+    def get_profile_stats(self) -> Dict[str, Dict]:
+        """Calls, token usage, mean completion length and truncations per generation profile"""
+        with self._inflight_lock:
+            return {
+                profile: {
+                    **stats,
+                    "max_tokens": self.GENERATION_PROFILES[profile].get("max_tokens"),
+                    "mean_completion_tokens": round(stats["completion_tokens"] / stats["calls"], 1) if stats["calls"] else 0.0
+                }
+                for profile, stats in self.profile_usage.items()
+            }
+    
+    def _request_completion(self, payload: Dict, profile: str = "default") -> str:
+        """
+        Send one chat completion request to the API and return the response text
+        
+        Raises CircuitOpenError without calling the API while the breaker is open,
+        otherwise requests exceptions, json.JSONDecodeError or ValueError (no choices)
+        so callers can tell a failed call from model output. The response is validated
+        before the breaker hears about it, so each call records exactly one outcome.
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Deepseek API circuit is open")
+        
+        start = time.perf_counter()
         try:
             response = requests.post(
                 f"{self.base_url}/chat/completions",
@@ -82,13 +377,7 @@ Current date: You are helpful and knowledgeable."""
                     "Authorization": f"Bearer {self.api_key}",
                     "Content-Type": "application/json"
                 },
-                json={
-                    "model": self.model,
-                    "messages": [{"role": "system", "content": system_msg}] + messages,
-                    "temperature": 0.7,
-                    "max_tokens": 500,
-                    "top_p": 0.95
-                },
+                json=payload,
                 timeout=30
             )
             
@@ -96,26 +385,79 @@ Current date: You are helpful and knowledgeable."""
             result = response.json()
             
             # Extract response text
-            if "choices" in result and len(result["choices"]) > 0:
-                return result["choices"][0]["message"]["content"]
+            choices = result.get("choices") or []
+            if not choices:
+                raise ValueError("Completion response has no choices")
+            content = choices[0]["message"]["content"]
+        except requests.exceptions.HTTPError as e:
+            LLM_LATENCY.observe(time.perf_counter() - start, outcome="error")
+            # Client errors say nothing about the API's health: they neither close nor open the circuit
+            status = e.response.status_code
+            if status >= 500 or status == 429:
+                self.breaker.record_failure()
             else:
-                return "I encountered an issue processing your request. Please try again."
+                self.breaker.record_neutral()
+            raise
+        except Exception:
+            LLM_LATENCY.observe(time.perf_counter() - start, outcome="error")
+            self.breaker.record_failure()
+            raise
         
-        except requests.exceptions.ConnectionError:
+        LLM_LATENCY.observe(time.perf_counter() - start, outcome="ok")
+        self.breaker.record_success()
+        truncated = choices[0].get("finish_reason") == "length"
+        self._record_usage(result.get("usage") or {}, profile, truncated)
+        return content
+    
+    @staticmethod
+    def _error_message(error: Exception) -> str:
+        """User-facing message for a failed completion"""
+        if isinstance(error, CircuitOpenError):
+            return "The assistant is temporarily unavailable. Please try again in a moment."
+        if isinstance(error, requests.exceptions.ConnectionError):
             return "Connection error: Unable to reach the Deepseek API. Please check your internet connection."
-        except requests.exceptions.Timeout:
+        if isinstance(error, requests.exceptions.Timeout):
             return "Request timeout: The API took too long to respond. Please try again."
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 401:
+        if isinstance(error, requests.exceptions.HTTPError):
+            if error.response.status_code == 401:
                 return "Authentication error: Invalid Deepseek API key."
-            elif e.response.status_code == 429:
+            elif error.response.status_code == 429:
                 return "Rate limit exceeded: Too many requests. Please wait a moment and try again."
             else:
-                return f"API error: {e.response.status_code}. Please try again."
-        except json.JSONDecodeError:
+                return f"API error: {error.response.status_code}. Please try again."
+        if isinstance(error, json.JSONDecodeError):
             return "Error parsing API response. Please try again."
-        except Exception as e:
-            return f"Unexpected error: {str(e)}"
+        if isinstance(error, ValueError):
+            return "I encountered an issue processing your request. Please try again."
+        return f"Unexpected error: {str(error)}"
+    
+    def summarize_conversation(self, previous_summary: str, messages: List[Dict], max_tokens: int = 150) -> str:
+        """
+        Fold older conversation turns into a compact running summary
+        
+        Args:
+            previous_summary: Summary of everything before messages ('' if none)
+            messages: Turns to fold in, oldest first
+            max_tokens: Completion limit for the new summary
+        
+        Returns:
+            The new summary text
+        
+        Raises:
+            Any request error; callers fall back to a local summary
+        """
+        transcript = "\n".join(f"{m.get('role', 'user').capitalize()}: {m.get('content', '')}" for m in messages)
+        prompt = f"""Update the running summary of a customer support conversation about refrigerator and dishwasher parts.
+Keep appliance model numbers, part numbers, symptoms, what was already answered and any open question.
+Write at most 4 short sentences, no preamble.
+
+Current summary: {previous_summary or "(none)"}
+
+New turns:
+{transcript}"""
+        
+        payload = self.build_payload([{"role": "user", "content": prompt}], "summary", max_tokens=max_tokens)
+        return self._request_completion(payload, "summary").strip()
     
     def analyze_intent(self, user_message: str) -> Dict[str, any]:
         """
@@ -133,26 +475,109 @@ Message: "{user_message}"
 Respond with exactly this JSON structure:
 {{"intent": "product_info|compatibility|installation|troubleshooting|order|out_of_scope", "entities": {{}}, "confidence": 0.0}}
 
-Examples of intents:
-- product_info: "What is this part?", "Tell me about PS123456"
-- compatibility: "Is this compatible with my WDT780SAEM1?", "Will this work?"
-- installation: "How do I install this?", "Installation steps"
-- troubleshooting: "My ice maker isn't working", "How do I fix..."
-- order: "How do I buy this?", "Add to cart"
-- out_of_scope: anything not related to fridge/dishwasher parts"""
+{INTENT_EXAMPLES}"""
         
-        response = self.get_response(intent_prompt, context="")
+        if not self.is_available():
+            return self.classify_intent_locally(user_message)
         
         try:
-            # Try to extract JSON from response
-            import re
-            json_match = re.search(r'\{[^{}]*\}', response)
-            if json_match:
-                return json.loads(json_match.group())
-        except:
-            pass
-        
-        # Fallback to keyword matching
+            response = self.get_response(intent_prompt, context="", raise_errors=True, profile="intent")
+        except Exception:
+            return self.classify_intent_locally(user_message)
+        
+        result = self.parse_intent(response)
+        if result is None:
+            # Fallback to keyword matching
+            return self.classify_intent_locally(user_message)
+        return result
+    
+    @staticmethod
+    def parse_intent(response: str) -> Optional[Dict[str, any]]:
+        """
+        Parse an intent classification response
+        
+        JSON mode returns a bare object; anything around it (code fences, prose from
+        servers without JSON mode) is cut off at the outermost braces, so the nested
+        "entities" object survives.
+        
+        Returns:
+            The classification, or None if it is not JSON with a known intent
+        """
+        start, end = response.find("{"), response.rfind("}")
+        if start < 0 or end < start:
+            return None
+        try:
+            result = json.loads(response[start:end + 1])
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(result, dict) or result.get("intent") not in INTENTS:
+            return None
+        return result
+    
+    def analyze_intents(self, user_messages: List[str]) -> List[Dict[str, any]]:
+        """
+        Classify several messages with one API call
+        
+        The messages are sent as a JSON array and the model answers with one intent per
+        message, so the instruction template is paid for once per batch. Messages whose
+        intent is missing or unknown in the reply fall back to keyword matching.
+        
+        Returns:
+            One analyze_intent-style dict per message, in order
+        """
+        if len(user_messages) == 1:
+            return [self.analyze_intent(user_messages[0])]
+        
+        if not self.is_available():
+            return [self.classify_intent_locally(m) for m in user_messages]
+        
+        batch_prompt = f"""Analyze each customer message below and determine its intent. Respond in JSON format only.
+
+Messages (JSON array, in order):
+{json.dumps(user_messages, ensure_ascii=False)}
+
+Respond with exactly this JSON structure, one intent per message in the same order:
+{{"intents": ["product_info|compatibility|installation|troubleshooting|order|out_of_scope", ...]}}
+
+{INTENT_EXAMPLES}"""
+        
+        # Room for one quoted intent per message
+        payload = self.build_payload(self.build_messages(batch_prompt), "intent_batch",
+                                     max_tokens=16 + 8 * len(user_messages))
+        try:
+            response = self._complete(payload, raise_errors=True, profile="intent_batch")
+        except Exception:
+            return [self.classify_intent_locally(m) for m in user_messages]
+        
+        intents = self.parse_intents(response)
+        results = []
+        for i, message in enumerate(user_messages):
+            if i < len(intents) and intents[i] in INTENTS:
+                results.append({"intent": intents[i], "entities": {}, "confidence": 0.9})
+            else:
+                results.append(self.classify_intent_locally(message))
+        return results
+    
+    @staticmethod
+    def parse_intents(response: str) -> List[str]:
+        """Intent list from a batched classification response ([] if it cannot be parsed)"""
+        start, end = response.find("{"), response.rfind("}")
+        if start < 0 or end < start:
+            return []
+        try:
+            result = json.loads(response[start:end + 1])
+        except json.JSONDecodeError:
+            return []
+        intents = result.get("intents") if isinstance(result, dict) else None
+        return intents if isinstance(intents, list) else []
+    
+    def classify_intent_locally(self, user_message: str) -> Dict[str, any]:
+        """
+        Classify intent with keyword matching only (no API call)
+        
+        Used as the fallback for analyze_intent and to predict the likely
+        intent while the API classification is still in flight.
+        """
         message_lower = user_message.lower()
         
         if any(word in message_lower for word in ['how', 'install', 'step', 'guide']):
@@ -175,17 +600,12 @@ Examples of intents:
         }
     
     def extract_part_number(self, text: str) -> Optional[str]:
-        """Extract part number from text (format: PSxxxxxxxx)"""
-        import re
-        match = re.search(r'PS\d{8}', text)
-        return match.group(0) if match else None
+        """Extract part number from text (format: PS followed by digits)"""
+        return extract_part_number(text)
     
     def extract_model_number(self, text: str) -> Optional[str]:
-        """Extract model number from text (format: WDT/WRF followed by numbers)"""
-        import re
-        # Common patterns for Whirlpool, LG, Samsung models
-        match = re.search(r'(?:PS|WDT|WRF|WMTF|LEC|LSC|RS|RFG|RF)\d{6,10}', text)
-        return match.group(0) if match else None
+        """Extract a model-like token from text (use EntityExtractor for catalog-aware matching)"""
+        return extract_model_number(text)
 
 
 def create_deepseek_client(api_key: Optional[str] = None) -> DeepseekClient:
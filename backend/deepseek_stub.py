@@ -0,0 +1,364 @@
+"""
+Deepseek Stub Server
+Local Deepseek-compatible /chat/completions endpoint for load testing and offline runs
+
+Point the backend at it with DEEPSEEK_API_BASE_URL=http://127.0.0.1:8900/v1
+(any DEEPSEEK_API_KEY value is accepted).
+
+Usage:
+    python deepseek_stub.py --port 8900 --latency lognormal:400,0.5
+    python deepseek_stub.py --latency uniform:100,300 --error-rate 0.01 --rate-limit-rate 0.02
+    python deepseek_stub.py --latency fixed:300 --max-concurrency 4
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+
+# Marker that identifies DeepseekClient.analyze_intent prompts
+INTENT_PROMPT_PATTERN = re.compile(r'Message: "(.*?)"\n', re.DOTALL)
+
+# Marker that identifies DeepseekClient.analyze_intents (batched) prompts
+BATCH_INTENT_PROMPT_PATTERN = re.compile(r'Messages \(JSON array, in order\):\n(.*?)\n\n', re.DOTALL)
+
+# Marker that identifies DeepseekClient.summarize_conversation prompts
+SUMMARY_PROMPT_PATTERN = re.compile(r'Update the running summary.*?New turns:\n(.*)', re.DOTALL)
+
+
+def canned_intent(message: str) -> str:
+    """Pick an intent from keywords so stubbed classifications are deterministic"""
+    message = message.lower()
+    if 'install' in message:
+        return 'installation'
+    if 'compatible' in message or 'fit' in message:
+        return 'compatibility'
+    if 'not working' in message or 'broken' in message or 'leak' in message:
+        return 'troubleshooting'
+    if 'cost' in message or 'price' in message or 'buy' in message:
+        return 'order'
+    if 'weather' in message or 'recipe' in message:
+        return 'out_of_scope'
+    return 'product_info'
+
+
+def canned_completion(messages: List[Dict]) -> str:
+    """Build a deterministic completion for a chat message list"""
+    user_turns = [m.get("content", "") for m in messages if m.get("role") == "user"]
+    last = user_turns[-1] if user_turns else ""
+    
+    match = BATCH_INTENT_PROMPT_PATTERN.search(last)
+    if match:
+        return json.dumps({"intents": [canned_intent(m) for m in json.loads(match.group(1))]})
+    
+    match = INTENT_PROMPT_PATTERN.search(last)
+    if match:
+        return json.dumps({"intent": canned_intent(match.group(1)), "entities": {}, "confidence": 0.9})
+    
+    match = SUMMARY_PROMPT_PATTERN.search(last)
+    if match:
+        asked = [line[len("User: "):][:80] for line in match.group(1).splitlines() if line.startswith("User: ")]
+        return "The customer asked: " + "; ".join(asked) + "."
+    
+    return (
+        "Thanks for reaching out! Based on our catalog, here is what I can tell you. "
+        f"You asked: \"{last[:120]}\". Please check the part number and your appliance model, "
+        "and let me know if you need installation steps."
+    )
+
+
+class LatencyModel:
+    """Samples artificial response latency from a configured distribution"""
+    
+    def __init__(self, spec: str = "fixed:0", seed: Optional[int] = None):
+        """
+        Initialize latency model
+        
+        Args:
+            spec: 'fixed:MS', 'uniform:LOW,HIGH', 'normal:MEAN,STD' or 'lognormal:MEDIAN,SIGMA'
+            seed: Optional random seed for reproducible runs
+        """
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",") if p]
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+    
+    def sample_ms(self) -> float:
+        with self._lock:
+            if self.kind == "fixed":
+                return self.params[0] if self.params else 0.0
+            if self.kind == "uniform":
+                return self.rng.uniform(self.params[0], self.params[1])
+            if self.kind == "normal":
+                return max(0.0, self.rng.gauss(self.params[0], self.params[1]))
+            return self.params[0] * math.exp(self.rng.gauss(0, self.params[1]))
+
+
+class StubConfig:
+    """Behaviour of the stub server, shared by all handler threads"""
+    
+    def __init__(self, latency: str = "fixed:0", error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 tokens_per_second: float = 0.0, seed: Optional[int] = None, max_concurrency: int = 0):
+        self.latency = LatencyModel(latency, seed=seed)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.tokens_per_second = tokens_per_second
+        # Completions generated at once, like a provider's per-key concurrency (0 = unlimited)
+        self.slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency > 0 else None
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.lock = threading.Lock()
+        # Message-prefix fingerprints seen so far, emulating Deepseek's prompt prefix cache
+        self.prefix_cache: "OrderedDict[str, None]" = OrderedDict()
+        self.prefix_cache_size = 10000
+    
+    def match_prefix(self, messages: List[Dict]) -> int:
+        """
+        Count prompt tokens covered by a previously seen message prefix
+        
+        Every leading run of whole messages is remembered, so a request whose first
+        messages repeat an earlier request reports those tokens as cache hits.
+        """
+        digest = hashlib.sha256()
+        hit_tokens = 0
+        tokens = 0
+        with self.lock:
+            for message in messages:
+                digest.update(json.dumps(message, sort_keys=True).encode())
+                key = digest.hexdigest()
+                tokens += _estimate_tokens(message.get("content", ""))
+                if key in self.prefix_cache:
+                    self.prefix_cache.move_to_end(key)
+                    hit_tokens = tokens
+                else:
+                    self.prefix_cache[key] = None
+            while len(self.prefix_cache) > self.prefix_cache_size:
+                self.prefix_cache.popitem(last=False)
+        return hit_tokens
+    
+    def draw_fault(self) -> Optional[int]:
+        """Return an HTTP status to inject for this request, or None"""
+        with self.lock:
+            self.requests += 1
+            roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            return 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 500
+        return None
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def apply_limits(content: str, payload: Dict) -> Tuple[str, str]:
+    """Cut a completion at the first stop sequence or at max_tokens, returning it with its finish_reason"""
+    stop = payload.get("stop") or []
+    if isinstance(stop, str):
+        stop = [stop]
+    for sequence in stop:
+        if sequence and sequence in content:
+            content = content[:content.index(sequence)]
+    
+    max_tokens = payload.get("max_tokens")
+    if max_tokens and len(content) > max_tokens * 4:
+        return content[:max_tokens * 4], "length"
+    return content, "stop"
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Handles Deepseek-style chat completion requests"""
+    
+    protocol_version = "HTTP/1.1"
+    config: StubConfig = None
+    
+    def log_message(self, format, *args):
+        # Keep load tests quiet
+        pass
+    
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict] = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/health", "/v1/health"):
+            self._send_json(200, {"status": "ok", "requests": self.config.requests})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+    
+    def do_POST(self):
+        path = self.path.rstrip("/")
+        if path not in ("/chat/completions", "/v1/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+        
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON"}})
+            return
+        
+        # Requests beyond max_concurrency queue here, as they would at the provider
+        with self.config.slots or contextlib.nullcontext():
+            self._complete(payload)
+    
+    def _complete(self, payload: Dict) -> None:
+        """Answer one chat completion request after the configured latency"""
+        time.sleep(self.config.latency.sample_ms() / 1000)
+        
+        fault = self.config.draw_fault()
+        if fault == 429:
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit"}}, {"Retry-After": "1"})
+            return
+        if fault:
+            self._send_json(fault, {"error": {"message": "Injected upstream failure", "type": "server_error"}})
+            return
+        
+        messages = payload.get("messages", [])
+        content, finish_reason = apply_limits(canned_completion(messages), payload)
+        
+        prompt_tokens = sum(_estimate_tokens(m.get("content", "")) for m in messages)
+        cache_hit_tokens = self.config.match_prefix(messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "prompt_cache_hit_tokens": cache_hit_tokens,
+            "prompt_cache_miss_tokens": prompt_tokens - cache_hit_tokens,
+            "completion_tokens": _estimate_tokens(content),
+            "total_tokens": prompt_tokens + _estimate_tokens(content)
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = payload.get("model", "deepseek-chat")
+        
+        if payload.get("stream"):
+            self._stream(completion_id, model, content, usage, finish_reason)
+            return
+        
+        # Generation time grows with the completion length
+        if self.config.tokens_per_second:
+            time.sleep(usage["completion_tokens"] / self.config.tokens_per_second)
+        
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": finish_reason
+            }],
+            "usage": usage
+        })
+    
+    def _stream(self, completion_id: str, model: str, content: str, usage: Dict, finish_reason: str = "stop") -> None:
+        """Send the completion as server-sent events, one word per chunk"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        
+        delay = 1.0 / self.config.tokens_per_second if self.config.tokens_per_second else 0.0
+        words = re.findall(r"\S+\s*", content)
+        for i, word in enumerate(words):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}]
+            }
+            if i == 0:
+                chunk["choices"][0]["delta"]["role"] = "assistant"
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            if delay:
+                time.sleep(delay)
+        
+        final = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}],
+            "usage": usage
+        }
+        self.wfile.write(f"data: {json.dumps(final)}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def create_stub_server(host: str = "127.0.0.1", port: int = 8900, config: Optional[StubConfig] = None) -> ThreadingHTTPServer:
+    """Create (but do not start) a stub server; port 0 picks a free port"""
+    handler = type("ConfiguredStubRequestHandler", (StubRequestHandler,), {"config": config or StubConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_stub_server_in_thread(host: str = "127.0.0.1", port: int = 0, config: Optional[StubConfig] = None) -> ThreadingHTTPServer:
+    """Start a stub server on a background thread and return it (base URL: http://host:port/v1)"""
+    server = create_stub_server(host, port, config)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Local Deepseek-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", default="lognormal:400,0.5",
+                        help="fixed:MS | uniform:LOW,HIGH | normal:MEAN,STD | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 429")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Generation speed, also applied to non-streaming responses (0 = no delay)")
+    parser.add_argument("--max-concurrency", type=int, default=0,
+                        help="Completions generated at once; further requests wait (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    
+    config = StubConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        tokens_per_second=args.tokens_per_second,
+        seed=args.seed,
+        max_concurrency=args.max_concurrency
+    )
+    server = create_stub_server(args.host, args.port, config)
+    print(f"Deepseek stub listening on http://{args.host}:{args.port}/v1")
+    print(f"Set DEEPSEEK_API_BASE_URL=http://{args.host}:{args.port}/v1 to use it")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
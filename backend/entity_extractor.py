@@ -0,0 +1,183 @@
+"""
+Entity Extractor Module
+Finds part numbers and appliance model numbers in user messages in one pass
+Model numbers are matched against the catalog's own vocabulary, tolerating case,
+dashes and spaces ("wrf-989 sdaw" -> WRF989SDAW); models the catalog does not know
+are only accepted in the format appliance brands use for model numbers
+"""
+
+import re
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+
+# PartSelect part numbers: PS followed by digits
+PART_NUMBER_PATTERN = re.compile(r'\bPS\d{5,10}\b', re.IGNORECASE)
+PART_TOKEN_PATTERN = re.compile(r'^PS\d+$')
+
+# Alphanumeric runs; model numbers are one run or several joined by single separators
+TOKEN_PATTERN = re.compile(r'[A-Za-z0-9]+')
+SEPARATOR_PATTERN = re.compile(r'^[\s\-./]$')
+STRIP_PATTERN = re.compile(r'[\s\-./]')
+
+# Unknown models: letters and digits mixed, 5-20 characters
+GENERIC_MODEL_PATTERN = re.compile(r'^(?=[A-Z0-9]*\d)(?=[A-Z0-9]*[A-Z])[A-Z0-9]{5,20}$')
+
+# Model format of the refrigerator/dishwasher brands (Whirlpool, KitchenAid, Maytag, Amana,
+# Jenn-Air, GE, Hotpoint, LG, Samsung, Frigidaire, Electrolux, Bosch): a 2-5 letter series
+# code starting with a brand letter, then digits, then at least one more letter group
+# (the feature/color suffix), with at least two digits in all and 6-20 characters
+# (WRF989SDAW, KDTE334GPS0, GSS25GSHSS, RF28R7351SR, SHE3AR75UC). Letters-then-digits
+# tokens such as "COVID19", "SHA256" or "RTX4090", and ones like "1080p" or "WiFi6E",
+# are not taken for models
+BRAND_MODEL_PATTERN = re.compile(
+    r'^(?=[A-Z0-9]{6,20}$)(?=(?:[A-Z]*\d){2})[ABCDEFGHJKLMPRSWZ][A-Z]{1,4}\d+[A-Z][A-Z0-9]*$'
+)
+
+# Longest run of separated tokens tried as one model number
+MAX_SPAN_TOKENS = 4
+
+# Shortest partial model that is expanded to a unique catalog model
+MIN_PARTIAL_MODEL_CHARS = 6
+
+
+def normalize_model(text: str) -> str:
+    """Canonical form of a model number: upper case without spaces, dashes, dots or slashes"""
+    return STRIP_PATTERN.sub('', text).upper()
+
+
+def find_part_numbers(text: str) -> List[str]:
+    """All part numbers in text, upper-cased, in order of appearance"""
+    return [match.upper() for match in PART_NUMBER_PATTERN.findall(text or "")]
+
+
+def extract_part_number(text: str) -> Optional[str]:
+    """First part number in text"""
+    match = PART_NUMBER_PATTERN.search(text or "")
+    return match.group(0).upper() if match else None
+
+
+def is_brand_model(token: str) -> bool:
+    """Whether an upper-cased token has the shape of a brand's model number"""
+    return bool(BRAND_MODEL_PATTERN.match(token)) and not PART_TOKEN_PATTERN.match(token)
+
+
+def extract_model_number(text: str) -> Optional[str]:
+    """First token in text shaped like a brand model number (no catalog vocabulary)"""
+    for match in TOKEN_PATTERN.finditer(text or ""):
+        token = match.group(0).upper()
+        if is_brand_model(token):
+            return token
+    return None
+
+
+class EntityExtractor:
+    """Catalog-aware extractor, rebuilt whenever the vector store's catalog changes"""
+    
+    def __init__(self, vector_store):
+        """
+        Initialize entity extractor
+        
+        Args:
+            vector_store: Vector store whose metadata supplies the model vocabulary
+        """
+        self.vector_store = vector_store
+        self._catalog_version: Optional[int] = None
+        self._models: Dict[str, str] = {}  # normalized model -> catalog spelling
+        self._sorted_models: List[str] = []  # normalized models, sorted for prefix search
+        self._lock = threading.Lock()
+    
+    def _check_version(self) -> Tuple[Dict[str, str], List[str]]:
+        """Rebuild the vocabulary when the catalog has been reloaded"""
+        version = getattr(self.vector_store, 'version', None)
+        if version != self._catalog_version:
+            with self._lock:
+                if version != self._catalog_version:
+                    models = {}
+                    for product in self.vector_store.metadata:
+                        compat_models = product.get('compatible_models', [])
+                        if isinstance(compat_models, str):
+                            compat_models = [compat_models]
+                        for model in compat_models:
+                            models.setdefault(normalize_model(str(model)), str(model))
+                    self._models, self._sorted_models = models, sorted(models)
+                    self._catalog_version = version
+        return self._models, self._sorted_models
+    
+    @staticmethod
+    def _has_prefix(sorted_models: List[str], prefix: str) -> bool:
+        """True if any known model starts with prefix"""
+        i = bisect_left(sorted_models, prefix)
+        return i < len(sorted_models) and sorted_models[i].startswith(prefix)
+    
+    @staticmethod
+    def _expand_partial(sorted_models: List[str], models: Dict[str, str], prefix: str) -> Optional[str]:
+        """The catalog model a partial model number stands for, if exactly one matches"""
+        if len(prefix) < MIN_PARTIAL_MODEL_CHARS:
+            return None
+        i = bisect_left(sorted_models, prefix)
+        if i < len(sorted_models) and sorted_models[i].startswith(prefix):
+            if i + 1 == len(sorted_models) or not sorted_models[i + 1].startswith(prefix):
+                return models[sorted_models[i]]
+        return None
+    
+    def extract(self, text: str) -> Dict[str, List[str]]:
+        """
+        Extract every part and model number from a message
+        
+        Each token starts at most MAX_SPAN_TOKENS lookups, and a span is abandoned as
+        soon as no catalog model starts with it, so the cost is linear in the message.
+        
+        Returns:
+            Dictionary with part_numbers and model_numbers, in order of appearance
+        """
+        models, sorted_models = self._check_version()
+        text = text or ""
+        tokens = [(m.start(), m.end(), m.group(0).upper()) for m in TOKEN_PATTERN.finditer(text)]
+        
+        found_models = []
+        i = 0
+        while i < len(tokens):
+            token = tokens[i][2]
+            if PART_TOKEN_PATTERN.match(token):
+                i += 1
+                continue
+            
+            # Longest catalog model spelled by tokens i..j
+            best = None
+            compact = ""
+            for j in range(i, min(len(tokens), i + MAX_SPAN_TOKENS)):
+                if j > i and not SEPARATOR_PATTERN.match(text[tokens[j - 1][1]:tokens[j][0]]):
+                    break
+                compact += tokens[j][2]
+                if compact in models:
+                    best = (j, models[compact])
+                elif not self._has_prefix(sorted_models, compact):
+                    break
+            
+            if best:
+                found_models.append(best[1])
+                i = best[0] + 1
+                continue
+            
+            if GENERIC_MODEL_PATTERN.match(token):
+                # Partial catalog model, or a model the catalog does not carry in a brand's format
+                model = self._expand_partial(sorted_models, models, token)
+                if model or is_brand_model(token):
+                    found_models.append(model or token)
+            i += 1
+        
+        return {
+            "part_numbers": find_part_numbers(text),
+            "model_numbers": found_models
+        }
+    
+    def extract_part_number(self, text: str) -> Optional[str]:
+        """First part number in text"""
+        return extract_part_number(text)
+    
+    def extract_model_number(self, text: str) -> Optional[str]:
+        """First model number in text, preferring catalog spellings"""
+        model_numbers = self.extract(text)["model_numbers"]
+        return model_numbers[0] if model_numbers else None
@@ -0,0 +1,222 @@
+"""
+Event Log Module
+Structured JSONL log of chat turns (timings, intent, retrieved parts, token usage, cache hits)
+Request threads only put events on a bounded queue; a background thread encodes and
+appends them and rotates the file by size. Each process has its own file. When the queue is full, events are
+dropped and counted instead of blocking the request
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+from metrics import get_metrics_registry
+from product_payloads import dumps
+
+
+EVENTS = get_metrics_registry().counter(
+    "event_log_events_total", "Events handed to the event log, by outcome (written/dropped/failed)",
+    labelnames=("outcome",)
+)
+QUEUE_DEPTH = get_metrics_registry().gauge(
+    "event_log_queue_depth", "Events waiting for the event log writer"
+)
+
+# Queue marker that stops the writer thread
+_STOP = object()
+
+
+class EventLog:
+    """Append-only JSONL event file written by a background thread"""
+    
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, backup_count: int = 5,
+                 queue_size: int = 10000, batch_size: int = 256):
+        """
+        Initialize event log and start its writer thread
+        
+        Args:
+            path: JSONL file to append to (created with its directory if missing)
+            max_bytes: Size at which the file is rotated to path.1 (0 = never rotate)
+            backup_count: Rotated files kept (path.1 is the newest)
+            queue_size: Events buffered for the writer; further events are dropped
+            batch_size: Events written per flush at most
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.rotations = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "ab")
+        self._size = self._file.tell()
+        
+        self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def log(self, event_type: str, **fields) -> bool:
+        """
+        Queue an event without blocking
+        
+        Args:
+            event_type: Event name, stored as "type"
+            **fields: JSON-serializable values; they must not be mutated afterwards,
+                since they are encoded later on the writer thread
+        
+        Returns:
+            False if the event was dropped because the queue is full
+        """
+        event = {"ts": round(time.time(), 3), "type": event_type, **fields}
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            EVENTS.inc(outcome="dropped")
+            return False
+        return True
+    
+    def _run(self) -> None:
+        """Writer loop: drain the queue in batches, append, flush and rotate"""
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            QUEUE_DEPTH.set(self._queue.qsize())
+            
+            stop = any(event is _STOP for event in batch)
+            events = [event for event in batch if event is not _STOP]
+            try:
+                self._write(events)
+            except OSError as e:
+                # Never let a file error end the writer thread
+                print(f"Event log: writer error on {self.path}: {str(e)}")
+            if stop:
+                if self._file is not None:
+                    self._file.close()
+                return
+    
+    def _write(self, events: List[Dict]) -> None:
+        """Append encoded events, counting ones that cannot be serialized or written"""
+        lines = []
+        for event in events:
+            try:
+                lines.append(dumps(event) + b"\n")
+            except (TypeError, ValueError) as e:
+                print(f"Event log: cannot encode {event.get('type')} event: {str(e)}")
+                self._count_failed(1)
+        if not lines:
+            return
+        
+        data = b"".join(lines)
+        try:
+            if self._file is None:
+                self._reopen()
+            self._file.write(data)
+            self._file.flush()
+        except OSError as e:
+            print(f"Event log: write to {self.path} failed: {str(e)}")
+            self._count_failed(len(lines))
+            return
+        
+        self._size += len(data)
+        with self._lock:
+            self.written += len(lines)
+        EVENTS.inc(len(lines), outcome="written")
+        
+        if self.max_bytes and self._size >= self.max_bytes:
+            try:
+                self._rotate()
+            except OSError as e:
+                print(f"Event log: reopening {self.path} after rotation failed: {str(e)}")
+    
+    def _count_failed(self, count: int) -> None:
+        with self._lock:
+            self.failed += count
+        EVENTS.inc(count, outcome="failed")
+    
+    def _rotate(self) -> None:
+        """Shift path -> path.1 -> ... -> path.<backup_count> and start a new file"""
+        self._file.close()
+        try:
+            if self.backup_count > 0:
+                for i in range(self.backup_count - 1, 0, -1):
+                    source = f"{self.path}.{i}"
+                    if os.path.exists(source):
+                        os.replace(source, f"{self.path}.{i + 1}")
+                os.replace(self.path, f"{self.path}.1")
+            else:
+                os.remove(self.path)
+        except OSError as e:
+            print(f"Event log: rotation of {self.path} failed: {str(e)}")
+        with self._lock:
+            self.rotations += 1
+        self._reopen()
+    
+    def _reopen(self) -> None:
+        """Open path for appending; on failure the file stays closed and the next write retries"""
+        self._file = None
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+    
+    def close(self, timeout: float = 5.0) -> None:
+        """Write out queued events and stop the writer thread"""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+    
+    def stats(self) -> Dict:
+        """Events written, dropped and failed so far"""
+        with self._lock:
+            return {
+                "path": self.path,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "queued": self._queue.qsize(),
+                "rotations": self.rotations
+            }
+
+
+def process_log_path(path: str, pid: Optional[int] = None) -> str:
+    """
+    Path of this process's event file: the pid goes before the extension
+    
+    Each server worker tracks its file's size and rotates it on its own, so workers
+    must never share a file (logs/chat_events.jsonl -> logs/chat_events.<pid>.jsonl).
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid() if pid is None else pid}{ext}"
+
+
+def create_event_log() -> Optional[EventLog]:
+    """
+    Factory function to create the event log from environment (None when EVENT_LOG_PATH is unset)
+    
+    Every process writes its own file, named after EVENT_LOG_PATH with the pid added.
+    """
+    path = os.environ.get("EVENT_LOG_PATH")
+    if not path:
+        return None
+    return EventLog(
+        process_log_path(path),
+        max_bytes=int(os.environ.get("EVENT_LOG_MAX_BYTES", 50 * 1024 * 1024)),
+        backup_count=int(os.environ.get("EVENT_LOG_BACKUPS", 5)),
+        queue_size=int(os.environ.get("EVENT_LOG_QUEUE_SIZE", 10000))
+    )
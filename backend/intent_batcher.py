@@ -0,0 +1,138 @@
+"""
+Intent Batcher Module
+Micro-batches intent classification across concurrent chat turns
+Requests arriving within a few milliseconds of each other share one LLM call
+(DeepseekClient.analyze_intents), so the instruction template is sent once per batch
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional
+from metrics import get_metrics_registry
+
+
+BATCH_SIZE = get_metrics_registry().histogram(
+    "intent_batch_size", "Messages classified per intent LLM call", buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+BATCH_WAIT = get_metrics_registry().histogram(
+    "intent_batch_wait_seconds", "Time a batch stayed open collecting messages",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+
+
+class _Batch:
+    """Messages collected for one classification call"""
+    
+    def __init__(self):
+        self.messages: List[str] = []
+        self.results: Optional[List[Dict]] = None
+        self.full = threading.Event()  # Set when max_batch_size is reached
+        self.done = threading.Event()  # Set when results are available
+
+
+class IntentBatcher:
+    """Gathers concurrent analyze_intent calls into batched LLM requests"""
+    
+    def __init__(self, llm, max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        """
+        Initialize intent batcher
+        
+        Args:
+            llm: DeepseekClient (needs analyze_intents and classify_intent_locally)
+            max_batch_size: Messages per LLM call; a full batch is sent at once
+            max_wait_ms: How long the first message of a batch waits for others
+        """
+        self.llm = llm
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.batches = 0
+        self.messages = 0
+        self._open: Optional[_Batch] = None
+        self._lock = threading.Lock()
+    
+    def classify(self, user_message: str) -> Dict[str, any]:
+        """
+        Classify a message, sharing the LLM call with concurrent callers
+        
+        The first caller of a batch waits up to max_wait_ms (less if the batch fills),
+        then sends the batch and hands each waiting caller its own result. Callers that
+        join an open batch just wait for it.
+        
+        Returns:
+            Same shape as DeepseekClient.analyze_intent
+        """
+        if not self.llm.is_available():
+            return self.llm.classify_intent_locally(user_message)
+        
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = _Batch()
+                self._open = batch
+            index = len(batch.messages)
+            batch.messages.append(user_message)
+            if len(batch.messages) >= self.max_batch_size:
+                # Closed to new messages; the leader sends it now
+                self._open = None
+                batch.full.set()
+        
+        if leader:
+            start = time.perf_counter()
+            batch.full.wait(self.max_wait_ms / 1000)
+            with self._lock:
+                if self._open is batch:
+                    self._open = None
+            BATCH_WAIT.observe(time.perf_counter() - start)
+            self._dispatch(batch)
+        else:
+            batch.done.wait()
+        
+        return batch.results[index]
+    
+    def _dispatch(self, batch: _Batch) -> None:
+        """Classify a closed batch and release its waiters"""
+        try:
+            batch.results = self.llm.analyze_intents(batch.messages)
+        except Exception as e:
+            print(f"Batched intent classification failed, using keywords: {str(e)}")
+            batch.results = [self.llm.classify_intent_locally(m) for m in batch.messages]
+        
+        BATCH_SIZE.observe(len(batch.messages))
+        with self._lock:
+            self.batches += 1
+            self.messages += len(batch.messages)
+        batch.done.set()
+    
+    def stats(self) -> Dict:
+        """Batches sent and the mean batch size"""
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "batches": self.batches,
+                "messages": self.messages,
+                "mean_batch_size": round(self.messages / self.batches, 2) if self.batches else 0.0
+            }
+
+
+def create_intent_batcher(llm, max_callers: Optional[int] = None) -> Optional[IntentBatcher]:
+    """
+    Factory function to create an intent batcher from environment (None when batching is off)
+    
+    Args:
+        llm: DeepseekClient
+        max_callers: Turns that can classify at once (the chat pool's max_concurrent); a
+            batch never collects more, so INTENT_BATCH_SIZE is capped at it
+    """
+    import os
+    max_batch_size = int(os.environ.get("INTENT_BATCH_SIZE", 1))
+    if max_callers is not None:
+        max_batch_size = min(max_batch_size, max_callers)
+    if max_batch_size <= 1:
+        return None
+    return IntentBatcher(
+        llm,
+        max_batch_size=max_batch_size,
+        max_wait_ms=float(os.environ.get("INTENT_BATCH_WAIT_MS", 5))
+    )
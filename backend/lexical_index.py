@@ -0,0 +1,166 @@
+"""
+Lexical Index Module
+Prebuilt inverted BM25 index over product names, descriptions and keywords
+Complements vector search for exact-term queries (part names, brands, model numbers)
+"""
+
+import heapq
+import math
+import re
+from typing import List, Dict, Tuple
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset([
+    'a', 'an', 'and', 'are', 'can', 'do', 'does', 'for', 'how', 'i', 'in', 'is', 'it',
+    'me', 'my', 'of', 'on', 'or', 'the', 'this', 'to', 'what', 'with', 'you'
+])
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase text and split it into index terms"""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Inverted index with impact-ordered posting lists and precomputed BM25 weights"""
+    
+    # Field repetition weights: a term in the name counts more than one in the description
+    FIELD_WEIGHTS = {
+        'name': 3,
+        'keywords': 2,
+        'description': 1,
+        'category': 1,
+        'id': 1,
+        'compatible_models': 1
+    }
+    
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """Initialize an empty index with BM25 parameters"""
+        self.k1 = k1
+        self.b = b
+        self.num_docs = 0
+        # term -> (doc indices, impacts, doc index -> position), sorted by impact descending
+        self.postings: Dict[str, Tuple[List[int], List[float], Dict[int, int]]] = {}
+    
+    def build(self, products: List[Dict]) -> None:
+        """
+        Build the index from a product list
+        
+        Args:
+            products: Product dictionaries; list positions become document ids
+        """
+        term_freqs: List[Dict[str, int]] = []
+        doc_lengths: List[int] = []
+        
+        for product in products:
+            freqs: Dict[str, int] = {}
+            length = 0
+            for field, weight in self.FIELD_WEIGHTS.items():
+                value = product.get(field)
+                if not value:
+                    continue
+                if isinstance(value, list):
+                    value = ' '.join(str(v) for v in value)
+                for term in tokenize(str(value)):
+                    freqs[term] = freqs.get(term, 0) + weight
+                    length += weight
+            term_freqs.append(freqs)
+            doc_lengths.append(length)
+        
+        self.num_docs = len(products)
+        avg_length = (sum(doc_lengths) / self.num_docs) if self.num_docs else 0.0
+        
+        doc_freqs: Dict[str, int] = {}
+        for freqs in term_freqs:
+            for term in freqs:
+                doc_freqs[term] = doc_freqs.get(term, 0) + 1
+        
+        raw_postings: Dict[str, List[Tuple[float, int]]] = {}
+        for doc_id, freqs in enumerate(term_freqs):
+            norm = self.k1 * (1 - self.b + self.b * doc_lengths[doc_id] / avg_length) if avg_length else self.k1
+            for term, tf in freqs.items():
+                df = doc_freqs[term]
+                idf = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+                impact = idf * tf * (self.k1 + 1) / (tf + norm)
+                raw_postings.setdefault(term, []).append((impact, doc_id))
+        
+        self.postings = {}
+        for term, entries in raw_postings.items():
+            entries.sort(key=lambda e: (-e[0], e[1]))
+            docs = [doc_id for _, doc_id in entries]
+            impacts = [impact for impact, _ in entries]
+            self.postings[term] = (docs, impacts, {doc_id: pos for pos, doc_id in enumerate(docs)})
+    
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Score documents against a query with early termination
+        
+        Terms are processed in order of decreasing maximum impact. Once a posting's
+        impact plus the best possible contribution of the remaining terms cannot beat
+        the current k-th score, the rest of that list can no longer introduce new
+        candidates, so only documents already accumulated are probed.
+        
+        Returns:
+            List of (document index, BM25 score) sorted by score descending
+        """
+        terms = [t for t in dict.fromkeys(tokenize(query)) if t in self.postings]
+        if not terms or top_k <= 0:
+            return []
+        
+        terms.sort(key=lambda t: -self.postings[t][1][0])
+        remaining = [0.0] * (len(terms) + 1)
+        for i in range(len(terms) - 1, -1, -1):
+            remaining[i] = remaining[i + 1] + self.postings[terms[i]][1][0]
+        
+        scores: Dict[int, float] = {}
+        for i, term in enumerate(terms):
+            docs, impacts, positions = self.postings[term]
+            rest = remaining[i + 1]
+            threshold = heapq.nlargest(top_k, scores.values())[-1] if len(scores) >= top_k else 0.0
+            
+            cutoff = len(docs)
+            for pos, (doc_id, impact) in enumerate(zip(docs, impacts)):
+                if doc_id in scores:
+                    scores[doc_id] += impact
+                elif len(scores) >= top_k and impact + rest <= threshold:
+                    cutoff = pos
+                    break
+                else:
+                    scores[doc_id] = impact
+            
+            # Tail of the list: only documents that are already candidates can still gain
+            if cutoff < len(docs):
+                for doc_id in list(scores):
+                    pos = positions.get(doc_id)
+                    if pos is not None and pos >= cutoff:
+                        scores[doc_id] += impacts[pos]
+        
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+
+
+def fuse_scores(lexical_scores: Dict[str, float], vector_scores: Dict[str, float], lexical_weight: float = 0.6) -> Dict[str, float]:
+    """
+    Fuse lexical and vector scores with a weighted sum of max-normalized scores
+    
+    Rank-only fusion (e.g. reciprocal rank fusion) throws away how decisive a BM25
+    match is, and the demo embeddings produce many ties, so scores are normalized
+    by each list's maximum instead. A list whose maximum is zero carries no signal.
+    
+    Args:
+        lexical_scores: Mapping of id to BM25 score
+        vector_scores: Mapping of id to vector similarity
+        lexical_weight: Weight of the lexical side, between 0 and 1
+    
+    Returns:
+        Mapping of id to fused score
+    """
+    fused: Dict[str, float] = dict.fromkeys(list(lexical_scores) + list(vector_scores), 0.0)
+    for scores, weight in ((lexical_scores, lexical_weight), (vector_scores, 1.0 - lexical_weight)):
+        top = max(scores.values(), default=0.0)
+        if top <= 0:
+            continue
+        for item_id, score in scores.items():
+            fused[item_id] += weight * score / top
+    return fused
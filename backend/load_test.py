@@ -0,0 +1,232 @@
+"""
+Load Test Module
+Replays realistic multi-turn chat sessions against a running backend at
+increasing concurrency and reports throughput, latency percentiles and error rates
+
+Typical capacity-planning run (no real Deepseek traffic):
+    python deepseek_stub.py --port 8900 --latency lognormal:400,0.5 &
+    DEEPSEEK_API_BASE_URL=http://127.0.0.1:8900/v1 python main.py &
+    python load_test.py --base-url http://localhost:5000 --concurrency 1,4,16,64 --duration 30
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from sample_products import SAMPLE_PRODUCTS
+
+
+# Multi-turn conversation scripts; placeholders are filled from the sample catalog
+SESSION_SCRIPTS = [
+    [
+        "My {category} {keyword} is not working",
+        "I have model {model}",
+        "Is {part} compatible with {model}?",
+        "How do I install {part}?",
+    ],
+    [
+        "Tell me about {part}",
+        "How much does it cost?",
+        "Is it compatible with my {model}?",
+    ],
+    [
+        "What parts fit {model}?",
+        "Show me the {keyword}",
+        "How do I install {part}?",
+        "Thanks!",
+    ],
+    [
+        "What's the weather today?",
+        "Ok, I need a {keyword} for my {category}",
+    ],
+]
+
+# Non-chat traffic mixed into sessions: (weight, method, path, payload builder)
+CATALOG_CALLS = [
+    (3, "GET", "/api/products/search", lambda p, m: {"q": p["name"], "limit": 5}),
+    (2, "POST", "/api/compatibility", lambda p, m: {"part_id": p["id"], "model_number": m}),
+    (1, "GET", "/api/products/{part}", lambda p, m: None),
+]
+
+
+def build_session(rng: random.Random) -> Tuple[List[str], Dict, str]:
+    """
+    Pick a script and fill it with one product from the sample catalog
+    
+    Returns:
+        Tuple of (turns, product, model_number)
+    """
+    product = rng.choice(SAMPLE_PRODUCTS)
+    values = {
+        "part": product["id"],
+        "model": rng.choice(product["compatible_models"]),
+        "category": product["category"],
+        "keyword": rng.choice(product["keywords"]),
+    }
+    return [turn.format(**values) for turn in rng.choice(SESSION_SCRIPTS)], product, values["model"]
+
+
+class LoadStats:
+    """Thread-safe collection of request outcomes for one concurrency level"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.status_codes: Dict[int, int] = {}
+    
+    def record(self, endpoint: str, latency_ms: float, status: Optional[int]) -> None:
+        with self.lock:
+            self.samples.setdefault(endpoint, []).append(latency_ms)
+            key = status if status is not None else 0
+            self.status_codes[key] = self.status_codes.get(key, 0) + 1
+            if status is None or status >= 400:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+    
+    @staticmethod
+    def _summarize(samples: List[float], errors: int, elapsed: float) -> Dict:
+        ordered = sorted(samples)
+        
+        def percentile(p: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3)
+        
+        return {
+            "requests": len(ordered),
+            "throughput_rps": round(len(ordered) / elapsed, 3) if elapsed else None,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "error_rate": round(errors / len(ordered), 4) if ordered else 0.0
+        }
+    
+    def summary(self, elapsed: float) -> Dict:
+        with self.lock:
+            all_samples = [s for samples in self.samples.values() for s in samples]
+            report = {
+                "overall": self._summarize(all_samples, sum(self.errors.values()), elapsed),
+                "endpoints": {
+                    endpoint: self._summarize(samples, self.errors.get(endpoint, 0), elapsed)
+                    for endpoint, samples in sorted(self.samples.items())
+                },
+                "status_codes": {str(k): v for k, v in sorted(self.status_codes.items())}
+            }
+        return report
+
+
+def run_user(base_url: str, stats: LoadStats, deadline: float, seed: int, catalog_ratio: float, timeout: float) -> None:
+    """Simulate one user running sessions back to back until the deadline"""
+    rng = random.Random(seed)
+    http = requests.Session()
+    
+    while time.time() < deadline:
+        turns, product, model = build_session(rng)
+        session_id = f"load-{uuid.UUID(int=rng.getrandbits(128)).hex[:12]}"
+        
+        for turn in turns:
+            if time.time() >= deadline:
+                break
+            
+            if rng.random() < catalog_ratio:
+                weights = [c[0] for c in CATALOG_CALLS]
+                _, method, template, build = rng.choices(CATALOG_CALLS, weights=weights)[0]
+                path = template.format(part=product["id"])
+                payload = build(product, model)
+                endpoint = f"{method} {template}"
+                kwargs = {"params": payload} if method == "GET" else {"json": payload}
+            else:
+                method, path, endpoint = "POST", "/api/chat", "POST /api/chat"
+                kwargs = {"json": {"message": turn, "sessionId": session_id}}
+            
+            start = time.perf_counter()
+            status = None
+            try:
+                response = http.request(method, f"{base_url}{path}", timeout=timeout, **kwargs)
+                status = response.status_code
+            except requests.RequestException:
+                pass
+            stats.record(endpoint, (time.perf_counter() - start) * 1000, status)
+        
+        try:
+            http.post(f"{base_url}/api/session/clear", json={"session_id": session_id}, timeout=timeout)
+        except requests.RequestException:
+            pass
+
+
+def run_level(base_url: str, concurrency: int, duration: float, seed: int, catalog_ratio: float, timeout: float) -> Dict:
+    """Run one concurrency level and summarize it"""
+    stats = LoadStats()
+    deadline = time.time() + duration
+    threads = [
+        threading.Thread(target=run_user, args=(base_url, stats, deadline, seed * 1000 + i, catalog_ratio, timeout), daemon=True)
+        for i in range(concurrency)
+    ]
+    
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    return {"concurrency": concurrency, "duration_s": round(elapsed, 3), **stats.summary(elapsed)}
+
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Multi-turn load generator for the chat backend")
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per concurrency level")
+    parser.add_argument("--catalog-ratio", type=float, default=0.2, help="Fraction of turns sent to catalog endpoints instead of chat")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+    
+    base_url = args.base_url.rstrip("/")
+    try:
+        requests.get(f"{base_url}/health", timeout=5).raise_for_status()
+    except requests.RequestException as e:
+        print(f"Backend not reachable at {base_url}: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    levels = []
+    for concurrency in [int(c) for c in args.concurrency.split(",") if c]:
+        print(f"Running concurrency {concurrency} for {args.duration}s...", file=sys.stderr)
+        level = run_level(base_url, concurrency, args.duration, args.seed, args.catalog_ratio, args.timeout)
+        overall = level["overall"]
+        print(f"  {overall['throughput_rps']} req/s, p50 {overall['p50_ms']}ms, p95 {overall['p95_ms']}ms, "
+              f"p99 {overall['p99_ms']}ms, errors {overall['error_rate']:.2%}", file=sys.stderr)
+        levels.append(level)
+    
+    report = {
+        "meta": {
+            "base_url": base_url,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "duration_s": args.duration,
+            "catalog_ratio": args.catalog_ratio,
+            "seed": args.seed
+        },
+        "levels": levels
+    }
+    output = json.dumps(report, indent=2)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+        print(f"Load test report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,16 @@ FastAPI/Flask application providing REST endpoints for the chat frontend
 """
 
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 from chat_handler import create_chat_handler, ChatHandler
-from vector_store import initialize_vector_store
+from vector_store import initialize_vector_store, set_vector_store
+from search_server import create_remote_vector_store
 from sample_products import get_sample_products
+from metrics import get_metrics_registry
+from admission import create_admission_controller, AdmissionRejected
+from product_payloads import encode_json, negotiate_encoding, compress
+from functools import wraps
 import os
 from typing import Optional
 
@@ -21,6 +26,77 @@ CORS(app)  # Enable CORS for frontend requests
 # Global chat handler instance
 chat_handler: Optional[ChatHandler] = None
 
+# Request header that asks /api/chat to include per-stage timings in the response
+DEBUG_TIMINGS_HEADER = 'X-Debug-Timings'
+
+# Upper bound on queries accepted by the batch search endpoint
+MAX_BATCH_QUERIES = int(os.environ.get('MAX_BATCH_QUERIES', 500))
+
+# JSON responses at least this large are compressed when the client accepts it (0 disables)
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', 1024))
+
+# Separate concurrency/queue limits for chat turns that call Deepseek (chat pool) and fast catalog requests
+admission = create_admission_controller()
+
+
+def admitted(pool: str):
+    """
+    Run the endpoint inside an admission slot of the given pool
+    
+    Args:
+        pool: Admission pool name ('catalog'; chat turns take their slot in ChatHandler)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            with admission.admit(pool):
+                return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def conditional(response: Response) -> Response:
+    """
+    Tag a GET response with an ETag of its body and answer If-None-Match with 304
+    
+    Catalog responses only change when the catalog does, so browsers and CDNs may
+    keep them but must revalidate (Cache-Control: no-cache).
+    """
+    response.add_etag()
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+
+def json_response(payload, status: int = 200) -> Response:
+    """JSON response encoded with the fast encoder; pre-encoded product cards are spliced in as-is"""
+    return Response(encode_json(payload), status=status, mimetype='application/json')
+
+
+@app.after_request
+def compress_response(response: Response) -> Response:
+    """
+    Compress large JSON bodies with the best encoding the client accepts (br, gzip)
+    
+    The ETag is computed on the uncompressed body, so it is weakened: the
+    representation differs but its content does not, and If-None-Match still matches.
+    """
+    if (COMPRESSION_MIN_BYTES <= 0 or response.direct_passthrough or response.status_code != 200
+            or response.mimetype != 'application/json' or 'Content-Encoding' in response.headers):
+        return response
+    
+    body = response.get_data()
+    encoding = negotiate_encoding(request.accept_encodings, len(body), COMPRESSION_MIN_BYTES)
+    response.vary.add('Accept-Encoding')
+    if not encoding:
+        return response
+    
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
 
 def initialize_backend():
     """Initialize all backend services"""
@@ -28,21 +104,36 @@ def initialize_backend():
     
     print("Initializing Instalily AI Chat Backend...")
     
-    # Initialize vector store with sample products
-    print("Loading product catalog...")
-    products = get_sample_products()
-    initialize_vector_store(products)
-    print(f"✓ Loaded {len(products)} products")
+    # Use the shared search server when one is configured, else build the index in this process
+    remote_store = None
+    try:
+        remote_store = create_remote_vector_store()
+    except OSError as e:
+        print(f"⚠ Warning: search server unavailable ({e}), building a local index")
+    
+    if remote_store:
+        set_vector_store(remote_store)
+        print(f"✓ Using shared search server at {remote_store.socket_path}")
+    else:
+        # Initialize vector store with sample products
+        print("Loading product catalog...")
+        products = get_sample_products()
+        initialize_vector_store(products)
+        print(f"✓ Loaded {len(products)} products")
     
     # Initialize chat handler
     print("Initializing chat handler...")
     try:
-        chat_handler = create_chat_handler()
+        chat_handler = create_chat_handler(llm_slots=admission.pools.get('chat'))
         print("✓ Chat handler ready")
     except ValueError as e:
         print(f"⚠ Warning: {e}")
         print("  Set DEEPSEEK_API_KEY environment variable to enable LLM features")
-        chat_handler = create_chat_handler()
+        chat_handler = create_chat_handler(llm_slots=admission.pools.get('chat'))
+    
+    # Related-parts graph is built with the catalog, not on the first chat turn
+    graph = chat_handler.products.compat_graph.refresh()
+    print(f"✓ Compatibility graph: {graph['models']} models, {graph['edges']} part links")
     
     print("✓ Backend initialization complete\n")
 
@@ -57,7 +148,11 @@ def health_check():
     return jsonify({
         "status": "ok",
         "service": "Instalily AI Chat Backend",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "llm_circuit": chat_handler.llm.breaker.state if chat_handler else None,
+        "direct_answers": chat_handler.answers.stats() if chat_handler else None,
+        "payloads": chat_handler.products.payloads.stats() if chat_handler else None,
+        "event_log": chat_handler.event_log.stats() if chat_handler and chat_handler.event_log else None
     }), 200
 
 
@@ -70,9 +165,12 @@ def api_info():
         "endpoints": [
             "/health",
             "/api/info",
+            "/metrics",
             "/api/chat",
             "/api/products/search",
+            "/api/products/search/batch",
             "/api/products/:id",
+            "/api/suggest",
             "/api/compatibility",
             "/api/session/info"
         ],
@@ -81,6 +179,15 @@ def api_info():
     }), 200
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(
+        get_metrics_registry().render(),
+        mimetype='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
 # ============================================================================
 # CHAT ENDPOINTS
 # ============================================================================
@@ -122,15 +229,26 @@ def chat():
                 "data": {
                     "products": result['products'],
                     "suggestions": result['suggestions'],
+                    "related": result['related'],
                     "intent": result['intent']
                 }
             }
         }
         
-        return jsonify(response_data), 200
+        # Per-stage timings are only exposed on request
+        if request.headers.get(DEBUG_TIMINGS_HEADER, '').lower() in ('1', 'true', 'yes'):
+            response_data["metadata"] = result['metadata']
+        
+        return json_response(response_data)
     
+    except AdmissionRejected:
+        # The turn needed the LLM and no chat slot freed up; answered with 503 (see overloaded)
+        raise
     except Exception as e:
         print(f"Error in /api/chat: {str(e)}")
+        if chat_handler and chat_handler.event_log:
+            chat_handler.event_log.log("chat_error", session_id=(request.get_json(silent=True) or {}).get('sessionId', 'default'),
+                                       error=type(e).__name__, message=str(e))
         return jsonify({
             "success": False,
             "error": {"message": f"Server error: {str(e)}"}
@@ -142,6 +260,7 @@ def chat():
 # ============================================================================
 
 @app.route('/api/products/search', methods=['GET'])
+@admitted('catalog')
 def search_products():
     try:
         query = request.args.get('q', '').strip()
@@ -154,20 +273,74 @@ def search_products():
         category = request.args.get('category')
         limit = int(request.args.get('limit', 5))
         
-        results = chat_handler.products.search_products(query, category=category, top_k=limit)
-        formatted = chat_handler.products.format_products_for_chat(results)
+        result = chat_handler.products.search_products_for_display(query, category=category, top_k=limit)
         
-        return jsonify({
+        return conditional(json_response({
             "success": True,
             "response": {
                 "type": "product_results",
-                "content": f"Found {len(formatted)} products",
+                "content": f"Found {result['count']} products",
                 "data": {
-                    "products": formatted,
+                    "products": result['products'],
                     "query": query
                 }
             }
-        }), 200
+        }))
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": {"message": f"Server error: {str(e)}"}
+        }), 500
+
+
+@app.route('/api/products/search/batch', methods=['POST'])
+@admitted('catalog')
+def search_products_batch():
+    try:
+        data = request.get_json()
+        
+        queries = data.get('queries') if data else None
+        if not isinstance(queries, list) or not queries:
+            return jsonify({
+                "success": False,
+                "error": {"message": "queries must be a non-empty list"}
+            }), 400
+        
+        if len(queries) > MAX_BATCH_QUERIES:
+            return jsonify({
+                "success": False,
+                "error": {"message": f"At most {MAX_BATCH_QUERIES} queries per batch"}
+            }), 400
+        
+        queries = [str(q).strip() for q in queries]
+        if not all(queries):
+            return jsonify({
+                "success": False,
+                "error": {"message": "Search queries cannot be empty"}
+            }), 400
+        
+        category = data.get('category')
+        limit = int(data.get('limit', 5))
+        
+        batch_results = chat_handler.products.search_products_batch(queries, category=category, top_k=limit)
+        
+        return json_response({
+            "success": True,
+            "response": {
+                "type": "product_results",
+                "content": f"Searched {len(queries)} queries",
+                "data": {
+                    "results": [
+                        {
+                            "query": query,
+                            "products": chat_handler.products.payloads.cards(results)
+                        }
+                        for query, results in zip(queries, batch_results)
+                    ]
+                }
+            }
+        })
     
     except Exception as e:
         return jsonify({
@@ -177,6 +350,7 @@ def search_products():
 
 
 @app.route('/api/products/<product_id>', methods=['GET'])
+@admitted('catalog')
 def get_product(product_id):
     try:
         product = chat_handler.products.get_product_by_id(product_id)
@@ -187,15 +361,54 @@ def get_product(product_id):
                 "error": {"message": f"Product {product_id} not found"}
             }), 404
         
-        formatted = chat_handler.products.format_product_for_chat(product)
-        
-        return jsonify({
+        return conditional(json_response({
             "success": True,
             "response": {
                 "type": "product_results",
                 "content": f"Product details for {product_id}",
                 "data": {
-                    "products": [formatted]
+                    "products": chat_handler.products.payloads.cards([product])
+                }
+            }
+        }))
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": {"message": f"Server error: {str(e)}"}
+        }), 500
+
+
+@app.route('/api/suggest', methods=['GET'])
+@admitted('catalog')
+def suggest():
+    try:
+        prefix = request.args.get('prefix', '').strip()
+        if not prefix:
+            return jsonify({
+                "success": False,
+                "error": {"message": "prefix is required"}
+            }), 400
+        
+        kind = request.args.get('type')
+        if kind not in (None, 'part', 'model'):
+            return jsonify({
+                "success": False,
+                "error": {"message": "type must be 'part' or 'model'"}
+            }), 400
+        
+        limit = min(int(request.args.get('limit', 8)), 50)
+        result = chat_handler.products.suggest(prefix, limit=limit, kind=kind)
+        
+        return jsonify({
+            "success": True,
+            "response": {
+                "type": "suggestions",
+                "content": f"Found {len(result['suggestions'])} suggestions",
+                "data": {
+                    "prefix": prefix,
+                    "suggestions": result['suggestions'],
+                    "has_more": result['has_more']
                 }
             }
         }), 200
@@ -211,35 +424,37 @@ def get_product(product_id):
 # COMPATIBILITY ENDPOINTS
 # ============================================================================
 
-@app.route('/api/compatibility', methods=['POST'])
+@app.route('/api/compatibility', methods=['GET', 'POST'])
+@admitted('catalog')
 def check_compatibility():
+    """Check a part against a model (GET with query parameters supports conditional requests)"""
     try:
-        data = request.get_json()
+        data = request.args if request.method == 'GET' else request.get_json()
         
-        if not data or 'part_id' not in data or 'model_number' not in data:
+        if not data or not data.get('part_id') or not data.get('model_number'):
             return jsonify({
                 "success": False,
                 "error": {"message": "part_id and model_number are required"}
             }), 400
         
-        part_id = data['part_id'].upper()
-        model_number = data['model_number'].upper()
+        part_id = data['part_id'].strip().upper()
+        model_number = data['model_number'].strip().upper()
         
-        is_compatible, message = chat_handler.products.check_compatibility(part_id, model_number)
-        product = chat_handler.products.search_by_part_number(part_id)
+        result = chat_handler.products.check_compatibility_for_display(part_id, model_number)
         
-        return jsonify({
+        response = json_response({
             "success": True,
             "response": {
                 "type": "text",
-                "content": message,
+                "content": result['message'],
                 "data": {
-                    "compatible": is_compatible,
-                    "part": chat_handler.products.format_product_for_chat(product) if product else None,
+                    "compatible": result['compatible'],
+                    "part": result['part'],
                     "model_number": model_number
                 }
             }
-        }), 200
+        })
+        return conditional(response) if request.method == 'GET' else response
     
     except Exception as e:
         return jsonify({
@@ -314,6 +529,17 @@ def not_found(error):
     return jsonify({"error": "Endpoint not found"}), 404
 
 
+@app.errorhandler(AdmissionRejected)
+def overloaded(error):
+    """Shed load quickly instead of queueing past the deadline"""
+    response = jsonify({
+        "success": False,
+        "error": {"message": "Server is busy, please retry shortly", "code": "overloaded"}
+    })
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
+
+
 @app.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors"""
@@ -0,0 +1,210 @@
+"""
+Metrics Module
+In-process counters, gauges, latency histograms and per-stage timers
+Rendered in the Prometheus text exposition format by the /metrics endpoint
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+
+# Default latency buckets in seconds (1ms .. 30s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: Optional[Dict[str, str]] = None) -> str:
+    """Render a Prometheus label set"""
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.extend(extra.items())
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+class Counter:
+    """Monotonically increasing counter with optional labels"""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """Increase the counter"""
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def value(self, **labels) -> float:
+        """Current value for a label set"""
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        return self._values.get(key, 0.0)
+    
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+    
+    kind = "gauge"
+    
+    def set(self, value: float, **labels) -> None:
+        """Set the gauge to an absolute value"""
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+    
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        """Decrease the gauge"""
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, **labels) -> None:
+        """Record one observation"""
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [0.0] * (len(self.buckets) + 2)
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+    
+    @contextmanager
+    def time(self, **labels):
+        """Context manager that observes the elapsed wall time in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+    
+    def count(self, **labels) -> int:
+        """Number of observations for a label set"""
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        series = self._series.get(key)
+        return int(series[-2]) if series else 0
+    
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        lines = []
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, {'le': repr(bound)})} {int(count)}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, {'le': '+Inf'})} {int(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {int(series[-2])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds all metrics of the process and renders them for scraping"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+    
+    def _get_or_create(self, cls, name: str, help_text: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help_text, **kwargs)
+                self._metrics[name] = metric
+            return metric
+    
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labelnames=labelnames)
+    
+    def gauge(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, labelnames=labelnames)
+    
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, labelnames=labelnames, buckets=buckets)
+    
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = []
+        for name, metric in metrics:
+            lines.append(f"# HELP {name} {metric.help_text}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    """Times the stages of one request and feeds a shared stage histogram"""
+    
+    def __init__(self, histogram: Optional[Histogram] = None):
+        self.histogram = histogram
+        self.timings_ms: Dict[str, float] = {}
+        self._start = time.perf_counter()
+    
+    @contextmanager
+    def stage(self, name: str):
+        """Time a named stage; repeated stages accumulate"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings_ms[name] = self.timings_ms.get(name, 0.0) + elapsed * 1000
+            if self.histogram is not None:
+                self.histogram.observe(elapsed, stage=name)
+    
+    def total_ms(self) -> float:
+        """Milliseconds since the timer was created"""
+        return (time.perf_counter() - self._start) * 1000
+    
+    def summary(self) -> Dict[str, float]:
+        """Stage timings rounded for display, plus the total"""
+        summary = {name: round(ms, 3) for name, ms in self.timings_ms.items()}
+        summary["total"] = round(self.total_ms(), 3)
+        return summary
+
+
+# Global instance
+_metrics_registry = None
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get or create global metrics registry"""
+    global _metrics_registry
+    if _metrics_registry is None:
+        _metrics_registry = MetricsRegistry()
+    return _metrics_registry
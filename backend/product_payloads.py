@@ -0,0 +1,174 @@
+"""
+Product Payloads Module
+Product cards rendered and JSON-encoded once per catalog version, spliced into
+responses as pre-encoded bytes, plus response compression negotiation
+Uses orjson when installed and the standard json module otherwise
+"""
+
+import gzip
+import json
+import re
+import threading
+import uuid
+from typing import Callable, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Encodings offered to clients, most preferred first
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Bodies smaller than this are sent uncompressed (headers would eat the savings)
+DEFAULT_COMPRESSION_MIN_BYTES = 1024
+
+# Marks where pre-encoded fragments go; random per process, so request data cannot forge it
+_PLACEHOLDER = f"@@raw-{uuid.uuid4().hex}-"
+_PLACEHOLDER_PATTERN = re.compile(b'"' + re.escape(_PLACEHOLDER.encode("ascii")) + rb'(\d+)"')
+
+
+class RawJSON:
+    """Already-encoded JSON that encode_json splices in verbatim"""
+    
+    __slots__ = ("data",)
+    
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+def dumps(obj) -> bytes:
+    """Compact UTF-8 JSON, with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_json(payload) -> bytes:
+    """
+    Encode a response payload, splicing RawJSON values in without re-encoding them
+    
+    Only the small envelope around the fragments goes through the encoder, and the
+    fragments are joined into it in one pass.
+    """
+    fragments: List[bytes] = []
+    
+    def substitute(value):
+        if isinstance(value, RawJSON):
+            fragments.append(value.data)
+            return f"{_PLACEHOLDER}{len(fragments) - 1}"
+        if isinstance(value, dict):
+            return {k: substitute(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [substitute(v) for v in value]
+        return value
+    
+    body = dumps(substitute(payload))
+    if not fragments:
+        return body
+    # split() alternates envelope text with the captured fragment indexes
+    pieces = _PLACEHOLDER_PATTERN.split(body)
+    pieces[1::2] = [fragments[int(i)] for i in pieces[1::2]]
+    return b"".join(pieces)
+
+
+def negotiate_encoding(accept_encodings, size: int, min_bytes: int = DEFAULT_COMPRESSION_MIN_BYTES) -> Optional[str]:
+    """
+    Pick a content encoding for a body
+    
+    Args:
+        accept_encodings: The request's parsed Accept-Encoding (werkzeug Accept-like)
+        size: Body size in bytes
+        min_bytes: Smallest body worth compressing
+    
+    Returns:
+        'br', 'gzip' or None for identity
+    """
+    if size < min_bytes:
+        return None
+    return accept_encodings.best_match(SUPPORTED_ENCODINGS)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a body with a fast setting (responses are compressed per request)"""
+    if encoding == "br":
+        return brotli.compress(body, quality=4)
+    return gzip.compress(body, compresslevel=5)
+
+
+class ProductPayloads:
+    """Per-product encoded cards, rebuilt lazily whenever the catalog version changes"""
+    
+    def __init__(self, vector_store, format_product: Callable[[Dict], Dict], max_cards: Optional[int] = None):
+        """
+        Initialize payload cache
+        
+        Args:
+            vector_store: Vector store whose version invalidates the cards
+            format_product: Renders a product for the frontend (ProductService.format_product_for_chat)
+            max_cards: Cards kept at most, oldest dropped first (None = one per product served)
+        """
+        self.vector_store = vector_store
+        self.format_product = format_product
+        self.max_cards = max_cards
+        self._catalog_version: Optional[int] = None
+        self._cards: Dict[str, bytes] = {}  # product id -> card JSON without the closing brace
+        self._lock = threading.Lock()
+    
+    def _check_version(self) -> Dict[str, bytes]:
+        """Drop every card when the catalog has been reloaded"""
+        version = getattr(self.vector_store, 'version', None)
+        if version != self._catalog_version:
+            with self._lock:
+                if version != self._catalog_version:
+                    self._cards = {}
+                    self._catalog_version = version
+        return self._cards
+    
+    def card(self, product: Dict) -> bytes:
+        """
+        Encoded card for a product
+        
+        Everything except relevance_score depends only on the catalog, so that part is
+        encoded once and the per-result score is appended.
+        """
+        cards = self._check_version()
+        product_id = product.get('id')
+        head = cards.get(product_id)
+        if head is None:
+            formatted = self.format_product(product)
+            formatted.pop('relevance_score', None)
+            head = dumps(formatted)[:-1]
+            if self.max_cards is not None and len(cards) >= self.max_cards:
+                with self._lock:
+                    # Dicts keep insertion order, so the first key is the oldest card
+                    while len(cards) >= self.max_cards:
+                        cards.pop(next(iter(cards)), None)
+            cards[product_id] = head
+        return head + b',"relevance_score":' + dumps(product.get('score', 0)) + b'}'
+    
+    def cards(self, products: List[Dict]) -> RawJSON:
+        """Encoded JSON array of product cards"""
+        return RawJSON(b"[" + b",".join(self.card(p) for p in products) + b"]")
+    
+    def stats(self) -> Dict:
+        return {
+            "encoder": "orjson" if orjson is not None else "json",
+            "encodings": list(SUPPORTED_ENCODINGS),
+            "cards": len(self._cards),
+            "max_cards": self.max_cards,
+            "catalog_version": self._catalog_version
+        }
+
+
+def create_product_payloads(vector_store, format_product: Callable[[Dict], Dict]) -> ProductPayloads:
+    """Factory function to create a card cache sized from environment (PRODUCT_CARD_CACHE_SIZE, 0 = unbounded)"""
+    import os
+    max_cards = int(os.environ.get("PRODUCT_CARD_CACHE_SIZE", 20000))
+    return ProductPayloads(vector_store, format_product, max_cards=max_cards or None)
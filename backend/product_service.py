@@ -3,8 +3,17 @@ Product Service Module
 Handles product data retrieval, filtering, and formatting
 """
 
+import os
 from typing import List, Dict, Optional, Tuple
 from vector_store import get_vector_store
+from lexical_index import fuse_scores
+from context_builder import ContextBuilder
+from entity_extractor import EntityExtractor
+from suggest_index import SuggestIndex
+from compat_graph import CompatGraph
+from result_cache import create_result_cache
+from product_payloads import RawJSON, create_product_payloads
+from search_server import RemoteCompatGraph, RemoteEntityExtractor, RemoteSuggestIndex, RemoteVectorStore
 
 
 class ProductService:
@@ -16,13 +25,38 @@ class ProductService:
         'dishwasher': ['spray arms', 'filters', 'pumps', 'racks', 'heating elements', 'door seals']
     }
     
-    def __init__(self):
-        """Initialize product service"""
+    def __init__(self, hybrid_search: bool = True, max_prompt_tokens: Optional[int] = None):
+        """
+        Initialize product service
+        
+        Args:
+            hybrid_search: Fuse BM25 lexical results with vector results
+            max_prompt_tokens: Hard token budget for LLM prompts (env MAX_PROMPT_TOKENS, default 2000)
+        """
+        if max_prompt_tokens is None:
+            max_prompt_tokens = int(os.environ.get("MAX_PROMPT_TOKENS", 2000))
+        
         self.vector_store = get_vector_store()
+        self.hybrid_search = hybrid_search
+        self.context_builder = ContextBuilder(self.vector_store, max_prompt_tokens=max_prompt_tokens)
+        if isinstance(self.vector_store, RemoteVectorStore):
+            # The search server holds one copy of the catalog indexes for every worker
+            self.entity_extractor = RemoteEntityExtractor(self.vector_store)
+            self.suggest_index = RemoteSuggestIndex(self.vector_store)
+            self.compat_graph = RemoteCompatGraph(self.vector_store)
+        else:
+            self.entity_extractor = EntityExtractor(self.vector_store)
+            self.suggest_index = SuggestIndex(self.vector_store)
+            self.compat_graph = CompatGraph(self.vector_store)
+        # Product cards encoded once per catalog version and spliced into responses
+        self.payloads = create_product_payloads(self.vector_store, self.format_product_for_chat)
+        # Endpoint results, dropped whenever the catalog version changes
+        self.search_cache = create_result_cache("search", self.vector_store)
+        self.compatibility_cache = create_result_cache("compatibility", self.vector_store)
     
     def search_products(self, query: str, category: Optional[str] = None, top_k: int = 5) -> List[Dict]:
         """
-        Search for products using vector similarity
+        Search for products using vector similarity, fused with BM25 when hybrid search is on
         
         Args:
             query: Search query string
@@ -38,6 +72,9 @@ class ProductService:
         # Search in vector store
         results = self.vector_store.search(query, top_k=top_k * 2)  # Get more to filter
         
+        if self.hybrid_search:
+            results = self._fuse_with_lexical(query, results, top_k * 2)
+        
         # Filter by category if specified
         if category:
             category = category.lower()
@@ -46,17 +83,97 @@ class ProductService:
         # Return top_k results
         return results[:top_k]
     
+    def search_products_for_display(self, query: str, category: Optional[str] = None, top_k: int = 5) -> Dict:
+        """
+        Search results encoded for the frontend, served from the result cache
+        
+        Queries differing only in case or spacing share an entry, since they return
+        the same results.
+        
+        Returns:
+            Dictionary with count and products (pre-encoded JSON array of product cards)
+        """
+        def compute() -> Dict:
+            results = self.search_products(query, category=category, top_k=top_k)
+            return {"count": len(results), "products": self.payloads.cards(results)}
+        
+        key = (" ".join(query.lower().split()), (category or "").lower(), top_k)
+        return self.search_cache.get_or_compute(key, compute)
+    
+    def search_products_batch(self, queries: List[str], category: Optional[str] = None, top_k: int = 5) -> List[List[Dict]]:
+        """
+        Search for several queries in a single vector store call
+        
+        Args:
+            queries: Search query strings
+            category: Optional category filter applied to every query
+            top_k: Number of results to return per query
+        
+        Returns:
+            One list of product dictionaries per query, in query order
+        """
+        if not self.vector_store.initialized:
+            return [[] for _ in queries]
+        
+        batch_results = self.vector_store.search_batch(queries, top_k=top_k * 2)  # Get more to filter
+        
+        if self.hybrid_search:
+            batch_results = [
+                self._fuse_with_lexical(query, results, top_k * 2)
+                for query, results in zip(queries, batch_results)
+            ]
+        
+        if category:
+            category = category.lower()
+            batch_results = [
+                [p for p in results if p.get('category', '').lower() == category]
+                for results in batch_results
+            ]
+        
+        return [results[:top_k] for results in batch_results]
+    
+    def _fuse_with_lexical(self, query: str, vector_results: List[Dict], top_k: int) -> List[Dict]:
+        """Merge vector results with BM25 results into one ranking"""
+        lexical_results = self.vector_store.search_lexical(query, top_k=top_k)
+        if not lexical_results:
+            return vector_results
+        
+        candidates = {}
+        for product in lexical_results + vector_results:
+            candidates.setdefault(product.get('id'), product)
+        
+        fused = fuse_scores(
+            {p.get('id'): p.get('score', 0.0) for p in lexical_results},
+            {p.get('id'): p.get('score', 0.0) for p in vector_results}
+        )
+        
+        results = []
+        for product_id in sorted(fused, key=lambda pid: -fused[pid])[:top_k]:
+            product = candidates[product_id]
+            product['score'] = fused[product_id]
+            results.append(product)
+        
+        return results
+    
+    def suggest(self, prefix: str, limit: int = 8, kind: Optional[str] = None) -> Dict:
+        """Typeahead completions for partial part and model numbers (see SuggestIndex.suggest)"""
+        return self.suggest_index.suggest(prefix, limit=limit, kind=kind)
+    
+    def related_parts(self, part_id: str, limit: int = 3, exclude: Optional[List[str]] = None) -> List[Dict]:
+        """Parts sharing the most compatible models with a part (see CompatGraph.related_parts)"""
+        return self.compat_graph.related_parts(part_id, limit=limit, exclude=exclude)
+    
+    def parts_for_model(self, model_number: str, limit: int = 3, exclude: Optional[List[str]] = None) -> List[Dict]:
+        """Most reviewed parts compatible with a model (see CompatGraph.parts_for_model)"""
+        return self.compat_graph.parts_for_model(model_number, limit=limit, exclude=exclude)
+    
     def get_product_by_id(self, product_id: str) -> Optional[Dict]:
         """Get a specific product by ID"""
         return self.vector_store.get_by_id(product_id)
     
     def search_by_part_number(self, part_number: str) -> Optional[Dict]:
         """Search for a product by part number"""
-        part_number = part_number.upper()
-        for product in self.vector_store.metadata:
-            if product.get('id', '').upper() == part_number or product.get('part_number', '').upper() == part_number:
-                return product
-        return None
+        return self.vector_store.get_by_id(part_number)
     
     def check_compatibility(self, part_id: str, model_number: str) -> Tuple[bool, str]:
         """
@@ -80,6 +197,26 @@ class ProductService:
         
         return False, f"Part {part_id} is not compatible with {model_number}. Compatible models: {', '.join(compatible_models[:3])}"
     
+    def check_compatibility_for_display(self, part_id: str, model_number: str) -> Dict:
+        """
+        Compatibility verdict plus the formatted part, served from the result cache
+        
+        Returns:
+            Dictionary with compatible, message and part (pre-encoded card, None if the part is unknown)
+        """
+        part_id, model_number = part_id.strip().upper(), model_number.strip().upper()
+        
+        def compute() -> Dict:
+            is_compatible, message = self.check_compatibility(part_id, model_number)
+            product = self.search_by_part_number(part_id)
+            return {
+                "compatible": is_compatible,
+                "message": message,
+                "part": RawJSON(self.payloads.card(product)) if product else None
+            }
+        
+        return self.compatibility_cache.get_or_compute((part_id, model_number), compute)
+    
     def search_by_model(self, model_number: str) -> List[Dict]:
         """Find all parts compatible with a model"""
         results = self.vector_store.search_by_model(model_number)
@@ -131,43 +268,18 @@ class ProductService:
         """Format multiple products for chat display"""
         return [self.format_product_for_chat(p) for p in products]
     
-    def build_context_string(self, products: List[Dict]) -> str:
+    def build_context_string(self, products: List[Dict], max_tokens: Optional[int] = None) -> str:
         """
         Build a context string from products for passing to LLM
         
         Args:
             products: List of product dictionaries
+            max_tokens: Optional token budget; lowest-relevance products are dropped to fit
         
         Returns:
             Formatted context string for LLM
         """
-        if not products:
-            return "No products found."
-        
-        context_lines = ["Here are relevant products from our catalog:"]
-        
-        for i, product in enumerate(products, 1):
-            context_lines.append(f"\n{i}. {product.get('name', 'Unknown')}")
-            context_lines.append(f"   Part Number: {product.get('id')}")
-            context_lines.append(f"   Category: {product.get('category')}")
-            
-            if product.get('compatible_models'):
-                models = product.get('compatible_models')
-                if isinstance(models, list):
-                    models = ', '.join(models[:3])
-                context_lines.append(f"   Compatible with: {models}")
-            
-            if product.get('price'):
-                context_lines.append(f"   Price: {product.get('price')}")
-            
-            if product.get('description'):
-                desc = product.get('description')[:150] + "..." if len(product.get('description', '')) > 150 else product.get('description')
-                context_lines.append(f"   Description: {desc}")
-            
-            if product.get('in_stock') == False:
-                context_lines.append(f"   Status: OUT OF STOCK")
-        
-        return "\n".join(context_lines)
+        return self.context_builder.build_products_context(products, max_tokens=max_tokens)
 
 
 def create_product_service() -> ProductService:
@@ -0,0 +1,109 @@
+"""
+Result Cache Module
+LRU cache for catalog endpoint results, stamped with the vector store's catalog version
+Entries are never served across a catalog rebuild or upsert: a version change empties
+the cache, so no TTL is needed
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+from metrics import get_metrics_registry
+
+
+CACHE_REQUESTS = get_metrics_registry().counter(
+    "result_cache_requests_total", "Result cache lookups by outcome (hit/miss)", labelnames=("cache", "outcome")
+)
+CACHE_ENTRIES = get_metrics_registry().gauge(
+    "result_cache_entries", "Entries held by each result cache", labelnames=("cache",)
+)
+CACHE_INVALIDATIONS = get_metrics_registry().counter(
+    "result_cache_invalidations_total", "Result caches emptied because the catalog version changed", labelnames=("cache",)
+)
+
+
+class ResultCache:
+    """Thread-safe LRU cache invalidated whenever vector_store.version changes"""
+    
+    def __init__(self, name: str, vector_store, max_entries: int = 1024):
+        """
+        Initialize result cache
+        
+        Args:
+            name: Cache name used in metrics
+            vector_store: Vector store whose version stamps the entries
+            max_entries: Entries kept before the least recently used is evicted (0 disables caching)
+        """
+        self.name = name
+        self.vector_store = vector_store
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._catalog_version: Optional[int] = None
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _check_version(self) -> int:
+        """Drop every entry if the catalog has changed (caller holds the lock)"""
+        version = getattr(self.vector_store, 'version', None)
+        if version != self._catalog_version:
+            if self._entries:
+                CACHE_INVALIDATIONS.inc(cache=self.name)
+            self._entries.clear()
+            self._catalog_version = version
+            CACHE_ENTRIES.set(0, cache=self.name)
+        return version
+    
+    def get_or_compute(self, key: Hashable, compute: Callable[[], object]) -> object:
+        """
+        Return the cached value for key, computing and storing it on a miss
+        
+        compute runs outside the lock; concurrent misses for the same key may both
+        compute it. A value computed while the catalog changed is not stored.
+        """
+        with self._lock:
+            version = self._check_version()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                CACHE_REQUESTS.inc(cache=self.name, outcome="hit")
+                return self._entries[key]
+            self.misses += 1
+        CACHE_REQUESTS.inc(cache=self.name, outcome="miss")
+        
+        value = compute()
+        
+        if self.max_entries > 0:
+            with self._lock:
+                if self._check_version() == version:
+                    self._entries[key] = value
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                    CACHE_ENTRIES.set(len(self._entries), cache=self.name)
+        return value
+    
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            CACHE_ENTRIES.set(0, cache=self.name)
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "catalog_version": self._catalog_version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0
+            }
+
+
+def create_result_cache(name: str, vector_store) -> ResultCache:
+    """Factory function to create a result cache configured from environment"""
+    import os
+    enabled = os.environ.get("ENABLE_CACHE", "true").lower() == "true"
+    return ResultCache(name, vector_store, max_entries=int(os.environ.get("RESULT_CACHE_SIZE", 1024)) if enabled else 0)
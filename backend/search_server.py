@@ -0,0 +1,848 @@
+"""
+Search Server Module
+One process owns the vector store and serves it to every worker over a Unix socket
+Workers use RemoteVectorStore, a drop-in for VectorStore that keeps no catalog: the
+embeddings, vector and BM25 indexes, the product metadata and the catalog indexes
+(entity vocabulary, suggestions, compatibility graph) and their build time are paid
+once instead of once per gunicorn worker
+
+Protocol: length-prefixed binary frames, one request/response at a time per connection
+    request:  op (u8), top_k (u16), payload length (u32), payload
+    response: status (u8), catalog version (u32), payload length (u32), payload
+Results are catalog positions (u32) and scores (f32), followed for workers by the JSON
+of each product they name (encoded once per product and version), so a result never
+needs a second request or a local copy of the catalog. Concurrent searches are merged
+into one VectorStore.search_positions call per top_k. Each client keeps one WATCH request
+pending, which the server answers as soon as the catalog version changes, so version
+changes reach every worker without a round-trip on the request path.
+
+A replaced store is closed once the new one is served. Shard servers (sharded_store.py)
+take a catalog in two steps: STAGE builds it beside the served one, COMMIT swaps it in
+and answers with its version, so shard contents only change when the owner says so.
+
+Entity extraction, suggestions and related parts are answered by one copy of each index
+in the server (RemoteEntityExtractor, RemoteSuggestIndex, RemoteCompatGraph), so a
+worker's memory does not grow with the catalog; each costs a socket round-trip instead
+(tens of microseconds). The worker_memory benchmark suite measures the difference.
+
+Usage:
+    python search_server.py --socket /tmp/partselect-search.sock
+    python search_server.py --catalog catalog.json   # file written by VectorStore.save_to_file
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+from typing import Dict, List, Optional, Tuple
+from vector_store import CatalogChanged, VectorStore, create_vector_store, SEARCH_LATENCY, SEARCH_BATCH_SIZE
+from compat_graph import CompatGraph
+from entity_extractor import EntityExtractor, extract_part_number
+from suggest_index import SuggestIndex
+from product_payloads import dumps
+from metrics import get_metrics_registry
+
+
+DEFAULT_SOCKET_PATH = "/tmp/partselect-search.sock"
+
+REQUEST_HEADER = struct.Struct("!BHI")   # op, top_k, payload length
+RESPONSE_HEADER = struct.Struct("!BII")  # status, catalog version, payload length
+COUNT = struct.Struct("!I")
+STRING_LENGTH = struct.Struct("!H")
+
+OP_INFO = 0
+OP_SEARCH = 1
+OP_SEARCH_LEXICAL = 2
+OP_SEARCH_BY_MODEL = 3
+OP_GET_BY_ID = 4
+OP_METADATA = 5
+OP_UPSERT = 6
+OP_STATS = 7
+OP_WATCH = 8
+OP_SEARCH_PRODUCTS = 9
+OP_EXTRACT = 10
+OP_SUGGEST = 11
+OP_LOAD = 12
+OP_STAGE = 13
+OP_COMMIT = 14
+OP_PARTS_FOR_MODEL = 15
+OP_RELATED_PARTS = 16
+OP_COMPAT_GRAPH = 17
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+# Seconds the server holds a WATCH request open when the version does not change
+WATCH_TIMEOUT = 30.0
+
+# Seconds a client waits before watching again after the server could not be reached
+WATCH_RETRY_SECONDS = 1.0
+
+# Searches tried per batch when the store is replaced under them (closed, or its shards moved on)
+SEARCH_ATTEMPTS = 3
+
+# Seconds a search on a superseded catalog waits for the replacement to be served
+REPLACE_WAIT_SECONDS = 5.0
+
+REMOTE_REQUESTS = get_metrics_registry().counter(
+    "search_server_requests_total", "Requests sent to the shared search server, by outcome",
+    labelnames=("outcome",)
+)
+
+
+class SearchServerError(Exception):
+    """Raised when the search server answers a request with an error"""
+
+
+def pack_strings(strings: List[str]) -> bytes:
+    """Count-prefixed list of length-prefixed UTF-8 strings (each cut to 65535 bytes)"""
+    parts = [COUNT.pack(len(strings))]
+    for text in strings:
+        data = text.encode("utf-8")[:0xFFFF]
+        parts.append(STRING_LENGTH.pack(len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def unpack_strings(payload: bytes) -> List[str]:
+    """Inverse of pack_strings"""
+    (count,), offset = COUNT.unpack_from(payload), COUNT.size
+    strings = []
+    for _ in range(count):
+        (length,) = STRING_LENGTH.unpack_from(payload, offset)
+        offset += STRING_LENGTH.size
+        strings.append(payload[offset:offset + length].decode("utf-8", errors="ignore"))
+        offset += length
+    return strings
+
+
+def pack_hits(all_positions: List[List[int]], all_scores: List[List[float]]) -> bytes:
+    """Per query: hit count, then every position, then every score"""
+    parts = []
+    for positions, scores in zip(all_positions, all_scores):
+        n = len(positions)
+        parts.append(COUNT.pack(n))
+        parts.append(struct.pack(f"!{n}I{n}f", *positions, *scores))
+    return b"".join(parts)
+
+
+def unpack_hits(payload: bytes, queries: int) -> List[List[Tuple[int, float]]]:
+    """Inverse of pack_hits: (position, score) pairs per query"""
+    results, offset = [], 0
+    for _ in range(queries):
+        (n,) = COUNT.unpack_from(payload, offset)
+        offset += COUNT.size
+        values = struct.unpack_from(f"!{n}I{n}f", payload, offset)
+        offset += 8 * n
+        results.append(list(zip(values[:n], values[n:])))
+    return results
+
+
+def unpack_products(payload: bytes, queries: int) -> List[List[Tuple[Dict, float]]]:
+    """(product, score) pairs per query from a hits frame followed by the products it names"""
+    (length,) = COUNT.unpack_from(payload)
+    hits = unpack_hits(payload[COUNT.size:COUNT.size + length], queries)
+    products = json.loads(payload[COUNT.size + length:])
+    # Products come once each, in order of first appearance
+    by_position: Dict[int, Dict] = {}
+    for query_hits in hits:
+        for position, _ in query_hits:
+            if position not in by_position:
+                by_position[position] = products[len(by_position)]
+    return [[(by_position[position], score) for position, score in query_hits] for query_hits in hits]
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    """Read exactly size bytes"""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if not n:
+            raise ConnectionError("Search server closed the connection")
+        received += n
+    return bytes(buffer)
+
+
+# ============================================================================
+# SERVER
+# ============================================================================
+
+class _PendingSearch:
+    """One request's queries waiting for a merged search"""
+    
+    def __init__(self, queries: List[str]):
+        self.queries = queries
+        self.positions: List[List[int]] = []
+        self.scores: List[List[float]] = []
+        self.store: Optional[VectorStore] = None  # Store the positions refer to
+        self.version = 0
+        self.lead = False  # This request runs the batch that contains it
+        self.done = False
+        self.wake = threading.Event()  # Set when done, or when made lead
+
+
+class _ServedCatalog:
+    """Version and metadata of whichever store is being served, for the catalog indexes"""
+    
+    def __init__(self, service: "SearchService"):
+        self.service = service
+    
+    @property
+    def version(self) -> int:
+        return self.service.store.version
+    
+    @property
+    def metadata(self) -> List[Dict]:
+        return self.service.store.metadata
+
+
+class SearchService:
+    """Executes protocol requests against the vector store"""
+    
+    def __init__(self, store: VectorStore, max_batch_queries: int = 256):
+        """
+        Initialize search service
+        
+        Args:
+            store: Initialized vector store to serve
+            max_batch_queries: Queries merged into one index call at most
+        """
+        self.store = store
+        self.max_batch_queries = max_batch_queries
+        self.requests = 0
+        self.batches = 0
+        self.batched_queries = 0
+        self._pending: Dict[int, List[_PendingSearch]] = {}  # top_k -> waiting requests
+        self._running = set()  # top_k values with a batch in progress
+        self._metadata: Tuple[Optional[int], bytes] = (None, b"")
+        self._products: Tuple[Optional[int], Dict[int, bytes]] = (None, {})  # position -> product JSON
+        self._staged: Optional[VectorStore] = None  # Built by STAGE, served after COMMIT
+        self._lock = threading.Lock()
+        self._upsert_lock = threading.Lock()  # Serializes rebuilds; searches keep running
+        self._store_changed = threading.Condition()  # Wakes WATCH requests
+        # Catalog indexes shared by every worker, each rebuilt on first use after a catalog change
+        catalog = _ServedCatalog(self)
+        self.entity_extractor = EntityExtractor(catalog)
+        self.suggest_index = SuggestIndex(catalog)
+        self.compat_graph = CompatGraph(catalog)
+    
+    def handle(self, op: int, top_k: int, payload: bytes) -> Tuple[int, bytes]:
+        """
+        Execute one request
+        
+        Returns:
+            Tuple of (catalog version the answer refers to, response payload)
+        """
+        with self._lock:
+            self.requests += 1
+        
+        if op == OP_SEARCH:
+            request = self._search(unpack_strings(payload), top_k)
+            return request.version, pack_hits(request.positions, request.scores)
+        if op == OP_SEARCH_PRODUCTS:
+            request = self._search(unpack_strings(payload), top_k)
+            return request.version, self._with_products(request.store, request.positions, request.scores)
+        
+        store = self.store  # Replaced, not mutated, by upserts
+        if op == OP_INFO:
+            return store.version, COUNT.pack(len(store.metadata) if store.initialized else 0)
+        if op == OP_SEARCH_LEXICAL:
+            (query,) = unpack_strings(payload)
+            hits = store.lexical_index.search(query, top_k=top_k) if store.initialized else []
+            return store.version, self._with_products(store, [[i for i, _ in hits]], [[s for _, s in hits]])
+        if op == OP_SEARCH_BY_MODEL:
+            (model_number,) = unpack_strings(payload)
+            positions = store.model_positions(model_number)
+            return store.version, self._with_products(store, [positions], [[0.0] * len(positions)])
+        if op == OP_GET_BY_ID:
+            (product_id,) = unpack_strings(payload)
+            position = store.id_index.get(product_id.upper())
+            positions = [] if position is None else [position]
+            return store.version, self._with_products(store, [positions], [[0.0] * len(positions)])
+        if op == OP_EXTRACT:
+            (text,) = unpack_strings(payload)
+            return store.version, dumps(self.entity_extractor.extract(text))
+        if op == OP_SUGGEST:
+            prefix, kind = unpack_strings(payload)
+            return store.version, dumps(self.suggest_index.suggest(prefix, limit=top_k, kind=kind or None))
+        if op == OP_PARTS_FOR_MODEL:
+            model_number, *exclude = unpack_strings(payload)
+            return store.version, dumps(self.compat_graph.parts_for_model(model_number, limit=top_k, exclude=exclude))
+        if op == OP_RELATED_PARTS:
+            part_id, *exclude = unpack_strings(payload)
+            return store.version, dumps(self.compat_graph.related_parts(part_id, limit=top_k, exclude=exclude))
+        if op == OP_COMPAT_GRAPH:
+            return store.version, dumps(self.compat_graph.refresh())
+        if op == OP_METADATA:
+            return store.version, self._metadata_json(store)
+        if op == OP_UPSERT:
+            self.upsert(json.loads(payload))
+            return self.store.version, b""
+        if op == OP_LOAD:
+            self.load(json.loads(payload))
+            return self.store.version, b""
+        if op == OP_STAGE:
+            self.stage(json.loads(payload))
+            return store.version, b""
+        if op == OP_COMMIT:
+            return self.commit(), b""
+        if op == OP_STATS:
+            return store.version, dumps(self.stats())
+        if op == OP_WATCH:
+            (known_version,) = COUNT.unpack(payload)
+            return self.watch(known_version), b""
+        raise ValueError(f"Unknown op {op}")
+    
+    def _metadata_json(self, store: VectorStore) -> bytes:
+        """Catalog metadata encoded once per version"""
+        version, data = self._metadata
+        if version != store.version:
+            data = dumps(store.metadata)
+            self._metadata = (store.version, data)
+        return data
+    
+    def _product_json(self, store: VectorStore, position: int) -> bytes:
+        """One product's JSON, encoded once per catalog version"""
+        version, encoded = self._products
+        if version != store.version:
+            encoded = {}
+            self._products = (store.version, encoded)
+        data = encoded.get(position)
+        if data is None:
+            data = encoded[position] = dumps(store.metadata[position])
+        return data
+    
+    def _with_products(self, store: VectorStore, all_positions: List[List[int]], all_scores: List[List[float]]) -> bytes:
+        """Hits frame (length-prefixed) followed by a JSON array of the products it names (see unpack_products)"""
+        hits = pack_hits(all_positions, all_scores)
+        positions = dict.fromkeys(p for query_positions in all_positions for p in query_positions)
+        products = b"[" + b",".join(self._product_json(store, p) for p in positions) + b"]"
+        return COUNT.pack(len(hits)) + hits + products
+    
+    def search(self, queries: List[str], top_k: int) -> Tuple[int, List[List[int]], List[List[float]]]:
+        """
+        Vector search, merged with concurrent requests for the same top_k
+        
+        A request arriving while no batch for its top_k is running searches at once;
+        requests arriving meanwhile queue up and go together in the next batch, run by
+        the first of them. Nothing waits on a timer, so a lone request pays no delay.
+        
+        Returns:
+            Tuple of (catalog version, positions, scores)
+        """
+        request = self._search(queries, top_k)
+        return request.version, request.positions, request.scores
+    
+    def _search(self, queries: List[str], top_k: int) -> _PendingSearch:
+        """Run search and return the finished request, which also names the store searched"""
+        request = _PendingSearch(queries)
+        with self._lock:
+            self._pending.setdefault(top_k, []).append(request)
+            request.lead = top_k not in self._running
+            self._running.add(top_k)
+        
+        if not request.lead:
+            request.wake.wait()
+        if not request.done:
+            self._run_batch(top_k)
+        return request
+    
+    def _run_batch(self, top_k: int) -> None:
+        """Search the queued requests for top_k (the lead is first), then make the next waiter lead"""
+        with self._lock:
+            pending = self._pending[top_k]
+            batch, size = [], 0
+            while pending and (not batch or size + len(pending[0].queries) <= self.max_batch_queries):
+                size += len(pending[0].queries)
+                batch.append(pending.pop(0))
+        
+        store = self.store
+        queries = [q for request in batch for q in request.queries]
+        for attempt in range(SEARCH_ATTEMPTS):
+            try:
+                with SEARCH_LATENCY.time(index="vector"):
+                    positions, scores = store.search_positions(queries, top_k) if store.initialized else ([[]] * len(queries), [[]] * len(queries))
+                SEARCH_BATCH_SIZE.observe(len(queries))
+                break
+            except Exception as e:
+                # A store replaced mid-search is closed, and its shards may already serve the
+                # next catalog: search again on the store that replaced it
+                replaced = self._wait_for_replacement(store) if isinstance(e, CatalogChanged) else self.store is not store
+                if not replaced or attempt == SEARCH_ATTEMPTS - 1:
+                    print(f"Search batch failed: {str(e)}")
+                    positions, scores = [[]] * len(queries), [[]] * len(queries)
+                    break
+                store = self.store
+        
+        offset = 0
+        for request in batch:
+            n = len(request.queries)
+            request.positions, request.scores = positions[offset:offset + n], scores[offset:offset + n]
+            request.store, request.version = store, store.version
+            offset += n
+        
+        with self._lock:
+            self.batches += 1
+            self.batched_queries += len(queries)
+            if self._pending[top_k]:
+                successor = self._pending[top_k][0]
+                successor.lead = True
+            else:
+                successor = None
+                self._running.discard(top_k)
+        
+        for request in batch:
+            request.done = True
+            request.wake.set()
+        if successor:
+            successor.wake.set()
+    
+    def upsert(self, products: List[Dict]) -> None:
+        """
+        Add or replace products
+        
+        The index is rebuilt in a new store that replaces the served one when ready, so
+        searches keep running against the previous catalog version meanwhile.
+        """
+        with self._upsert_lock:
+            current = self.store
+            updated = current.empty_copy()  # Keeps the store class, e.g. its shards
+            try:
+                updated.metadata = list(current.metadata)
+                updated.upsert_products(products)
+            except Exception:
+                _close_store(updated)
+                raise
+            self._replace_store(updated)
+    
+    def load(self, products: List[Dict]) -> None:
+        """Replace the whole catalog"""
+        with self._upsert_lock:
+            self._replace_store(self._build(products))
+    
+    def stage(self, products: List[Dict]) -> None:
+        """Build a replacement catalog while the current one keeps being served (see commit)"""
+        with self._upsert_lock:
+            staged = self._build(products)
+            previous, self._staged = self._staged, staged
+        if previous is not None:
+            _close_store(previous)
+    
+    def commit(self) -> int:
+        """Serve the staged catalog and return its version"""
+        with self._upsert_lock:
+            if self._staged is None:
+                raise ValueError("No catalog staged")
+            staged, self._staged = self._staged, None
+            self._replace_store(staged)
+            return staged.version
+    
+    def _build(self, products: List[Dict]) -> VectorStore:
+        """New store of the served store's class holding products (caller holds the upsert lock)"""
+        updated = self.store.empty_copy()
+        try:
+            updated.initialize_from_products(products)
+        except Exception:
+            _close_store(updated)
+            raise
+        return updated
+    
+    def _replace_store(self, store: VectorStore) -> None:
+        """Serve a rebuilt store, wake the clients watching for a new version, then close the old store"""
+        with self._store_changed:
+            previous, self.store = self.store, store
+            self._store_changed.notify_all()
+        if previous is not store:
+            _close_store(previous)
+    
+    def _wait_for_replacement(self, store: VectorStore) -> bool:
+        """Wait until store is no longer the served one; False if that took too long"""
+        with self._store_changed:
+            return self._store_changed.wait_for(lambda: self.store is not store, timeout=REPLACE_WAIT_SECONDS)
+    
+    def watch(self, known_version: int, timeout: float = WATCH_TIMEOUT) -> int:
+        """Wait until the catalog version differs from known_version (or timeout), then return it"""
+        with self._store_changed:
+            self._store_changed.wait_for(lambda: self.store.version != known_version, timeout=timeout)
+            return self.store.version
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "products": len(self.store.metadata),
+                "catalog_version": self.store.version,
+                "requests": self.requests,
+                "product_json_cached": len(self._products[1]),
+                "search_batches": self.batches,
+                "mean_queries_per_batch": round(self.batched_queries / self.batches, 2) if self.batches else 0.0
+            }
+
+
+def _close_store(store: VectorStore) -> None:
+    """Release what a store holds beyond memory (search threads, shard connections), if anything"""
+    close = getattr(store, "close", None)
+    if close:
+        close()
+
+
+class SearchUnixServer(socketserver.ThreadingUnixStreamServer):
+    """Threaded Unix socket server with room for every worker thread to connect at once"""
+    
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class SearchRequestHandler(socketserver.StreamRequestHandler):
+    """Serves requests from one persistent client connection"""
+    
+    service: SearchService = None
+    
+    def handle(self):
+        while True:
+            header = self.rfile.read(REQUEST_HEADER.size)
+            if len(header) < REQUEST_HEADER.size:
+                return
+            op, top_k, length = REQUEST_HEADER.unpack(header)
+            payload = self.rfile.read(length)
+            
+            try:
+                version, body = self.service.handle(op, top_k, payload)
+                status = STATUS_OK
+            except Exception as e:
+                version, body, status = self.service.store.version, str(e).encode("utf-8"), STATUS_ERROR
+            self.wfile.write(RESPONSE_HEADER.pack(status, version, len(body)) + body)
+
+
+def create_search_server(store: VectorStore, socket_path: str = DEFAULT_SOCKET_PATH,
+                         max_batch_queries: int = 256) -> SearchUnixServer:
+    """Create (but do not start) a search server; a stale socket file is replaced"""
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    service = SearchService(store, max_batch_queries=max_batch_queries)
+    handler = type("ConfiguredSearchRequestHandler", (SearchRequestHandler,), {"service": service})
+    return SearchUnixServer(socket_path, handler)
+
+
+def start_search_server_in_thread(store: VectorStore, socket_path: str = DEFAULT_SOCKET_PATH) -> SearchUnixServer:
+    """Start a search server on a background thread and return it"""
+    server = create_search_server(store, socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+# ============================================================================
+# CLIENT
+# ============================================================================
+
+class RemoteVectorStore:
+    """VectorStore stand-in that forwards searches to a SearchService over a Unix socket"""
+    
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout: float = 5.0, rebuild_timeout: float = 300.0,
+                 watch: bool = True):
+        """
+        Connect to a search server
+        
+        Args:
+            socket_path: Server socket
+            timeout: Socket timeout per request in seconds
+            rebuild_timeout: Socket timeout for load, stage and upsert, which rebuild the index
+            watch: Keep a WATCH request pending to follow catalog changes made by others
+                (shard owners, which make every change themselves, pass False)
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.rebuild_timeout = rebuild_timeout
+        self.initialized = False
+        self._version = 0
+        self._connections: List[socket.socket] = []  # Idle connections, one per concurrent caller at most
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        
+        self._refresh_initialized()
+        self._watcher = None
+        if watch:
+            self._watcher = threading.Thread(target=self._watch_version, daemon=True, name="search-version-watch")
+            self._watcher.start()
+    
+    # ------------------------------------------------------------------ transport
+    
+    def _acquire(self) -> socket.socket:
+        with self._lock:
+            if self._connections:
+                return self._connections.pop()
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.settimeout(self.timeout)
+        conn.connect(self.socket_path)
+        return conn
+    
+    def _release(self, conn: socket.socket) -> None:
+        with self._lock:
+            if not self._closed.is_set():
+                self._connections.append(conn)
+                return
+        conn.close()
+    
+    def _call(self, op: int, payload: bytes = b"", top_k: int = 0, timeout: Optional[float] = None) -> Tuple[int, bytes]:
+        """
+        Send one request and wait for its response
+        
+        A failed connect or broken connection (server restart) is retried once on a
+        new connection; every request is safe to repeat.
+        
+        Returns:
+            Tuple of (catalog version, response payload)
+        """
+        frame = REQUEST_HEADER.pack(op, min(top_k, 0xFFFF), len(payload)) + payload
+        for attempt in range(2):
+            conn = None
+            try:
+                conn = self._acquire()
+                if timeout:
+                    conn.settimeout(timeout)
+                conn.sendall(frame)
+                status, version, length = RESPONSE_HEADER.unpack(_recv_exact(conn, RESPONSE_HEADER.size))
+                body = _recv_exact(conn, length)
+                if timeout:
+                    conn.settimeout(self.timeout)
+            except OSError:
+                if conn:
+                    conn.close()
+                if attempt:
+                    REMOTE_REQUESTS.inc(outcome="error")
+                    raise
+                continue
+            self._release(conn)
+            break
+        
+        if status != STATUS_OK:
+            REMOTE_REQUESTS.inc(outcome="error")
+            raise SearchServerError(body.decode("utf-8", errors="replace"))
+        REMOTE_REQUESTS.inc(outcome="ok")
+        self._version = version
+        return version, body
+    
+    def _watch_version(self) -> None:
+        """Keep a WATCH request pending so catalog version changes are pushed to this client"""
+        while not self._closed.is_set():
+            try:
+                version = self._version
+                if self._call(OP_WATCH, COUNT.pack(version), timeout=WATCH_TIMEOUT + self.timeout)[0] != version:
+                    self._refresh_initialized()
+            except (OSError, SearchServerError):
+                self._closed.wait(WATCH_RETRY_SECONDS)
+    
+    def _refresh_initialized(self) -> None:
+        """Ask the server whether it holds a catalog"""
+        _, payload = self._call(OP_INFO)
+        self.initialized = COUNT.unpack(payload)[0] > 0
+    
+    # ------------------------------------------------------------------ VectorStore interface
+    
+    @property
+    def version(self) -> int:
+        """Latest catalog version seen, kept current by the watch thread (no request made)"""
+        return self._version
+    
+    @property
+    def metadata(self) -> List[Dict]:
+        """
+        The whole catalog, fetched on every access
+        
+        Nothing on the request path reads it: results arrive with their products, and the
+        catalog indexes are queried on the server (see RemoteEntityExtractor and friends).
+        """
+        _, body = self._call(OP_METADATA)
+        return json.loads(body)
+    
+    def search(self, query: str, top_k: int = 5) -> List[Dict]:
+        """Vector search (see VectorStore.search)"""
+        return self.search_batch([query], top_k=top_k)[0]
+    
+    def search_batch(self, queries: List[str], top_k: int = 5) -> List[List[Dict]]:
+        """Vector search for several queries in one request (see VectorStore.search_batch)"""
+        if not self.initialized or not queries:
+            return [[] for _ in queries]
+        
+        with SEARCH_LATENCY.time(index="remote"):
+            _, body = self._call(OP_SEARCH_PRODUCTS, pack_strings(queries), top_k)
+        return [
+            [dict(product, score=score) for product, score in hits]
+            for hits in unpack_products(body, len(queries))
+        ]
+    
+    def search_lexical(self, query: str, top_k: int = 5) -> List[Dict]:
+        """BM25 search (see VectorStore.search_lexical)"""
+        if not self.initialized:
+            return []
+        
+        _, body = self._call(OP_SEARCH_LEXICAL, pack_strings([query]), top_k)
+        return [dict(product, score=score) for product, score in unpack_products(body, 1)[0]]
+    
+    def get_by_id(self, product_id: str) -> Optional[Dict]:
+        """Get product by ID or part number (case-insensitive)"""
+        _, body = self._call(OP_GET_BY_ID, pack_strings([str(product_id or '')]))
+        hits = unpack_products(body, 1)[0]
+        return hits[0][0] if hits else None
+    
+    def search_by_model(self, model_number: str) -> List[Dict]:
+        """Search for products compatible with a specific model"""
+        _, body = self._call(OP_SEARCH_BY_MODEL, pack_strings([model_number]))
+        return [product for product, _ in unpack_products(body, 1)[0]]
+    
+    def search_positions(self, queries: List[str], top_k: int) -> Tuple[List[List[int]], List[List[float]]]:
+        """Vector search returning positions in the server's catalog (see VectorStore.search_positions)"""
+        _, positions, scores = self.search_positions_versioned(queries, top_k)
+        return positions, scores
+    
+    def search_positions_versioned(self, queries: List[str], top_k: int) -> Tuple[int, List[List[int]], List[List[float]]]:
+        """
+        search_positions, with the catalog version the positions refer to
+        
+        Returns:
+            Tuple of (catalog version, positions, scores)
+        """
+        version, body = self._call(OP_SEARCH, pack_strings(queries), top_k)
+        hits = unpack_hits(body, len(queries))
+        return version, [[i for i, _ in h] for h in hits], [[score for _, score in h] for h in hits]
+    
+    def upsert_products(self, products: List[Dict]) -> None:
+        """Add or replace products on the server; every worker sees the new version"""
+        self._call(OP_UPSERT, dumps(products), timeout=self.rebuild_timeout)
+        self.initialized = True
+    
+    def load_products(self, products: List[Dict]) -> None:
+        """Replace the server's whole catalog"""
+        self._call(OP_LOAD, dumps(products), timeout=self.rebuild_timeout)
+        self.initialized = True
+    
+    def stage_products(self, products: List[Dict]) -> None:
+        """Build a replacement catalog on the server without serving it yet"""
+        self._call(OP_STAGE, dumps(products), timeout=self.rebuild_timeout)
+    
+    def commit_products(self) -> int:
+        """Serve the staged catalog and return its version"""
+        version, _ = self._call(OP_COMMIT)
+        return version
+    
+    def stats(self) -> Dict:
+        """Server-side counters plus this client's connection pool"""
+        _, body = self._call(OP_STATS)
+        with self._lock:
+            idle = len(self._connections)
+        return {"socket": self.socket_path, "idle_connections": idle, **json.loads(body)}
+    
+    def close(self) -> None:
+        """Stop watching the version and close idle connections"""
+        self._closed.set()
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+
+
+class RemoteEntityExtractor:
+    """EntityExtractor stand-in answered by the search server's copy of the model vocabulary"""
+    
+    def __init__(self, remote: RemoteVectorStore):
+        self.remote = remote
+    
+    def extract(self, text: str) -> Dict[str, List[str]]:
+        """Every part and model number in a message (see EntityExtractor.extract)"""
+        _, body = self.remote._call(OP_EXTRACT, pack_strings([text or ""]))
+        return json.loads(body)
+    
+    def extract_part_number(self, text: str) -> Optional[str]:
+        """First part number in text (no catalog needed, so no request)"""
+        return extract_part_number(text)
+    
+    def extract_model_number(self, text: str) -> Optional[str]:
+        """First model number in text, preferring catalog spellings"""
+        model_numbers = self.extract(text)["model_numbers"]
+        return model_numbers[0] if model_numbers else None
+
+
+class RemoteSuggestIndex:
+    """SuggestIndex stand-in answered by the search server"""
+    
+    def __init__(self, remote: RemoteVectorStore):
+        self.remote = remote
+    
+    def suggest(self, prefix: str, limit: int = 8, kind: Optional[str] = None) -> Dict:
+        """Complete a partial part or model number (see SuggestIndex.suggest)"""
+        _, body = self.remote._call(OP_SUGGEST, pack_strings([prefix or "", kind or ""]), top_k=limit)
+        return json.loads(body)
+
+
+class RemoteCompatGraph:
+    """CompatGraph stand-in answered by the search server"""
+    
+    def __init__(self, remote: RemoteVectorStore):
+        self.remote = remote
+    
+    def refresh(self) -> Dict:
+        """Have the server build the graph now, and return its stats"""
+        _, body = self.remote._call(OP_COMPAT_GRAPH, timeout=self.remote.rebuild_timeout)
+        return json.loads(body)
+    
+    def stats(self) -> Dict:
+        return self.refresh()
+    
+    def parts_for_model(self, model_number: str, limit: int = 3, exclude: Optional[List[str]] = None) -> List[Dict]:
+        """Parts compatible with a model, most reviewed first (see CompatGraph.parts_for_model)"""
+        payload = pack_strings([model_number or "", *(str(e) for e in exclude or [])])
+        _, body = self.remote._call(OP_PARTS_FOR_MODEL, payload, top_k=limit)
+        return json.loads(body)
+    
+    def related_parts(self, part_id: str, limit: int = 3, exclude: Optional[List[str]] = None) -> List[Dict]:
+        """Parts sharing the most models with a part (see CompatGraph.related_parts)"""
+        payload = pack_strings([str(part_id or ""), *(str(e) for e in exclude or [])])
+        _, body = self.remote._call(OP_RELATED_PARTS, payload, top_k=limit)
+        return json.loads(body)
+
+
+def create_remote_vector_store() -> Optional[RemoteVectorStore]:
+    """Factory function to connect to the search server named by SEARCH_SOCKET (None if unset)"""
+    socket_path = os.environ.get("SEARCH_SOCKET")
+    if not socket_path:
+        return None
+    return RemoteVectorStore(
+        socket_path,
+        timeout=float(os.environ.get("SEARCH_TIMEOUT", 5.0))
+    )
+
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Shared vector search server for backend workers")
+    parser.add_argument("--socket", default=os.environ.get("SEARCH_SOCKET", DEFAULT_SOCKET_PATH))
+    parser.add_argument("--catalog", default=None, help="Catalog JSON written by VectorStore.save_to_file (default: sample products)")
+    parser.add_argument("--max-batch-queries", type=int, default=256, help="Queries merged into one index call at most")
+    args = parser.parse_args()
+    
+    store = create_vector_store()
+    if args.catalog:
+        store.load_from_file(args.catalog)
+    else:
+        from sample_products import get_sample_products
+        store.initialize_from_products(get_sample_products())
+    
+    server = create_search_server(store, args.socket, max_batch_queries=args.max_batch_queries)
+    print(f"Search server listening on {args.socket}")
+    print(f"Set SEARCH_SOCKET={args.socket} for the backend workers to use it")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
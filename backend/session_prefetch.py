@@ -0,0 +1,192 @@
+"""
+Session Prefetch Module
+Background prefetch of the parts compatible with a session's appliance model
+Once a model number is known most follow-up turns are about it, so its compatible
+parts are collected (and their context snippets rendered) off the request path as
+soon as the model is extracted; later turns read that set instead of scanning the
+catalog again, and search results are boosted towards (or restricted to) it
+"""
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+from entity_extractor import normalize_model
+from metrics import get_metrics_registry
+
+
+PREFETCH_MODES = ("boost", "restrict", "off")
+
+PREFETCH_LOOKUPS = get_metrics_registry().counter(
+    "chat_prefetch_lookups_total",
+    "Retrievals that consulted the session prefetch, by outcome (hit/pending/truncated/miss)",
+    labelnames=("outcome",)
+)
+PREFETCH_LATENCY = get_metrics_registry().histogram(
+    "chat_prefetch_seconds", "Latency of background model prefetches"
+)
+
+
+class ModelPrefetch:
+    """Compatible parts for one session's model (replaced when the model or catalog changes)"""
+    
+    def __init__(self, model_number: str, catalog_version: Optional[int], future: Future):
+        self.model_number = model_number
+        self.catalog_version = catalog_version
+        self.future = future  # Resolves to {"parts": [...], "ids": frozenset of upper-cased part ids, "complete": bool}
+    
+    def matches(self, model_number: Optional[str], catalog_version: Optional[int]) -> bool:
+        """Whether this prefetch covers the model for the current catalog"""
+        return (model_number is not None and catalog_version == self.catalog_version
+                and normalize_model(model_number) == normalize_model(self.model_number))
+    
+    def ready(self) -> bool:
+        """Finished without error"""
+        return self.future.done() and not self.future.cancelled() and self.future.exception() is None
+    
+    def cancel(self) -> None:
+        """Drop a prefetch that has not started yet"""
+        self.future.cancel()
+    
+    def stats(self) -> Dict:
+        return {
+            "model_number": self.model_number,
+            "ready": self.ready(),
+            "parts": len(self.future.result()["parts"]) if self.ready() else None
+        }
+
+
+class SessionPrefetcher:
+    """Starts model prefetches and applies them to retrieval"""
+    
+    def __init__(self, product_service, mode: str = "boost", max_parts: int = 200, max_snippets: int = 50,
+                 workers: int = 2):
+        """
+        Initialize session prefetcher
+        
+        Args:
+            product_service: Product service whose catalog and context builder are used
+            mode: 'boost' (compatible parts first), 'restrict' (only compatible parts, unless
+                none match) or 'off' (no prefetching)
+            max_parts: Compatible parts kept per session; models with more parts are
+                still looked up in full by model_parts
+            max_snippets: Parts whose context snippets are rendered ahead of time
+            workers: Background prefetch threads
+        """
+        if mode not in PREFETCH_MODES:
+            raise ValueError(f"Unknown prefetch mode '{mode}'. Use one of: {', '.join(PREFETCH_MODES)}")
+        self.products = product_service
+        self.mode = mode
+        self.max_parts = max_parts
+        self.max_snippets = max_snippets
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch") if mode != "off" else None
+    
+    def _catalog_version(self) -> Optional[int]:
+        return getattr(self.products.vector_store, 'version', None)
+    
+    def start(self, model_number: str, current: Optional[ModelPrefetch] = None) -> Optional[ModelPrefetch]:
+        """
+        Prefetch a model's compatible parts in the background
+        
+        Args:
+            model_number: Model just extracted for the session
+            current: The session's existing prefetch, kept if it still covers the model
+        
+        Returns:
+            The prefetch to store on the session (None when prefetching is off)
+        """
+        if self._executor is None:
+            return None
+        
+        version = self._catalog_version()
+        if current is not None:
+            if current.matches(model_number, version) and not current.future.cancelled():
+                return current
+            current.cancel()
+        return ModelPrefetch(model_number, version, self._executor.submit(self._compute, model_number))
+    
+    def _compute(self, model_number: str) -> Dict:
+        """Collect the compatible parts and warm the context builder's snippet cache"""
+        start = time.perf_counter()
+        found = self.products.search_by_model(model_number)
+        parts = found[:self.max_parts]
+        builder = self.products.context_builder
+        for product in parts[:self.max_snippets]:
+            builder.get_snippet(product)
+        PREFETCH_LATENCY.observe(time.perf_counter() - start)
+        return {
+            "parts": parts,
+            "ids": frozenset(str(p.get('id', '')).upper() for p in parts),
+            "complete": len(found) <= self.max_parts
+        }
+    
+    def _usable(self, prefetch: Optional[ModelPrefetch], model_number: Optional[str] = None) -> bool:
+        """Prefetch present and built for the current catalog (and for model_number, if given)"""
+        if prefetch is None or self._executor is None:
+            return False
+        return prefetch.matches(model_number or prefetch.model_number, self._catalog_version())
+    
+    def model_parts(self, model_number: str, prefetch: Optional[ModelPrefetch]) -> Optional[List[Dict]]:
+        """
+        Compatible parts for a model from the session prefetch (never waits)
+        
+        Returns:
+            Product dictionaries, or None when the caller should search the catalog itself:
+            no prefetch for the model, one still running, or one cut at max_parts
+        """
+        if self._executor is None:
+            return None
+        if not self._usable(prefetch, model_number):
+            PREFETCH_LOOKUPS.inc(outcome="miss")
+            return None
+        if not prefetch.ready():
+            PREFETCH_LOOKUPS.inc(outcome="pending")
+            return None
+        result = prefetch.future.result()
+        if not result["complete"]:
+            PREFETCH_LOOKUPS.inc(outcome="truncated")
+            return None
+        PREFETCH_LOOKUPS.inc(outcome="hit")
+        return list(result["parts"])
+    
+    def boosting(self, prefetch: Optional[ModelPrefetch]) -> bool:
+        """Whether search results will be re-ranked against a finished prefetch (never waits)"""
+        return self._usable(prefetch) and prefetch.ready()
+    
+    def rank(self, products: List[Dict], prefetch: Optional[ModelPrefetch], top_k: Optional[int] = None) -> List[Dict]:
+        """
+        Boost or restrict search results against the session's compatible parts
+        
+        Args:
+            products: Results, best first
+            prefetch: The session's prefetch (results are returned as they are until it is ready)
+            top_k: Results to keep after re-ranking
+        
+        Returns:
+            Compatible parts first, otherwise in their original order (boost), or only the
+            compatible parts when any are present (restrict)
+        """
+        if not self.boosting(prefetch):
+            return products[:top_k]
+        
+        ids = prefetch.future.result()["ids"]
+        compatible = [p for p in products if str(p.get('id', '')).upper() in ids]
+        PREFETCH_LOOKUPS.inc(outcome="hit" if compatible else "miss")
+        if self.mode == "restrict":
+            ranked = compatible or products
+        else:
+            ranked = compatible + [p for p in products if str(p.get('id', '')).upper() not in ids]
+        return ranked[:top_k]
+    
+    def stats(self) -> Dict:
+        return {"mode": self.mode, "max_parts": self.max_parts, "max_snippets": self.max_snippets}
+
+
+def create_session_prefetcher(product_service) -> SessionPrefetcher:
+    """Factory function to create a session prefetcher from environment"""
+    import os
+    return SessionPrefetcher(
+        product_service,
+        mode=os.environ.get("SESSION_PREFETCH", "boost").lower(),
+        max_parts=int(os.environ.get("SESSION_PREFETCH_MAX_PARTS", 200)),
+        max_snippets=int(os.environ.get("SESSION_PREFETCH_SNIPPETS", 50))
+    )
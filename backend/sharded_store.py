@@ -0,0 +1,262 @@
+"""
+Sharded Store Module
+Vector store partitioned into shards that are searched in parallel (scatter-gather)
+Each shard returns its own top-k, and the sorted per-shard lists are merged with a heap
+Shards are in-process indexes searched on a thread pool (numpy BLAS and FAISS release
+the GIL) or search server processes reached over Unix sockets (see search_server.py)
+
+Remote shards are shared by the served store and the one being built to replace it.
+A rebuild stages every shard's new partition while the old one is still searched, then
+commits them all; the new store records the version each shard committed, and a search
+that meets a shard serving another version raises CatalogChanged instead of mapping its
+rows through the wrong partition
+"""
+
+import heapq
+import multiprocessing
+import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from vector_store import CatalogChanged, VectorStore
+
+
+PARTITION_MODES = ("hash", "category")
+
+
+def partition_products(products: List[Dict], num_shards: int, partition: str = "hash") -> List[List[int]]:
+    """
+    Assign catalog positions to shards
+    
+    Args:
+        products: Catalog in position order
+        num_shards: Shards to spread over
+        partition: 'hash' (crc32 of the id, even spread) or 'category' (a category
+            never spans shards; categories are dealt round-robin in sorted order)
+    
+    Returns:
+        Positions per shard, ascending; empty shards are dropped
+    """
+    if partition not in PARTITION_MODES:
+        raise ValueError(f"Unknown partition '{partition}'. Use one of: {', '.join(PARTITION_MODES)}")
+    
+    if partition == "category":
+        categories = sorted({str(p.get('category', '')).lower() for p in products})
+        shard_of = {category: i % num_shards for i, category in enumerate(categories)}
+        assign = lambda p: shard_of[str(p.get('category', '')).lower()]
+    else:
+        assign = lambda p: zlib.crc32(str(p.get('id', '')).encode("utf-8")) % num_shards
+    
+    groups: List[List[int]] = [[] for _ in range(num_shards)]
+    for i, product in enumerate(products):
+        groups[assign(product)].append(i)
+    return [rows for rows in groups if rows]
+
+
+def merge_top_k(shard_hits: List[Tuple[List[int], List[float]]], top_k: int) -> Tuple[List[int], List[float]]:
+    """
+    Merge per-shard result lists (each sorted best first) into the overall top_k
+    
+    Returns:
+        Tuple of (positions, scores), best first
+    """
+    merged = heapq.merge(*(zip(positions, scores) for positions, scores in shard_hits), key=lambda hit: -hit[1])
+    best = list(islice(merged, top_k))
+    return [position for position, _ in best], [score for _, score in best]
+
+
+class ShardedVectorStore(VectorStore):
+    """VectorStore whose vector index is split into shards searched concurrently"""
+    
+    def __init__(self, num_shards: int = 4, partition: str = "hash", shard_sockets: Optional[List[str]] = None,
+                 max_workers: Optional[int] = None, **kwargs):
+        """
+        Initialize sharded vector store
+        
+        Args:
+            num_shards: Shards for in-process indexes (can be set via VECTOR_SHARDS)
+            partition: 'hash' or 'category' (can be set via VECTOR_SHARD_BY)
+            shard_sockets: Search server sockets, one per shard, holding the shards in other
+                processes instead; num_shards is then len(shard_sockets)
+            max_workers: Search threads (default: one per shard)
+            **kwargs: VectorStore options (embedding_dim, quantization, rerank_factor, rerank_storage)
+        """
+        super().__init__(**kwargs)
+        if partition not in PARTITION_MODES:
+            raise ValueError(f"Unknown partition '{partition}'. Use one of: {', '.join(PARTITION_MODES)}")
+        self.partition = partition
+        self.shard_sockets = shard_sockets
+        self.num_shards = len(shard_sockets) if shard_sockets else num_shards
+        self.max_workers = max_workers
+        self.shards: List = []  # Shards holding part of the current catalog
+        self.shard_rows: List[np.ndarray] = []  # Catalog position of each shard row
+        self.shard_versions: List[Optional[int]] = []  # Catalog version each remote shard serves for this store
+        self._layout: Tuple[List, List[np.ndarray], List[Optional[int]]] = ([], [], [])  # Read by searches in one step
+        self._staged: Optional[Tuple[List, List[np.ndarray]]] = None  # Remote shards loaded but not committed
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or self.num_shards, thread_name_prefix="shard")
+        
+        self._remote = []
+        if shard_sockets:
+            from search_server import RemoteVectorStore
+            self._remote = [RemoteVectorStore(path, watch=False) for path in shard_sockets]
+    
+    def empty_copy(self) -> "ShardedVectorStore":
+        """Empty sharded store with the same shards, partitioning and index options"""
+        copy = ShardedVectorStore(num_shards=self.num_shards, partition=self.partition,
+                                  shard_sockets=self.shard_sockets, max_workers=self.max_workers,
+                                  embedding_dim=self.embedding_dim, quantization=self.quantization,
+                                  rerank_factor=self.rerank_factor, rerank_storage=self.rerank_storage)
+        copy.version = self.version
+        return copy
+    
+    def _generate_embeddings(self, products: List[Dict]) -> Optional[np.ndarray]:
+        """Remote shards embed their own products, in parallel"""
+        if self.shard_sockets:
+            return None
+        return super()._generate_embeddings(products)
+    
+    def initialize_from_products(self, products: List[Dict]) -> None:
+        """Build the catalog, then start serving it from the remote shards"""
+        super().initialize_from_products(products)
+        self._commit_shards()
+    
+    def load_from_file(self, filepath: str) -> None:
+        """Load the catalog, then start serving it from the remote shards"""
+        super().load_from_file(filepath)
+        self._commit_shards()
+    
+    def _build_index(self, embeddings: Optional[np.ndarray]) -> None:
+        """Partition the catalog and build one index per shard (remote shards are only staged)"""
+        groups = partition_products(self.metadata, self.num_shards, self.partition)
+        shard_rows = [np.asarray(rows, dtype=np.int64) for rows in groups]
+        
+        if self.shard_sockets:
+            # Servers left without products (e.g. fewer categories than shards) are not searched
+            shards = self._remote[:len(groups)]
+            subsets = [[self.metadata[i] for i in rows] for rows in groups]
+            list(self._executor.map(lambda shard, products: shard.stage_products(products), shards, subsets))
+            self._staged = (shards, shard_rows)
+        else:
+            shards = [self._local_shard(rows, embeddings) for rows in groups]
+            self._set_layout(shards, shard_rows, [None] * len(shards))
+    
+    def _commit_shards(self) -> None:
+        """Swap the staged partitions in on every remote shard and record the versions they serve"""
+        if self._staged is None:
+            return
+        shards, shard_rows = self._staged
+        self._staged = None
+        versions = list(self._executor.map(lambda shard: shard.commit_products(), shards))
+        self._set_layout(shards, shard_rows, versions)
+    
+    def _set_layout(self, shards: List, shard_rows: List[np.ndarray], versions: List[Optional[int]]) -> None:
+        """Publish the shards, their row mapping and their versions together"""
+        self.shards, self.shard_rows, self.shard_versions = shards, shard_rows, versions
+        self._layout = (shards, shard_rows, versions)
+    
+    def _local_shard(self, rows: List[int], embeddings: np.ndarray) -> VectorStore:
+        """In-process shard over the given catalog positions"""
+        shard = VectorStore(embedding_dim=self.embedding_dim, quantization=self.quantization,
+                            rerank_factor=self.rerank_factor, rerank_storage=self.rerank_storage)
+        shard.metadata = [self.metadata[i] for i in rows]
+        shard._build_index(embeddings[rows])
+        shard.initialized = True
+        return shard
+    
+    def search_positions(self, queries: List[str], top_k: int) -> Tuple[List[List[int]], List[List[float]]]:
+        """
+        Scatter the queries to every shard, then merge each query's per-shard top_k
+        
+        Returns:
+            Tuple of (catalog positions, scores), one list of each per query, best first
+        """
+        shards, shard_rows, versions = self._layout
+        if len(shards) == 1:
+            gathered = [self._search_shard(shards[0], versions[0], queries, top_k)]
+        else:
+            gathered = list(self._executor.map(
+                lambda shard, version: self._search_shard(shard, version, queries, top_k), shards, versions
+            ))
+        
+        # Shard rows -> catalog positions
+        mapped = [
+            [[int(rows[i]) for i in positions] for positions in all_positions]
+            for rows, (all_positions, _) in zip(shard_rows, gathered)
+        ]
+        
+        all_positions, all_scores = [], []
+        for q in range(len(queries)):
+            positions, scores = merge_top_k(
+                [(mapped[s][q], gathered[s][1][q]) for s in range(len(gathered))], top_k
+            )
+            all_positions.append(positions)
+            all_scores.append(scores)
+        return all_positions, all_scores
+    
+    @staticmethod
+    def _search_shard(shard, version: Optional[int], queries: List[str], top_k: int) -> Tuple[List[List[int]], List[List[float]]]:
+        """One shard's top_k; a remote shard must still serve the catalog version this store committed"""
+        if version is None:
+            return shard.search_positions(queries, top_k)
+        served, positions, scores = shard.search_positions_versioned(queries, top_k)
+        if served != version:
+            raise CatalogChanged(f"Shard {shard.socket_path} serves catalog version {served}, expected {version}")
+        return positions, scores
+    
+    def memory_usage(self) -> Dict:
+        """Index bytes across in-process shards (remote shards are not counted)"""
+        usage = super().memory_usage()
+        local = [shard.memory_usage() for shard in self.shards if isinstance(shard, VectorStore)]
+        index_bytes = sum(u["index_bytes"] for u in local)
+        rerank_bytes = sum(u["rerank_bytes"] for u in local)
+        usage.update({
+            "shards": len(self.shards),
+            "index_bytes": index_bytes,
+            "rerank_bytes": rerank_bytes,
+            "rerank_storage": self.rerank_storage if rerank_bytes else None,
+            "total_bytes": index_bytes + rerank_bytes,
+            "compression_ratio": round(usage["float32_bytes"] / index_bytes, 2) if index_bytes else None
+        })
+        return usage
+    
+    def close(self) -> None:
+        """Stop the search threads and drop remote shard connections"""
+        self._executor.shutdown(wait=False)
+        for shard in self._remote:
+            shard.close()
+
+
+def _serve_shard(socket_path: str) -> None:
+    """Shard process: an empty search server, filled by ShardedVectorStore through stage_products and commit_products"""
+    from search_server import create_search_server
+    create_search_server(VectorStore(), socket_path).serve_forever()
+
+
+def start_shard_processes(num_shards: int, socket_dir: str = "/tmp", prefix: str = "partselect-shard",
+                          timeout: float = 30.0) -> Tuple[List[str], List[multiprocessing.Process]]:
+    """
+    Start one search server process per shard on this machine
+    
+    Returns:
+        Tuple of (socket paths to pass as shard_sockets, processes to terminate when done)
+    """
+    paths = [os.path.join(socket_dir, f"{prefix}-{os.getpid()}-{i}.sock") for i in range(num_shards)]
+    processes = []
+    for path in paths:
+        if os.path.exists(path):
+            os.unlink(path)
+        process = multiprocessing.Process(target=_serve_shard, args=(path,), daemon=True)
+        process.start()
+        processes.append(process)
+    
+    deadline = time.monotonic() + timeout
+    while not all(os.path.exists(path) for path in paths):
+        if time.monotonic() > deadline:
+            for process in processes:
+                process.terminate()
+            raise TimeoutError("Shard processes did not start in time")
+        time.sleep(0.01)
+    return paths, processes
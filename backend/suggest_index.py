@@ -0,0 +1,107 @@
+"""
+Suggest Index Module
+Prefix completions for part numbers and model numbers
+A sorted array of normalized keys searched with bisect, rebuilt when the catalog changes
+"""
+
+import heapq
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+from entity_extractor import normalize_model
+
+
+class SuggestIndex:
+    """Sorted-array prefix index over every product id and compatible model"""
+    
+    def __init__(self, vector_store, max_scan: int = 256):
+        """
+        Initialize suggest index
+        
+        Args:
+            vector_store: Vector store whose metadata is indexed
+            max_scan: Matching keys ranked per query; longer ranges are cut in key order
+        """
+        self.vector_store = vector_store
+        self.max_scan = max_scan
+        self._catalog_version: Optional[int] = None
+        self._keys: List[str] = []
+        self._entries: List[Tuple[str, str, str, int]] = []  # (value, type, label, weight), parallel to _keys
+        self._lock = threading.Lock()
+    
+    def _build(self) -> None:
+        """Collect ids and models from the catalog and sort them by normalized key"""
+        items: Dict[str, Tuple[str, str, str, int]] = {}
+        model_counts: Dict[str, int] = {}
+        model_spelling: Dict[str, str] = {}
+        
+        for product in self.vector_store.metadata:
+            product_id = str(product.get('id', ''))
+            if product_id:
+                items[product_id.upper()] = (product_id, "part", product.get('name', ''), int(product.get('reviews_count') or 0))
+            
+            compat_models = product.get('compatible_models', [])
+            if isinstance(compat_models, str):
+                compat_models = [compat_models]
+            for model in compat_models:
+                key = normalize_model(str(model))
+                model_counts[key] = model_counts.get(key, 0) + 1
+                model_spelling.setdefault(key, str(model))
+        
+        for key, count in model_counts.items():
+            # A part id wins if a model ever collides with one
+            items.setdefault(key, (model_spelling[key], "model", f"{count} compatible part{'s' if count != 1 else ''}", count))
+        
+        keys = sorted(items)
+        self._keys, self._entries = keys, [items[k] for k in keys]
+    
+    def _check_version(self) -> Tuple[List[str], List[Tuple[str, str, str, int]]]:
+        """Rebuild when the catalog has been reloaded"""
+        version = getattr(self.vector_store, 'version', None)
+        if version != self._catalog_version:
+            with self._lock:
+                if version != self._catalog_version:
+                    self._build()
+                    self._catalog_version = version
+        return self._keys, self._entries
+    
+    def suggest(self, prefix: str, limit: int = 8, kind: Optional[str] = None) -> Dict:
+        """
+        Complete a partial part or model number
+        
+        Args:
+            prefix: What the user has typed so far (case, dashes and spaces are ignored)
+            limit: Maximum completions
+            kind: Only 'part' or only 'model' completions (both if None)
+        
+        Returns:
+            Dictionary with suggestions (exact match first, then by popularity:
+            review count for parts, compatible part count for models) and
+            has_more when further matches exist
+        """
+        keys, entries = self._check_version()
+        key = normalize_model(prefix or "")
+        if not key:
+            return {"suggestions": [], "has_more": False}
+        
+        start = bisect_left(keys, key)
+        # Smallest string greater than every key with this prefix
+        end = bisect_left(keys, key + "\uffff", lo=start)
+        scan_end = min(end, start + self.max_scan)
+        
+        candidates = [
+            i for i in range(start, scan_end)
+            if kind is None or entries[i][1] == kind
+        ]
+        ranked = heapq.nsmallest(
+            limit, candidates,
+            key=lambda i: (keys[i] != key, -entries[i][3], len(keys[i]), keys[i])
+        )
+        
+        return {
+            "suggestions": [
+                {"value": entries[i][0], "type": entries[i][1], "label": entries[i][2]}
+                for i in ranked
+            ],
+            "has_more": len(candidates) > limit or end > scan_end
+        }
@@ -0,0 +1,21 @@
+"""
+Test configuration
+Backend modules import each other as top-level modules (as main.py runs them),
+so the backend directory is put on sys.path for the test session
+"""
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def app_client():
+    """Flask test client over the sample catalog; Deepseek is unreachable, so chat runs degraded"""
+    os.environ["DEEPSEEK_API_KEY"] = "test"
+    os.environ["DEEPSEEK_API_BASE_URL"] = "http://127.0.0.1:9/v1"
+    import main
+    main.initialize_backend()
+    return main.app.test_client()
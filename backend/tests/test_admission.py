@@ -0,0 +1,96 @@
+"""Admission pools: queue limits, deadlines, priority order, and chat turns shed at the LLM call"""
+
+import threading
+import time
+import pytest
+from admission import AdmissionPool, AdmissionRejected
+
+
+def wait_queued(pool, count):
+    deadline = time.monotonic() + 5
+    while pool.stats()["queued"] < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_rejects_when_queue_full():
+    pool = AdmissionPool("chat", max_concurrent=1, max_queue=0, queue_timeout=5)
+    pool.acquire()
+    with pytest.raises(AdmissionRejected) as rejected:
+        pool.acquire()
+    assert rejected.value.reason == "queue_full" and rejected.value.retry_after >= 1
+    pool.release(0.01)
+    pool.acquire()
+    assert pool.stats()["in_flight"] == 1
+
+
+def test_times_out_and_leaves_the_queue():
+    pool = AdmissionPool("chat", max_concurrent=1, max_queue=2, queue_timeout=0.05)
+    pool.acquire()
+    start = time.perf_counter()
+    with pytest.raises(AdmissionRejected) as rejected:
+        pool.acquire()
+    assert rejected.value.reason == "timeout"
+    assert 0.04 <= time.perf_counter() - start < 1
+    assert pool.stats()["queued"] == 0
+    with pytest.raises(AdmissionRejected):
+        pool.acquire(timeout=0.01)  # Explicit timeout overrides the pool's
+
+
+def test_released_slot_goes_to_best_priority_then_fifo():
+    pool = AdmissionPool("chat", max_concurrent=1, max_queue=10, queue_timeout=5)
+    pool.acquire()
+    order = []
+    
+    def wait(name, priority):
+        pool.acquire(priority)
+        order.append(name)
+        pool.release()
+    
+    threads = []
+    for name, priority in (("new-a", 1), ("returning-a", 0), ("new-b", 1), ("returning-b", 0)):
+        thread = threading.Thread(target=wait, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        wait_queued(pool, len(threads))
+    
+    pool.release()
+    for thread in threads:
+        thread.join(5)
+    assert order == ["returning-a", "returning-b", "new-a", "new-b"]
+    assert pool.stats()["in_flight"] == 0 and pool.stats()["queued"] == 0
+
+
+def test_retry_after_grows_with_hold_time_and_queue():
+    pool = AdmissionPool("chat", max_concurrent=1, max_queue=0, queue_timeout=1)
+    pool.acquire()
+    for _ in range(20):
+        pool.release(5.0)
+        pool.acquire()
+    with pytest.raises(AdmissionRejected) as rejected:
+        pool.acquire()
+    assert rejected.value.retry_after >= 4
+
+
+def test_busy_llm_pool_sheds_chat_turn_with_503(app_client, monkeypatch):
+    import main
+    pool = AdmissionPool("chat", max_concurrent=1, max_queue=0, queue_timeout=1)
+    llm = main.chat_handler.llm
+    monkeypatch.setattr(main.chat_handler, "llm_slots", pool)
+    monkeypatch.setattr(llm, "is_available", lambda: True)
+    monkeypatch.setattr(llm, "analyze_intent", lambda message: {"intent": "troubleshooting", "entities": {}, "confidence": 0.9})
+    monkeypatch.setattr(llm, "get_response", lambda *args, **kwargs: "Check the water valve.")
+    
+    pool.acquire()
+    response = app_client.post("/api/chat", json={"message": "My ice maker is broken", "sessionId": "shed"})
+    assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+    assert main.chat_handler.sessions["shed"].messages == []  # The turn can be retried as-is
+    
+    # Direct catalog answers do not need a slot
+    direct = app_client.post("/api/chat", json={"message": "How much is PS11752778?", "sessionId": "shed"})
+    assert direct.status_code == 200
+    
+    pool.release()
+    answered = app_client.post("/api/chat", json={"message": "My ice maker is broken", "sessionId": "shed"})
+    assert answered.status_code == 200
+    assert answered.get_json()["response"]["content"] == "Check the water valve."
+    assert pool.stats()["in_flight"] == 0
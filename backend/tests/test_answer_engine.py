@@ -0,0 +1,70 @@
+"""Which messages the answer engine serves from the catalog, and what it answers"""
+
+import pytest
+from answer_engine import AnswerEngine
+from product_service import ProductService
+from sample_products import get_sample_products
+from vector_store import initialize_vector_store
+
+
+@pytest.fixture(scope="module")
+def engine():
+    initialize_vector_store(get_sample_products())
+    return AnswerEngine(ProductService())
+
+
+@pytest.fixture
+def planner():
+    return AnswerEngine(product_service=None)
+
+
+def test_complete_lookup_is_planned(planner):
+    query = planner.plan("Is PS11752778 compatible with WRF989SDAW?", ["PS11752778"], ["WRF989SDAW"])
+    assert query == {"kinds": ["compatibility"], "part_number": "PS11752778", "model_number": "WRF989SDAW"}
+
+
+def test_price_and_stock_together(planner):
+    query = planner.plan("How much is PS11752778 and is it in stock?", ["PS11752778"], [])
+    assert query["kinds"] == ["price", "stock"]
+
+
+@pytest.mark.parametrize("message", ["Is it in stock?", "How much is that?", "what does this part cost", "price of that part?"])
+def test_references_resolve_to_last_part(planner, message):
+    query = planner.plan(message, [], [], recent_parts=["PS11111111", "PS11752778"])
+    assert query is not None and query["part_number"] == "PS11752778"
+
+
+@pytest.mark.parametrize("message", [
+    "which parts are available for that model?",
+    "is this model still available?",
+    "what's the price range for that brand?",
+    "how much do parts for this dishwasher cost?",
+])
+def test_that_or_this_before_another_noun_is_not_a_reference(planner, message):
+    assert planner.plan(message, [], [], session_model="WRF989SDAW", recent_parts=["PS11752778"]) is None
+
+
+def test_available_alone_is_not_a_stock_question(planner):
+    assert planner.plan("Is PS11752778 available?", ["PS11752778"], []) is None
+
+
+@pytest.mark.parametrize("message", ["How do I install PS11752778?", "Is PS11752778 better than PS12345678?"])
+def test_open_ended_questions_go_to_the_llm(planner, message):
+    assert planner.plan(message, ["PS11752778"], []) is None
+
+
+def test_compatibility_needs_a_model(planner):
+    assert planner.plan("Is PS11752778 compatible?", ["PS11752778"], []) is None
+    query = planner.plan("Is PS11752778 compatible?", ["PS11752778"], [], session_model="WRF989SDAW")
+    assert query["model_number"] == "WRF989SDAW"
+
+
+def test_answer_from_catalog(engine):
+    answer = engine.answer("Is PS11752778 compatible with WRF989SDAW?", ["PS11752778"], ["WRF989SDAW"])
+    assert answer["intent"] == "compatibility"
+    assert [p["id"] for p in answer["products"]] == ["PS11752778"]
+    assert "PS11752778" in answer["text"]
+
+
+def test_unknown_part_is_not_answered(engine):
+    assert engine.answer("How much is PS99999999?", ["PS99999999"], []) is None
@@ -0,0 +1,29 @@
+"""Benchmark suite: deterministic inputs and a small end-to-end run"""
+
+import json
+from benchmark import generate_catalog, generate_queries, recall_at_k, run_benchmarks
+
+
+def test_catalog_and_queries_are_deterministic():
+    assert generate_catalog(300, seed=1) == generate_catalog(300, seed=1)
+    assert generate_catalog(300, seed=1) != generate_catalog(300, seed=2)
+    products = generate_catalog(300)
+    assert len({p["id"] for p in products}) == 300
+    assert generate_queries(products, 20) == generate_queries(products, 20)
+
+
+def test_recall_counts_score_ties_as_hits():
+    expected = [[{"id": "a", "score": 0.9}, {"id": "b", "score": 0.5}, {"id": "c", "score": 0.5}]]
+    assert recall_at_k(expected, [[{"id": "a", "score": 0.9}, {"id": "c", "score": 0.5}]], k=2) == 1.0
+    assert recall_at_k(expected, [[{"id": "a", "score": 0.9}, {"id": "x", "score": 0.1}]], k=2) == 0.5
+    assert recall_at_k([[]], [[]], k=5) == 1.0
+
+
+def test_run_benchmarks_report_is_json():
+    report = run_benchmarks([200], ["lookups", "context"], iterations=3)
+    json.dumps(report)
+    assert report["meta"]["seed"] == 42
+    suites = {row["suite"] for row in report["results"]}
+    assert suites == {"vector_store", "lookups", "context"}
+    assert all(row["catalog_size"] == 200 and "iterations" in row for row in report["results"])
+    assert any(row["benchmark"] == "search_products" and row["mean_ms"] > 0 for row in report["results"])
@@ -0,0 +1,165 @@
+"""ChatHandler pipeline: speculative retrieval and degraded answers"""
+
+import threading
+import pytest
+from admission import AdmissionPool
+from answer_templates import DEGRADED_NOTICE
+from chat_handler import ChatHandler
+from circuit_breaker import CircuitBreaker
+from context_builder import estimate_tokens
+from deepseek_client import DeepseekClient
+from intent_batcher import IntentBatcher
+from metrics import StageTimer
+from product_service import ProductService
+from sample_products import get_sample_products
+from session_prefetch import SessionPrefetcher
+from vector_store import initialize_vector_store
+
+
+@pytest.fixture(scope="module")
+def products():
+    initialize_vector_store(get_sample_products())
+    return ProductService()
+
+
+@pytest.fixture
+def make_handler(products):
+    handlers = []
+    
+    def make(intent: str, **options) -> ChatHandler:
+        llm = DeepseekClient(api_key="test", base_url="http://deepseek.invalid/v1",
+                             breaker=CircuitBreaker(failure_threshold=3, recovery_timeout=60))
+        llm.analyze_intent = lambda message: {"intent": intent, "entities": {}, "confidence": 0.9}
+        handler = ChatHandler(deepseek_client=llm, product_service=products,
+                              prefetcher=SessionPrefetcher(products, mode="off"), **options)
+        handlers.append(handler)
+        return handler
+    
+    yield make
+    for handler in handlers:
+        if handler._executor is not None:
+            handler._executor.shutdown(wait=False)
+
+
+def resolve(handler, message, part_number=None, model_number=None):
+    intent, products, retrieval, _ = handler._resolve_intent_and_products(message, part_number, model_number, StageTimer())
+    return intent, [p["id"] for p in products], retrieval
+
+
+@pytest.mark.parametrize("message,intent,model_number", [
+    ("Is this compatible with WRF989SDAW?", "compatibility", "WRF989SDAW"),
+    ("My ice maker is broken", "troubleshooting", None),
+    ("My ice maker is broken", "order", None),
+])
+def test_speculative_results_match_serial(make_handler, message, intent, model_number):
+    serial = resolve(make_handler(intent, fanout_workers=0), message, model_number=model_number)
+    speculative = resolve(make_handler(intent), message, model_number=model_number)
+    assert serial[2] == "serial" and speculative[2] == "speculative"
+    assert speculative[:2] == serial[:2]
+
+
+def test_unstarted_plan_runs_after_the_intent(make_handler):
+    # Only the locally predicted plan (troubleshooting) is started; the API says order
+    handler = make_handler("order", max_speculative_branches=1)
+    intent, ids, retrieval = resolve(handler, "My ice maker is broken")
+    assert (intent, retrieval) == ("order", "miss")
+    assert ids == resolve(make_handler("order", fanout_workers=0), "My ice maker is broken")[1]
+
+
+def test_open_circuit_resolves_serially(make_handler):
+    handler = make_handler("troubleshooting")
+    for _ in range(3):
+        handler.llm.breaker.record_failure()
+    assert resolve(handler, "My ice maker is broken")[2] == "serial"
+
+
+def test_open_circuit_answers_from_catalog(make_handler, monkeypatch):
+    handler = make_handler("troubleshooting")
+    for _ in range(3):
+        handler.llm.breaker.record_failure()
+    monkeypatch.setattr(handler.llm, "get_response", lambda *args, **kwargs: pytest.fail("LLM called while open"))
+    result = handler.process_message("My ice maker is broken", "degraded")
+    assert result["response_text"].startswith(DEGRADED_NOTICE)
+    assert "These parts commonly fix this kind of problem:" in result["response_text"]
+
+
+def test_failed_answer_call_degrades_the_turn(make_handler, monkeypatch):
+    handler = make_handler("troubleshooting")
+    
+    def fail(*args, **kwargs):
+        raise ConnectionError("down")
+    
+    monkeypatch.setattr(handler.llm, "get_response", fail)
+    result = handler.process_message("My ice maker is broken", "failed")
+    assert result["response_text"].startswith(DEGRADED_NOTICE)
+    assert handler.sessions["failed"].messages[-1]["role"] == "assistant"
+
+
+def test_chat_slot_is_held_across_intent_and_answer_calls(make_handler, monkeypatch):
+    pool = AdmissionPool("chat", max_concurrent=1, max_queue=0, queue_timeout=1)
+    handler = make_handler("troubleshooting", llm_slots=pool)
+    held = []
+    
+    def analyze_intent(message):
+        held.append(("intent", pool.stats()["in_flight"]))
+        return {"intent": "troubleshooting", "entities": {}, "confidence": 0.9}
+    
+    def get_response(*args, **kwargs):
+        held.append(("answer", pool.stats()["in_flight"]))
+        return "Check the water valve."
+    
+    monkeypatch.setattr(handler.llm, "analyze_intent", analyze_intent)
+    monkeypatch.setattr(handler.llm, "get_response", get_response)
+    handler.process_message("My ice maker is broken", "slots")
+    assert held == [("intent", 1), ("answer", 1)]
+    assert pool.stats()["in_flight"] == 0
+    
+    # Degraded turns never wait for a slot
+    pool.acquire()
+    handler.llm.breaker.record_failure()
+    handler.llm.breaker.record_failure()
+    handler.llm.breaker.record_failure()
+    result = handler.process_message("My ice maker is broken", "slots")
+    assert result["metadata"]["degraded"]
+    pool.release()
+
+
+def test_long_memory_summary_counts_against_the_context_budget(make_handler):
+    handler = make_handler("compatibility")
+    products = handler.products.search_products("ice maker refrigerator", top_k=5)
+    memory = "Summary of earlier turns: " + "the customer compared several ice makers. " * 40
+    budget = 200
+    
+    context = handler._build_context("Does it fit?", products, "compatibility", "WRF555SDFZ", max_tokens=budget, memory=memory)
+    content = handler.llm.build_messages("Does it fit?", context)[-1]["content"]
+    assert estimate_tokens(content) - estimate_tokens("Does it fit?") <= budget
+    assert "Summary of earlier turns" in context and "Note: User has model WRF555SDFZ" in context
+    
+    # Without the memory block the same budget holds more products
+    roomy = handler._build_context("Does it fit?", products, "compatibility", "WRF555SDFZ", max_tokens=budget)
+    assert roomy.count("Part Number:") > context.count("Part Number:")
+
+
+def test_intent_batch_collects_more_turns_than_fanout_workers(make_handler, monkeypatch):
+    handler = make_handler("troubleshooting", fanout_workers=2)
+    batches = []
+    
+    def analyze_intents(messages):
+        batches.append(list(messages))
+        return [{"intent": "troubleshooting", "entities": {}, "confidence": 0.9} for _ in messages]
+    
+    monkeypatch.setattr(handler.llm, "analyze_intents", analyze_intents)
+    # The batch is only sent early once all six turns have joined it
+    handler.intent_batcher = IntentBatcher(handler.llm, max_batch_size=6, max_wait_ms=5000)
+    results = [None] * 6
+    
+    def turn(i):
+        results[i] = resolve(handler, f"My ice maker is broken ({i})")
+    
+    threads = [threading.Thread(target=turn, args=(i,)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert len(batches) == 1 and len(batches[0]) == 6
+    assert all(result[0] == "troubleshooting" and result[2] == "speculative" for result in results)
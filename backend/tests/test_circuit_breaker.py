@@ -0,0 +1,117 @@
+"""Circuit breaker state changes and how DeepseekClient reports call outcomes to it"""
+
+import pytest
+import requests
+import deepseek_client
+from circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from deepseek_client import DeepseekClient
+
+
+class FakeResponse:
+    def __init__(self, body, status: int = 200):
+        self.body = body
+        self.status_code = status
+    
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(response=self)
+    
+    def json(self):
+        return self.body
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=60)
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.is_open()
+    assert not breaker.allow_request()
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    
+    # Recovery timeout elapsed: one probe is let through
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+
+def make_client(monkeypatch, responses, threshold: int = 2) -> DeepseekClient:
+    replies = iter(responses)
+    monkeypatch.setattr(deepseek_client.requests, "post", lambda *args, **kwargs: next(replies))
+    return DeepseekClient(api_key="test", base_url="http://deepseek.invalid/v1",
+                          breaker=CircuitBreaker(failure_threshold=threshold, recovery_timeout=60))
+
+
+def test_empty_choices_count_as_one_failure(monkeypatch):
+    client = make_client(monkeypatch, [FakeResponse({"choices": []}), FakeResponse({"choices": []})])
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            client._request_completion({"messages": []})
+    # Two failures in a row, no success recorded in between
+    assert client.breaker.state == OPEN
+
+
+def test_client_errors_do_not_open_the_circuit(monkeypatch):
+    client = make_client(monkeypatch, [FakeResponse({}, status=400)] * 3)
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.HTTPError):
+            client._request_completion({"messages": []})
+    assert client.breaker.state == CLOSED
+
+
+def test_client_error_on_a_half_open_probe_keeps_the_circuit_half_open(monkeypatch):
+    client = make_client(monkeypatch, [FakeResponse({}, status=503), FakeResponse({}, status=400)], threshold=1)
+    client.breaker.recovery_timeout = 0
+    with pytest.raises(requests.exceptions.HTTPError):
+        client._request_completion({"messages": []})
+    assert client.breaker.state == OPEN
+    
+    # The probe is rejected by the API, which proves nothing about its health
+    with pytest.raises(requests.exceptions.HTTPError):
+        client._request_completion({"messages": []})
+    assert client.breaker.state == HALF_OPEN
+    assert client.breaker.consecutive_failures == 1
+    # Its probe slot is free again for the next call
+    assert client.breaker.allow_request()
+
+
+def test_server_errors_open_the_circuit(monkeypatch):
+    client = make_client(monkeypatch, [FakeResponse({}, status=503)] * 2)
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.HTTPError):
+            client._request_completion({"messages": []})
+    assert client.breaker.state == OPEN
+    assert not client.is_available()
+
+
+def test_successful_call_returns_content(monkeypatch):
+    body = {"choices": [{"message": {"content": "hello"}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 2}}
+    client = make_client(monkeypatch, [FakeResponse(body)])
+    assert client._request_completion({"messages": []}) == "hello"
+    assert client.breaker.consecutive_failures == 0
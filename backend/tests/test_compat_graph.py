@@ -0,0 +1,54 @@
+"""Compatibility graph: model -> parts and co-compatible parts"""
+
+import chat_handler
+import deepseek_client
+from compat_graph import CompatGraph
+
+
+class CatalogStub:
+    """Minimal vector store: metadata and a version"""
+    
+    def __init__(self, metadata):
+        self.metadata = metadata
+        self.version = 1
+
+
+def product(part_id, models, reviews=0):
+    return {"id": part_id, "name": part_id, "compatible_models": models, "reviews_count": reviews}
+
+
+def catalog():
+    return CatalogStub([
+        product("PS1", ["WRF989SDAW", "WDT780SAEM1"], reviews=5),
+        product("PS2", ["wrf-989 sdaw", "WDT780SAEM1"], reviews=50),
+        product("PS3", ["WRF989SDAW"], reviews=10),
+        product("PS4", "KDTE334GPS0"),
+    ])
+
+
+def test_parts_for_model_most_reviewed_first():
+    graph = CompatGraph(catalog())
+    assert [p["id"] for p in graph.parts_for_model("wrf989sdaw")] == ["PS2", "PS3", "PS1"]
+    assert [p["id"] for p in graph.parts_for_model("WRF-989SDAW", limit=2, exclude=["ps2"])] == ["PS3", "PS1"]
+    assert graph.parts_for_model("UNKNOWN123") == []
+
+
+def test_related_parts_ranked_by_shared_models():
+    graph = CompatGraph(catalog())
+    related = graph.related_parts("ps1")
+    assert [(p["id"], p["shared_models"]) for p in related] == [("PS2", 2), ("PS3", 1)]
+    assert graph.related_parts("PS4") == []
+    assert graph.related_parts("PS404") == []
+
+
+def test_graph_rebuilt_on_version_change():
+    store = catalog()
+    graph = CompatGraph(store)
+    assert graph.related_parts("PS4") == []
+    store.metadata = store.metadata + [product("PS5", ["KDTE334GPS0"])]
+    store.version += 1
+    assert [p["id"] for p in graph.related_parts("PS4")] == ["PS5"]
+
+
+def test_chat_handler_shares_intent_list():
+    assert chat_handler.INTENTS is deepseek_client.INTENTS
@@ -0,0 +1,70 @@
+"""Token-budgeted product context and history trimming"""
+
+from chat_handler import ChatHandler
+from context_builder import ContextBuilder, estimate_message_tokens, estimate_tokens, truncate_to_tokens
+from deepseek_client import DeepseekClient
+from product_service import ProductService
+from sample_products import get_sample_products
+from vector_store import initialize_vector_store
+
+
+class CatalogStub:
+    version = 1
+
+
+def product(i, score=0.0, description="x" * 120):
+    return {"id": f"PS{i}", "name": f"Part {i}", "category": "dishwasher", "description": description, "score": score}
+
+
+def test_truncate_to_tokens():
+    text = "word " * 100
+    assert truncate_to_tokens("short", 10) == "short"
+    cut = truncate_to_tokens(text, 10)
+    assert cut.endswith("...") and estimate_tokens(cut) <= 10
+    assert truncate_to_tokens(text, 1) == ""
+
+
+def test_context_stays_within_budget_and_drops_least_relevant():
+    builder = ContextBuilder(CatalogStub())
+    products = [product(0, 0.2), product(1, 0.9), product(2, 0.5), product(3, 0.1)]
+    full = builder.build_products_context(products)
+    assert all(f"PS{i}" in full for i in range(4))
+    
+    budget = estimate_tokens(builder.HEADER) + 2 * (builder.get_snippet(products[0])[1] + 1)
+    context = builder.build_products_context(products, max_tokens=budget)
+    assert estimate_tokens(context) <= budget + 2
+    # The two best scored parts survive, in display order
+    assert "PS1" in context and "PS2" in context and "PS0" not in context and "PS3" not in context
+    assert context.index("PS1") < context.index("PS2")
+    assert builder.build_products_context(products, max_tokens=5) == "No products found."
+
+
+def test_snippets_cached_per_catalog_version():
+    store = CatalogStub()
+    builder = ContextBuilder(store)
+    first = builder.get_snippet(product(0, description="old"))
+    assert builder.get_snippet(product(0, description="new")) is first
+    store.version = 2
+    assert "new" in builder.get_snippet(product(0, description="new"))[0]
+
+
+def test_fit_history_keeps_newest_messages_and_reserves_context():
+    builder = ContextBuilder(CatalogStub(), max_prompt_tokens=400, min_context_tokens=200)
+    history = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"{i} " + "y" * 200} for i in range(10)]
+    trimmed, context_budget = builder.fit_history("system prompt", "question", history)
+    assert trimmed and trimmed == history[-len(trimmed):]
+    assert context_budget >= 200
+    total = estimate_tokens("system prompt") + estimate_tokens("question") + 8 + estimate_message_tokens(trimmed)
+    assert total + context_budget == 400
+
+
+def test_chat_context_fits_a_budget_smaller_than_any_product():
+    initialize_vector_store(get_sample_products())
+    handler = ChatHandler(deepseek_client=DeepseekClient(api_key="test"), product_service=ProductService())
+    products = handler.products.search_products("ice maker refrigerator", top_k=5)
+    notes = handler._build_context("Does it fit?", [], "compatibility", "WRF555SDFZ")
+    
+    for budget in (estimate_tokens(DeepseekClient.CONTEXT_LABEL + notes), 60, 200):
+        context = handler._build_context("Does it fit?", products, "compatibility", "WRF555SDFZ", max_tokens=budget)
+        assert estimate_tokens(DeepseekClient.CONTEXT_LABEL + context) <= budget
+        assert "Note: User has model WRF555SDFZ" in context
@@ -0,0 +1,83 @@
+"""Rolling conversation summary and session facts"""
+
+from admission import AdmissionPool
+from conversation_memory import ConversationMemory, ConversationMemoryManager, summarize_locally
+from context_builder import estimate_tokens
+
+
+def turns(count):
+    messages = []
+    for i in range(count):
+        messages.append({"role": "user", "content": f"Question {i} about PS{10000 + i}. More detail."})
+        messages.append({"role": "assistant", "content": f"Answer {i}."})
+    return messages
+
+
+class FailingLLM:
+    def summarize_conversation(self, previous_summary, messages, max_tokens=150):
+        raise ConnectionError("down")
+
+
+class RecordingLLM:
+    def __init__(self):
+        self.batches = []
+    
+    def summarize_conversation(self, previous_summary, messages, max_tokens=150):
+        self.batches.append(messages)
+        return f"{previous_summary} +{len(messages)}".strip()
+
+
+def test_facts_keep_latest_parts_and_model():
+    memory = ConversationMemory(max_parts=3)
+    for text in ("PS10001 and PS10002", "PS10003", "ps10001 again", "PS10004"):
+        memory.note_parts(text)
+    memory.update_facts(model_number="WRF989SDAW", intent="compatibility")
+    memory.update_facts(intent=None)
+    assert memory.facts() == {"model_number": "WRF989SDAW", "parts": ["PS10003", "PS10001", "PS10004"], "last_intent": "compatibility"}
+    assert "Customer's appliance model: WRF989SDAW" in memory.render()
+    assert ConversationMemory().render() == ""
+
+
+def test_refresh_summarizes_older_turns_and_keeps_recent_ones():
+    llm = RecordingLLM()
+    manager = ConversationMemoryManager(llm, keep_recent_messages=4, refresh_every_messages=4, workers=0)
+    memory = ConversationMemory()
+    messages = turns(3)
+    assert not manager.maybe_refresh(memory, messages)  # 2 messages beyond the kept window
+    
+    messages = turns(5)
+    assert manager.maybe_refresh(memory, messages)
+    assert memory.summarized_upto == 6 and messages[memory.summarized_upto]["role"] == "user"
+    assert llm.batches == [messages[:6]]
+    assert memory.summary == "+6"
+    assert not manager.maybe_refresh(memory, messages)
+
+
+def test_failed_llm_summary_falls_back_to_local():
+    manager = ConversationMemoryManager(FailingLLM(), keep_recent_messages=2, refresh_every_messages=2, workers=0)
+    memory = ConversationMemory()
+    assert manager.maybe_refresh(memory, turns(3))
+    assert memory.summary == "Customer asked: Question 0 about PS10000.; Question 1 about PS10001.."
+
+
+def test_summary_calls_share_the_chat_slots():
+    llm = RecordingLLM()
+    pool = AdmissionPool("chat", max_concurrent=1, max_queue=0, queue_timeout=1)
+    manager = ConversationMemoryManager(llm, keep_recent_messages=2, refresh_every_messages=2, workers=0, llm_slots=pool)
+    
+    # Every slot is taken by chat turns: the summary is made locally instead of queueing
+    pool.acquire()
+    busy = ConversationMemory()
+    assert manager.maybe_refresh(busy, turns(3))
+    assert llm.batches == [] and busy.summary.startswith("Customer asked:")
+    pool.release()
+    
+    idle = ConversationMemory()
+    assert manager.maybe_refresh(idle, turns(3))
+    assert idle.summary == "+4" and pool.stats()["in_flight"] == 0
+
+
+def test_local_summary_is_capped():
+    summary = summarize_locally("", turns(50), max_tokens=40)
+    assert estimate_tokens(summary) <= 41 and summary.startswith("...")
+    assert "Question 49" in summary
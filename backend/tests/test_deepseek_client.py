@@ -0,0 +1,155 @@
+"""DeepseekClient request handling: coalescing, prompt layout and token accounting"""
+
+import threading
+import deepseek_client
+from circuit_breaker import CircuitBreaker
+from deepseek_client import DeepseekClient
+
+
+class FakeResponse:
+    status_code = 200
+    
+    def __init__(self, content):
+        self.body = {"choices": [{"message": {"content": content}, "finish_reason": "stop"}],
+                     "usage": {"prompt_tokens": 10, "completion_tokens": 3}}
+    
+    def raise_for_status(self):
+        pass
+    
+    def json(self):
+        return self.body
+
+
+def make_client(**options) -> DeepseekClient:
+    return DeepseekClient(api_key="test", base_url="http://deepseek.invalid/v1",
+                          breaker=CircuitBreaker(failure_threshold=10, recovery_timeout=60), **options)
+
+
+def run_concurrently(fn, count):
+    results = [None] * count
+    
+    def worker(i):
+        results[i] = fn(i)
+    
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_identical_concurrent_calls_share_one_request(monkeypatch):
+    release = threading.Event()
+    posted = []
+    
+    def post(url, json=None, **kwargs):
+        posted.append(json)
+        release.wait(5)
+        return FakeResponse("shared answer")
+    
+    monkeypatch.setattr(deepseek_client.requests, "post", post)
+    client = make_client()
+    threads, results = run_concurrently(lambda i: client.get_response("Tell me about PS11752778", raise_errors=True), 4)
+    while client.get_coalescing_stats()["coalesced_calls"] < 3:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    
+    assert results == ["shared answer"] * 4
+    assert len(posted) == 1
+    assert client.get_coalescing_stats() == {"upstream_calls": 1, "coalesced_calls": 3, "in_flight": 0}
+
+
+def test_errors_reach_every_waiter_and_different_payloads_are_not_merged(monkeypatch):
+    release = threading.Event()
+    
+    def post(url, json=None, **kwargs):
+        release.wait(5)
+        if "fail" in json["messages"][-1]["content"]:
+            raise deepseek_client.requests.exceptions.ConnectionError("down")
+        return FakeResponse("ok")
+    
+    monkeypatch.setattr(deepseek_client.requests, "post", post)
+    client = make_client()
+    
+    def call(i):
+        try:
+            return client.get_response("please fail" if i < 2 else f"question {i}", raise_errors=True)
+        except Exception as e:
+            return type(e).__name__
+    
+    threads, results = run_concurrently(call, 4)
+    while client.get_coalescing_stats()["upstream_calls"] + client.get_coalescing_stats()["coalesced_calls"] < 4:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    
+    assert results == ["ConnectionError", "ConnectionError", "ok", "ok"]
+    assert client.get_coalescing_stats()["upstream_calls"] == 3
+
+
+def test_sequential_calls_are_not_coalesced(monkeypatch):
+    monkeypatch.setattr(deepseek_client.requests, "post", lambda url, json=None, **kwargs: FakeResponse("again"))
+    client = make_client()
+    for _ in range(2):
+        assert client.get_response("same message", raise_errors=True) == "again"
+    assert client.get_coalescing_stats()["upstream_calls"] == 2
+
+
+def test_prefix_cache_layout_keeps_turns_byte_identical():
+    client = make_client(prompt_layout="prefix_cache")
+    first = client.build_messages("Is PS1 compatible?", context="Part PS1", conversation_history=[])
+    history = [{"role": "user", "content": "Is PS1 compatible?"}, {"role": "assistant", "content": "Yes."}]
+    second = client.build_messages("How do I install it?", context="Part PS1 guide", conversation_history=history)
+    
+    assert second[0] == first[0] == {"role": "system", "content": client.SYSTEM_PROMPT}
+    assert second[1:3] == history
+    # Context travels with the final user message, never in the system prompt
+    assert second[-1]["content"].startswith(client.CONTEXT_LABEL + "Part PS1 guide")
+    assert second[-1]["content"].endswith("How do I install it?")
+
+
+def test_system_context_layout_puts_context_in_system_prompt():
+    client = make_client(prompt_layout="system_context")
+    messages = client.build_messages("Question", context="Part PS1")
+    assert messages[0]["role"] == "system" and messages[0]["content"].endswith(client.CONTEXT_LABEL + "Part PS1")
+    assert messages[-1] == {"role": "user", "content": "Question"}
+
+
+def test_cached_prompt_tokens_are_recorded(monkeypatch):
+    response = FakeResponse("answer")
+    response.body["usage"] = {"prompt_tokens": 100, "completion_tokens": 5, "prompt_tokens_details": {"cached_tokens": 80}}
+    monkeypatch.setattr(deepseek_client.requests, "post", lambda url, json=None, **kwargs: response)
+    client = make_client()
+    client.get_response("question", raise_errors=True)
+    usage = client.take_last_usage()
+    assert (usage["prompt_cache_hit_tokens"], usage["prompt_cache_miss_tokens"]) == (80, 20)
+    assert client.take_last_usage() is None
+    stats = client.get_prompt_cache_stats()
+    assert (stats["cache_hit_tokens"], stats["hit_ratio"]) == (80, 0.8)
+
+
+def test_payload_uses_profile_settings_and_overrides():
+    client = make_client()
+    messages = [{"role": "user", "content": "hi"}]
+    compatibility = client.build_payload(messages, "compatibility")
+    assert compatibility["max_tokens"] == 150 and "\nUser:" in compatibility["stop"]
+    assert client.build_payload(messages, "no_such_profile") == client.build_payload(messages)
+    batch = client.build_payload(messages, "intent_batch", max_tokens=90)
+    assert batch["max_tokens"] == 90 and batch["temperature"] == 0.0
+    # Overrides never leak into the shared profile table
+    assert "max_tokens" not in DeepseekClient.GENERATION_PROFILES["intent_batch"]
+
+
+def test_truncated_completions_are_counted_per_profile(monkeypatch):
+    sent = []
+    response = FakeResponse("cut off")
+    response.body["choices"][0]["finish_reason"] = "length"
+    monkeypatch.setattr(deepseek_client.requests, "post", lambda url, json=None, **kwargs: sent.append(json) or response)
+    client = make_client()
+    client.get_response("is it compatible?", raise_errors=True, profile="compatibility")
+    assert sent[0]["max_tokens"] == 150
+    assert client.take_last_usage()["truncated"] is True
+    stats = client.get_profile_stats()["compatibility"]
+    assert (stats["calls"], stats["truncated"], stats["max_tokens"]) == (1, 1, 150)
@@ -0,0 +1,63 @@
+"""Deepseek stub server: canned completions, prompt prefix cache and fault injection"""
+
+import pytest
+import requests
+from circuit_breaker import CircuitBreaker
+from deepseek_client import DeepseekClient
+from deepseek_stub import LatencyModel, StubConfig, apply_limits, canned_intent, start_stub_server_in_thread
+
+
+@pytest.fixture
+def stub():
+    servers = []
+    
+    def start(**options):
+        server = start_stub_server_in_thread(config=StubConfig(seed=1, **options))
+        servers.append(server)
+        host, port = server.server_address[:2]
+        return DeepseekClient(api_key="test", base_url=f"http://{host}:{port}/v1",
+                              breaker=CircuitBreaker(failure_threshold=5, recovery_timeout=60))
+    
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_intents_and_answers_from_stub(stub):
+    client = stub()
+    assert client.analyze_intent("How do I install the water filter?")["intent"] == "installation"
+    assert client.analyze_intent("My dishwasher is leaking")["intent"] == "troubleshooting"
+    assert "You asked" in client.get_response("Tell me about PS11752778", raise_errors=True)
+    assert client.take_last_usage()["prompt_tokens"] > 0
+
+
+def test_repeated_prefix_reports_cache_hits():
+    config = StubConfig()
+    messages = [{"role": "system", "content": "s" * 400}, {"role": "user", "content": "first"}]
+    assert config.match_prefix(messages) == 0
+    follow_up = messages + [{"role": "assistant", "content": "a"}, {"role": "user", "content": "second"}]
+    assert config.match_prefix(follow_up) == 101 + 2
+
+
+def test_injected_failures(stub):
+    client = stub(error_rate=1.0)
+    with pytest.raises(requests.exceptions.HTTPError) as error:
+        client.get_response("hello", raise_errors=True)
+    assert error.value.response.status_code == 500
+    
+    limited = stub(rate_limit_rate=1.0)
+    with pytest.raises(requests.exceptions.HTTPError) as error:
+        limited.get_response("hello", raise_errors=True)
+    assert error.value.response.status_code == 429
+
+
+def test_limits_and_latency_models():
+    assert apply_limits("answer. STOP more", {"stop": ["STOP"]}) == ("answer. ", "stop")
+    assert apply_limits("x" * 100, {"max_tokens": 5}) == ("x" * 20, "length")
+    assert LatencyModel("fixed:25").sample_ms() == 25
+    samples = [LatencyModel("uniform:10,20", seed=3).sample_ms() for _ in range(2)]
+    assert samples[0] == samples[1] and 10 <= samples[0] <= 20
+    with pytest.raises(ValueError):
+        LatencyModel("gamma:1")
+    assert canned_intent("What's the weather?") == "out_of_scope"
@@ -0,0 +1,60 @@
+"""Part/model number extraction against the catalog vocabulary"""
+
+import pytest
+from entity_extractor import EntityExtractor, extract_model_number, is_brand_model, normalize_model
+
+
+class CatalogStub:
+    """The two vector store attributes the extractor reads"""
+    
+    def __init__(self, models):
+        self.metadata = [{"id": f"PS1000000{i}", "compatible_models": [model]} for i, model in enumerate(models)]
+        self.version = 1
+
+
+@pytest.fixture
+def extractor():
+    return EntityExtractor(CatalogStub(["WRF989SDAW", "WDT780SAEM1", "WRF535SMHW"]))
+
+
+def test_catalog_models_tolerate_case_and_separators(extractor):
+    entities = extractor.extract("Does PS11752778 fit my wrf-989 sdaw?")
+    assert entities["part_numbers"] == ["PS11752778"]
+    assert entities["model_numbers"] == ["WRF989SDAW"]
+    assert normalize_model("wdt 780-saem1") == "WDT780SAEM1"
+
+
+def test_partial_catalog_model_is_expanded(extractor):
+    assert extractor.extract("my WDT780SA dishwasher")["model_numbers"] == ["WDT780SAEM1"]
+
+
+@pytest.mark.parametrize("model", ["GSS25GSHSS", "LFXS26973S", "RF28R7351SR", "FFSS2615TS", "SHE3AR75UC", "KDTE334GPS0"])
+def test_unknown_models_in_brand_format_are_kept(extractor, model):
+    assert extractor.extract(f"parts for {model.lower()}")["model_numbers"] == [model]
+    assert is_brand_model(model)
+
+
+@pytest.mark.parametrize("message", [
+    "my fridge has a 1080p screen",
+    "does it work with WiFi6E routers?",
+    "the model is A1B2",
+    "order PS11752778 please",
+    "the store was closed during COVID19",
+    "the file hash is SHA256",
+    "runs on an RTX4090 card",
+    "upgraded to Windows11 yesterday",
+    "my MP3PLAYER broke",
+])
+def test_other_mixed_tokens_are_not_models(extractor, message):
+    assert extractor.extract(message)["model_numbers"] == []
+    assert extract_model_number(message) is None
+
+
+def test_vocabulary_follows_catalog_version():
+    store = CatalogStub(["WRF989SDAW"])
+    extractor = EntityExtractor(store)
+    assert extractor.extract("WRF989SD")["model_numbers"] == ["WRF989SDAW"]
+    
+    store.metadata = [{"id": "PS10000001", "compatible_models": ["WRF989SDXX"]}]
+    store.version = 2
+    assert extractor.extract("WRF989SD")["model_numbers"] == ["WRF989SDXX"]
@@ -0,0 +1,144 @@
+"""Event log: rotation, drops, surviving file errors, and per-turn token usage"""
+
+import json
+import os
+import threading
+import time
+import deepseek_client
+import event_log
+from chat_handler import ChatHandler
+from circuit_breaker import CircuitBreaker
+from deepseek_client import DeepseekClient
+from event_log import EventLog, create_event_log, process_log_path
+from product_service import ProductService
+from sample_products import get_sample_products
+from session_prefetch import SessionPrefetcher
+from vector_store import initialize_vector_store
+
+
+def read_lines(path):
+    with open(path, "rb") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_rotation_keeps_backup_count(tmp_path):
+    path = str(tmp_path / "logs" / "events.jsonl")
+    log = EventLog(path, max_bytes=200, backup_count=2, batch_size=1)
+    for i in range(30):
+        log.log("chat_turn", n=i)
+    log.close()
+    
+    stats = log.stats()
+    assert stats["written"] == 30 and stats["rotations"] >= 3
+    assert os.path.exists(path + ".1") and os.path.exists(path + ".2")
+    assert not os.path.exists(path + ".3")
+    # The newest events are in the current file, the ones before it in .1
+    newest = read_lines(path) if os.path.getsize(path) else []
+    previous = read_lines(path + ".1")
+    assert [e["n"] for e in previous + newest] == list(range(30 - len(previous) - len(newest), 30))
+
+
+def test_each_process_rotates_its_own_file(tmp_path, monkeypatch):
+    assert process_log_path("logs/chat_events.jsonl", pid=42) == "logs/chat_events.42.jsonl"
+    monkeypatch.setenv("EVENT_LOG_PATH", str(tmp_path / "chat_events.jsonl"))
+    log = create_event_log()
+    assert log.path == str(tmp_path / f"chat_events.{os.getpid()}.jsonl")
+    log.close()
+    
+    # Two workers logging at once: each file only ever holds its own events, in order
+    workers = [EventLog(process_log_path(str(tmp_path / "shared.jsonl"), pid), max_bytes=150, backup_count=50, batch_size=1)
+               for pid in (1, 2)]
+    for i in range(20):
+        for worker, log in enumerate(workers):
+            log.log("chat_turn", worker=worker, n=i)
+    for log in workers:
+        log.close()
+    for worker, log in enumerate(workers):
+        files = [f"{log.path}.{i}" for i in range(log.stats()["rotations"], 0, -1)] + [log.path]
+        events = [e for path in files if os.path.exists(path) for e in read_lines(path)]
+        assert [(e["worker"], e["n"]) for e in events] == [(worker, i) for i in range(20)]
+
+
+def test_full_queue_drops_events(tmp_path):
+    gate = threading.Event()
+    
+    class BlockedLog(EventLog):
+        def _write(self, events):
+            gate.wait(5)
+            super()._write(events)
+    
+    log = BlockedLog(str(tmp_path / "events.jsonl"), queue_size=2, batch_size=1)
+    log.log("chat_turn", n=0)
+    while log._queue.qsize():  # Writer took the first event and is blocked on it
+        time.sleep(0.001)
+    assert log.log("chat_turn", n=1) and log.log("chat_turn", n=2)
+    assert not log.log("chat_turn", n=3)
+    gate.set()
+    log.close()
+    assert log.stats()["dropped"] == 1 and log.stats()["written"] == 3
+
+
+def test_writer_survives_failed_reopen(tmp_path, monkeypatch):
+    path = str(tmp_path / "events.jsonl")
+    real_replace = os.replace
+    
+    def replace_and_block(source, target):
+        real_replace(source, target)
+        if target == path + ".1" and not os.path.exists(path + ".2"):
+            os.mkdir(path)  # Reopening path now fails with IsADirectoryError
+    
+    monkeypatch.setattr(event_log.os, "replace", replace_and_block)
+    log = EventLog(path, max_bytes=10, backup_count=3, batch_size=1)
+    log.log("chat_turn", n=0)
+    log.log("chat_turn", n=1)
+    while log._queue.qsize() or log.stats()["failed"] < 1:
+        time.sleep(0.001)
+    assert log._thread.is_alive()
+    
+    os.rmdir(path)
+    log.log("chat_turn", n=2)
+    log.close()
+    assert log.stats()["failed"] == 1
+    # n=1 was lost with the failed reopen; n=2 reopened the file and was rotated in turn
+    assert [e["n"] for e in read_lines(path + ".2")] == [0]
+    assert [e["n"] for e in read_lines(path + ".1")] == [2]
+
+
+class FakeResponse:
+    def __init__(self, content, prompt_tokens):
+        self.status_code = 200
+        self.body = {
+            "choices": [{"message": {"content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 5, "prompt_cache_hit_tokens": 4}
+        }
+    
+    def raise_for_status(self):
+        pass
+    
+    def json(self):
+        return self.body
+
+
+def fake_post(url, json=None, **kwargs):
+    if json.get("response_format"):
+        return FakeResponse('{"intent": "troubleshooting", "entities": {}, "confidence": 0.9}', prompt_tokens=100)
+    return FakeResponse("Check the water inlet valve.", prompt_tokens=700)
+
+
+def test_turn_usage_includes_intent_call(tmp_path, monkeypatch):
+    monkeypatch.setattr(deepseek_client.requests, "post", fake_post)
+    initialize_vector_store(get_sample_products())
+    products = ProductService()
+    llm = DeepseekClient(api_key="test", base_url="http://deepseek.invalid/v1",
+                         breaker=CircuitBreaker(failure_threshold=3, recovery_timeout=60))
+    log = EventLog(str(tmp_path / "events.jsonl"))
+    handler = ChatHandler(deepseek_client=llm, product_service=products, event_log=log,
+                          prefetcher=SessionPrefetcher(products, mode="off"))
+    
+    handler.process_message("My ice maker stopped making ice, how do I fix it?", "usage")
+    log.close()
+    (event,) = read_lines(str(tmp_path / "events.jsonl"))
+    usage = event["usage"]
+    assert [call["profile"] for call in usage["calls"]] == ["intent", "troubleshooting"]
+    assert usage["prompt_tokens"] == 800 and usage["completion_tokens"] == 10
+    assert event["cache"]["prompt_cache_hit_tokens"] == 8
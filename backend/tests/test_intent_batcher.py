@@ -0,0 +1,91 @@
+"""Intent micro-batching across concurrent chat turns and parsing of batched replies"""
+
+import threading
+from circuit_breaker import CircuitBreaker
+from deepseek_client import DeepseekClient
+from intent_batcher import IntentBatcher, create_intent_batcher
+
+
+class FakeLLM:
+    def __init__(self, available: bool = True, fail: bool = False):
+        self.available = available
+        self.fail = fail
+        self.calls = []
+    
+    def is_available(self):
+        return self.available
+    
+    def analyze_intents(self, messages):
+        self.calls.append(list(messages))
+        if self.fail:
+            raise RuntimeError("boom")
+        return [{"intent": "order", "entities": {}, "confidence": 0.9, "message": m} for m in messages]
+    
+    def classify_intent_locally(self, message):
+        return {"intent": "out_of_scope", "entities": {}, "confidence": 0.5, "message": message}
+
+
+def classify_concurrently(batcher, messages):
+    results = [None] * len(messages)
+    
+    def worker(i):
+        results[i] = batcher.classify(messages[i])
+    
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(messages))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_full_batch_shares_one_call_and_keeps_order():
+    llm = FakeLLM()
+    # A long wait: the batch is only sent early because it fills up
+    batcher = IntentBatcher(llm, max_batch_size=4, max_wait_ms=5000)
+    messages = [f"message {i}" for i in range(4)]
+    results = classify_concurrently(batcher, messages)
+    assert len(llm.calls) == 1 and sorted(llm.calls[0]) == messages
+    assert [r["message"] for r in results] == messages
+    assert batcher.stats()["mean_batch_size"] == 4
+
+
+def test_lone_message_is_sent_after_the_wait():
+    llm = FakeLLM()
+    batcher = IntentBatcher(llm, max_batch_size=8, max_wait_ms=1)
+    assert batcher.classify("where is my order")["intent"] == "order"
+    assert batcher.classify("again")["intent"] == "order"
+    assert llm.calls == [["where is my order"], ["again"]]
+
+
+def test_failed_call_falls_back_for_every_message():
+    llm = FakeLLM(fail=True)
+    batcher = IntentBatcher(llm, max_batch_size=2, max_wait_ms=5000)
+    results = classify_concurrently(batcher, ["a", "b"])
+    assert [r["intent"] for r in results] == ["out_of_scope", "out_of_scope"]
+    assert sorted(r["message"] for r in results) == ["a", "b"]
+
+
+def test_unavailable_llm_is_not_called():
+    llm = FakeLLM(available=False)
+    assert IntentBatcher(llm).classify("hi")["intent"] == "out_of_scope"
+    assert llm.calls == []
+
+
+def test_batch_size_is_capped_at_concurrent_callers(monkeypatch):
+    monkeypatch.setenv("INTENT_BATCH_SIZE", "16")
+    assert create_intent_batcher(FakeLLM()).max_batch_size == 16
+    assert create_intent_batcher(FakeLLM(), max_callers=4).max_batch_size == 4
+    assert create_intent_batcher(FakeLLM(), max_callers=1) is None
+
+
+def test_batched_reply_with_missing_intents_uses_keywords(monkeypatch):
+    client = DeepseekClient(api_key="test", base_url="http://deepseek.invalid/v1",
+                            breaker=CircuitBreaker(failure_threshold=10, recovery_timeout=60))
+    monkeypatch.setattr(client, "_complete", lambda payload, **kwargs: 'Sure: {"intents": ["order", "weather"]}')
+    messages = ["where is my order", "how do I install the ice maker", "is PS11752778 compatible with WRF555SDFZ?"]
+    results = client.analyze_intents(messages)
+    assert results[0]["intent"] == "order"
+    assert results[1] == client.classify_intent_locally(messages[1])
+    assert results[2] == client.classify_intent_locally(messages[2])
+    assert DeepseekClient.parse_intents("not json") == []
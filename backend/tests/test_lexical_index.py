@@ -0,0 +1,72 @@
+"""BM25 index: early-terminated search against exhaustive scoring, and score fusion"""
+
+import random
+import pytest
+from lexical_index import BM25Index, fuse_scores, tokenize
+
+
+def synthetic_products(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(60)]
+    # Skewed term frequencies, so posting lists differ a lot in length and impact
+    weights = [1.0 / (i + 1) for i in range(len(vocabulary))]
+    return [
+        {
+            "id": f"PS{i}",
+            "name": " ".join(rng.choices(vocabulary, weights, k=rng.randint(1, 4))),
+            "description": " ".join(rng.choices(vocabulary, weights, k=rng.randint(3, 30))),
+            "category": rng.choice(["refrigerator", "dishwasher"])
+        }
+        for i in range(n)
+    ]
+
+
+def exhaustive_scores(index: BM25Index, query: str):
+    scores = {}
+    for term in dict.fromkeys(tokenize(query)):
+        if term in index.postings:
+            docs, impacts, _ = index.postings[term]
+            for doc_id, impact in zip(docs, impacts):
+                scores[doc_id] = scores.get(doc_id, 0.0) + impact
+    return sorted(scores.values(), reverse=True)
+
+
+@pytest.mark.parametrize("top_k", [1, 5, 20])
+def test_early_termination_matches_exhaustive_top_k(top_k):
+    index = BM25Index()
+    index.build(synthetic_products(500))
+    rng = random.Random(top_k)
+    for _ in range(50):
+        query = " ".join(f"term{rng.randrange(70)}" for _ in range(rng.randint(1, 5)))
+        hits = index.search(query, top_k=top_k)
+        expected = exhaustive_scores(index, query)[:top_k]
+        assert [round(score, 9) for _, score in hits] == [round(score, 9) for score in expected]
+        for doc_id, score in hits:
+            assert score == pytest.approx(sum(
+                index.postings[t][1][index.postings[t][2][doc_id]]
+                for t in dict.fromkeys(tokenize(query)) if t in index.postings and doc_id in index.postings[t][2]
+            ))
+
+
+def test_posting_lists_are_impact_ordered():
+    index = BM25Index()
+    index.build(synthetic_products(200))
+    for docs, impacts, positions in index.postings.values():
+        assert impacts == sorted(impacts, reverse=True)
+        assert all(positions[doc_id] == pos for pos, doc_id in enumerate(docs))
+
+
+def test_search_edge_cases():
+    index = BM25Index()
+    index.build([{"id": "PS1", "name": "Ice Maker Assembly"}, {"id": "PS2", "name": "Door Gasket"}])
+    assert index.search("the and of") == []
+    assert index.search("unknownword") == []
+    assert index.search("ice", top_k=0) == []
+    assert [doc for doc, _ in index.search("ice maker gasket", top_k=5)] == [0, 1]
+
+
+def test_fuse_scores_normalizes_each_side():
+    fused = fuse_scores({"a": 10.0, "b": 5.0}, {"b": 0.8, "c": 0.4}, lexical_weight=0.6)
+    assert fused == pytest.approx({"a": 0.6, "b": 0.3 + 0.4, "c": 0.2})
+    # A side without signal contributes nothing
+    assert fuse_scores({"a": 2.0}, {"b": 0.0}) == pytest.approx({"a": 0.6, "b": 0.0})
@@ -0,0 +1,66 @@
+"""Counters, histograms, stage timers and the Prometheus rendering"""
+
+import time
+from metrics import Histogram, MetricsRegistry, StageTimer
+
+
+def test_counter_and_gauge_labels():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests", labelnames=("outcome",))
+    counter.inc(outcome="ok")
+    counter.inc(2, outcome="ok")
+    counter.inc(outcome="error")
+    assert counter.value(outcome="ok") == 3 and counter.value(outcome="error") == 1
+    assert registry.counter("requests_total", "Requests", labelnames=("outcome",)) is counter
+    
+    gauge = registry.gauge("depth", "Queue depth")
+    gauge.set(5)
+    gauge.dec(2)
+    assert gauge.value() == 3
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", labelnames=("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, stage="intent")
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{stage="intent",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="intent",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{stage="intent",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{stage="intent"} 4' in lines
+    assert histogram.count(stage="intent") == 4 and histogram.count(stage="other") == 0
+
+
+def test_render_exposition_format():
+    registry = MetricsRegistry()
+    registry.counter("b_total", "Second", labelnames=("path",)).inc(path='a"b\\c')
+    registry.histogram("a_seconds", "First", buckets=(1.0,)).observe(0.5)
+    text = registry.render()
+    assert text.index("# HELP a_seconds First") < text.index("# HELP b_total Second")
+    assert "# TYPE a_seconds histogram" in text and "# TYPE b_total counter" in text
+    assert 'b_total{path="a\\"b\\\\c"} 1.0' in text
+    assert text.endswith("\n")
+
+
+def test_stage_timer_accumulates_and_feeds_histogram():
+    histogram = Histogram("stage_seconds", "Stages", labelnames=("stage",))
+    timer = StageTimer(histogram)
+    for _ in range(2):
+        with timer.stage("retrieval"):
+            time.sleep(0.002)
+    summary = timer.summary()
+    assert summary["retrieval"] >= 4 and summary["total"] >= summary["retrieval"]
+    assert histogram.count(stage="retrieval") == 2
+
+
+def test_metrics_endpoint_and_chat_timings(app_client):
+    response = app_client.post("/api/chat", json={"message": "Tell me about PS11752778", "sessionId": "timings"},
+                               headers={"X-Debug-Timings": "1"})
+    assert response.status_code == 200
+    timings = response.get_json()["metadata"]["timings_ms"]
+    assert {"entity_extraction", "total"} <= set(timings)
+    assert "metadata" not in app_client.post("/api/chat", json={"message": "hi", "sessionId": "timings"}).get_json()
+    
+    metrics = app_client.get("/metrics")
+    assert metrics.status_code == 200 and metrics.mimetype == "text/plain"
+    assert "chat_stage_seconds_count" in metrics.get_data(as_text=True)
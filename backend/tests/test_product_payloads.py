@@ -0,0 +1,68 @@
+"""Pre-encoded product cards, JSON splicing and response compression"""
+
+import gzip
+import json
+from werkzeug.datastructures import Accept
+from product_payloads import RawJSON, ProductPayloads, compress, dumps, encode_json, negotiate_encoding
+from product_service import ProductService
+from sample_products import get_sample_products
+from vector_store import initialize_vector_store
+
+
+def test_encode_json_splices_raw_fragments():
+    payload = {"a": [1, RawJSON(b'{"x":1}')], "b": {"c": RawJSON(b"[2,3]")}, "text": "café"}
+    assert json.loads(encode_json(payload)) == {"a": [1, {"x": 1}], "b": {"c": [2, 3]}, "text": "café"}
+    assert json.loads(dumps({"k": "v"})) == {"k": "v"}
+
+
+def test_cards_match_formatted_products():
+    initialize_vector_store(get_sample_products())
+    service = ProductService()
+    results = service.search_products("ice maker", top_k=3)
+    cards = json.loads(service.payloads.cards(results).data)
+    assert cards == json.loads(json.dumps(service.format_products_for_chat(results)))
+
+
+def test_cards_follow_catalog_version():
+    class Store:
+        version = 1
+    
+    store = Store()
+    names = {"name": "old"}
+    payloads = ProductPayloads(store, lambda p: {"id": p["id"], "name": names["name"]})
+    assert json.loads(payloads.card({"id": "PS1", "score": 0.5}))["name"] == "old"
+    
+    names["name"] = "new"
+    assert json.loads(payloads.card({"id": "PS1"}))["name"] == "old"  # cached
+    store.version = 2
+    card = json.loads(payloads.card({"id": "PS1", "score": 0.25}))
+    assert card == {"id": "PS1", "name": "new", "relevance_score": 0.25}
+
+
+def test_card_cache_drops_oldest_cards_past_its_cap():
+    class Store:
+        version = 1
+    
+    payloads = ProductPayloads(Store(), lambda p: {"id": p["id"]}, max_cards=2)
+    for product_id in ("PS1", "PS2", "PS3"):
+        payloads.card({"id": product_id})
+    assert list(payloads._cards) == ["PS2", "PS3"]
+    assert payloads.stats()["cards"] == 2
+
+
+def test_negotiate_encoding_respects_size_and_accept():
+    accept = Accept([("gzip", 1)])
+    assert negotiate_encoding(accept, 100, min_bytes=1024) is None
+    assert negotiate_encoding(accept, 4096, min_bytes=1024) == "gzip"
+    assert negotiate_encoding(Accept([]), 4096, min_bytes=1024) is None
+    body = b'{"products":[]}' * 200
+    assert gzip.decompress(compress(body, "gzip")) == body
+
+
+def test_chat_response_uses_preencoded_cards(app_client):
+    response = app_client.post("/api/chat", json={"message": "What parts fit WRF989SDAW?", "sessionId": "cards"})
+    assert response.status_code == 200
+    data = response.get_json()["response"]["data"]
+    assert data["products"] and all("relevance_score" in card for card in data["products"])
+    for rail in data["related"]:
+        assert all("link" in card for card in rail["products"])
@@ -0,0 +1,51 @@
+"""Batched product search: same results as single searches, and the batch endpoint"""
+
+import pytest
+from product_service import ProductService
+from sample_products import get_sample_products
+from vector_store import initialize_vector_store
+
+
+QUERIES = ["ice maker", "dishwasher spray arm", "door gasket", "water filter"]
+
+
+@pytest.fixture(scope="module")
+def service():
+    initialize_vector_store(get_sample_products())
+    return ProductService()
+
+
+def ids(results):
+    return [p["id"] for p in results]
+
+
+@pytest.mark.parametrize("category", [None, "dishwasher"])
+def test_batch_matches_single_searches(service, category):
+    batch = service.search_products_batch(QUERIES, category=category, top_k=3)
+    assert [ids(r) for r in batch] == [ids(service.search_products(q, category=category, top_k=3)) for q in QUERIES]
+    if category:
+        assert all(p["category"].lower() == category for r in batch for p in r)
+
+
+def test_vector_batch_matches_single(service):
+    store = service.vector_store
+    batch = store.search_batch(QUERIES, top_k=4)
+    for query, results in zip(QUERIES, batch):
+        single = store.search(query, top_k=4)
+        assert ids(results) == ids(single)
+        assert [p["score"] for p in results] == pytest.approx([p["score"] for p in single])
+
+
+def test_batch_endpoint(app_client):
+    response = app_client.post("/api/products/search/batch", json={"queries": QUERIES[:2], "limit": 2})
+    assert response.status_code == 200
+    results = response.get_json()["response"]["data"]["results"]
+    assert [r["query"] for r in results] == QUERIES[:2]
+    assert all(len(r["products"]) <= 2 for r in results)
+
+
+@pytest.mark.parametrize("body", [{}, {"queries": []}, {"queries": "ice"}, {"queries": ["ice", "  "]}, {"queries": ["q"] * 1000}])
+def test_batch_endpoint_rejects_bad_queries(app_client, body):
+    response = app_client.post("/api/products/search/batch", json=body)
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
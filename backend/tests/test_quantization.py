@@ -0,0 +1,83 @@
+"""int8 vector storage: quantization error, memory, and recall with float re-ranking"""
+
+import numpy as np
+import pytest
+from benchmark import generate_catalog, generate_queries, recall_at_k
+from vector_store import VectorStore, quantize_int8
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    products = generate_catalog(2000, seed=5)
+    return products, generate_queries(products, 100, seed=3)
+
+
+def build(products, **options):
+    store = VectorStore(**options)
+    store.initialize_from_products(products)
+    return store
+
+
+def test_quantize_int8_roundtrip():
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(500, 32)).astype(np.float32)
+    embeddings[:, 5] = 0.0  # An unused dimension must not divide by zero
+    codes, scales = quantize_int8(embeddings)
+    assert codes.dtype == np.int8 and scales.dtype == np.float32
+    assert np.all(np.abs(codes.astype(np.float32) * scales - embeddings) <= scales / 2 + 1e-6)
+    assert np.all(codes[:, 5] == 0)
+
+
+def test_int8_index_is_about_four_times_smaller(catalog):
+    products, _ = catalog
+    usage = build(products, quantization="int8", rerank_factor=0).memory_usage()
+    assert usage["index_bytes"] < usage["float32_bytes"] / 3.5
+    assert usage["rerank_bytes"] == 0 and usage["total_bytes"] == usage["index_bytes"]
+
+
+def test_rerank_rows_are_counted_in_memory_usage(catalog):
+    products, _ = catalog
+    usage = build(products, quantization="int8", rerank_factor=4).memory_usage()
+    assert usage["rerank_bytes"] == usage["float32_bytes"]
+    assert usage["total_bytes"] == usage["index_bytes"] + usage["rerank_bytes"]
+    assert usage["rerank_storage"] == "mmap"
+
+
+@pytest.mark.parametrize("storage", ["mmap", "memory"])
+def test_rerank_reads_stored_rows_instead_of_re_embedding(catalog, monkeypatch, storage):
+    products, queries = catalog
+    exact = build(products, quantization="none").search_batch(queries[:20], top_k=10)
+    store = build(products, quantization="int8", rerank_factor=4, rerank_storage=storage)
+    assert isinstance(store.rerank_vectors, np.memmap) == (storage == "mmap")
+    
+    def embed_products(*args):
+        raise AssertionError("product text re-embedded at query time")
+    
+    monkeypatch.setattr(store, "_product_text", embed_products)
+    reranked = store.search_batch(queries[:20], top_k=10)
+    for expected, found in zip(exact, reranked):
+        assert [p["score"] for p in found] == pytest.approx([p["score"] for p in expected], abs=1e-5)
+
+
+def test_reranked_int8_recall_matches_float(catalog):
+    products, queries = catalog
+    exact = build(products, quantization="none").search_batch(queries, top_k=10)
+    reranked = build(products, quantization="int8", rerank_factor=4).search_batch(queries, top_k=10)
+    assert recall_at_k(exact, reranked, k=10) >= 0.99
+    # Re-ranked scores are exact float scores
+    for expected, found in zip(exact, reranked):
+        assert [p["score"] for p in found] == pytest.approx([p["score"] for p in expected], abs=1e-5)
+
+
+def test_int8_without_rerank_keeps_high_recall(catalog):
+    products, queries = catalog
+    exact = build(products, quantization="none").search_batch(queries, top_k=10)
+    approximate = build(products, quantization="int8", rerank_factor=0).search_batch(queries, top_k=10)
+    assert recall_at_k(exact, approximate, k=10) >= 0.9
+
+
+def test_unknown_quantization_is_rejected():
+    with pytest.raises(ValueError):
+        VectorStore(quantization="int4")
+    with pytest.raises(ValueError):
+        VectorStore(rerank_storage="disk")
@@ -0,0 +1,82 @@
+"""Catalog result cache invalidation and conditional GET (ETag/304) on catalog endpoints"""
+
+from result_cache import ResultCache
+
+
+class StoreStub:
+    def __init__(self):
+        self.version = 1
+
+
+def test_hits_misses_and_lru_eviction():
+    cache = ResultCache("test", StoreStub(), max_entries=2)
+    calls = []
+    compute = lambda key: lambda: calls.append(key) or key.upper()
+    assert cache.get_or_compute("a", compute("a")) == "A"
+    assert cache.get_or_compute("a", compute("a")) == "A"
+    cache.get_or_compute("b", compute("b"))
+    cache.get_or_compute("a", compute("a"))
+    cache.get_or_compute("c", compute("c"))  # evicts b, the least recently used
+    cache.get_or_compute("b", compute("b"))
+    assert calls == ["a", "b", "c", "b"]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 4, 2)
+
+
+def test_version_change_empties_the_cache():
+    store = StoreStub()
+    cache = ResultCache("test", store)
+    cache.get_or_compute("q", lambda: "old")
+    store.version += 1
+    assert cache.get_or_compute("q", lambda: "new") == "new"
+    assert cache.stats()["catalog_version"] == 2
+
+
+def test_value_computed_across_a_rebuild_is_not_stored():
+    store = StoreStub()
+    cache = ResultCache("test", store)
+    
+    def compute():
+        store.version += 1
+        return "stale"
+    
+    cache.get_or_compute("q", compute)
+    assert cache.stats()["entries"] == 0
+
+
+def test_disabled_cache_always_computes():
+    cache = ResultCache("test", StoreStub(), max_entries=0)
+    cache.get_or_compute("q", lambda: 1)
+    assert cache.get_or_compute("q", lambda: 2) == 2
+
+
+def test_search_etag_answers_304(app_client):
+    url = "/api/products/search?q=ice+maker&limit=3"
+    first = app_client.get(url)
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "no-cache"
+    etag = first.headers["ETag"]
+    
+    revalidated = app_client.get(url, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.get_data() == b""
+    
+    other = app_client.get("/api/products/search?q=dishwasher+rack&limit=3", headers={"If-None-Match": etag})
+    assert other.status_code == 200
+
+
+def test_compressed_response_keeps_a_matching_weak_etag(app_client):
+    url = "/api/products/search?q=ice+maker&limit=20"
+    plain = app_client.get(url, headers={"Accept-Encoding": "identity"})
+    compressed = app_client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["ETag"].startswith("W/")
+    assert compressed.headers["ETag"][2:] == plain.headers["ETag"]
+    
+    revalidated = app_client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+
+def test_post_compatibility_is_not_conditional(app_client):
+    response = app_client.post("/api/compatibility", json={"part_number": "PS11752778", "model_number": "WRF555SDFZ"})
+    assert "ETag" not in response.headers
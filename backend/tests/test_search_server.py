@@ -0,0 +1,108 @@
+"""Search server protocol and the RemoteVectorStore client"""
+
+import os
+import threading
+import time
+import pytest
+from sample_products import get_sample_products
+from compat_graph import CompatGraph
+from entity_extractor import EntityExtractor
+from search_server import (OP_METADATA, OP_WATCH, RemoteCompatGraph, RemoteEntityExtractor, RemoteSuggestIndex, RemoteVectorStore,
+                           SearchService, pack_hits, pack_strings, start_search_server_in_thread, unpack_hits, unpack_strings)
+from suggest_index import SuggestIndex
+from vector_store import VectorStore
+
+
+@pytest.fixture
+def served_store(tmp_path):
+    store = VectorStore()
+    store.initialize_from_products(get_sample_products())
+    socket_path = os.path.join(str(tmp_path), "search.sock")
+    server = start_search_server_in_thread(store, socket_path)
+    yield store, socket_path
+    server.shutdown()
+    server.server_close()
+
+
+def test_frames_roundtrip():
+    assert unpack_strings(pack_strings(["ice maker", "", "café"])) == ["ice maker", "", "café"]
+    hits = unpack_hits(pack_hits([[3, 1], []], [[0.5, 0.25], []]), 2)
+    assert hits == [[(3, 0.5), (1, 0.25)], []]
+
+
+def test_remote_results_match_local(served_store):
+    store, socket_path = served_store
+    client = RemoteVectorStore(socket_path)
+    try:
+        local = store.search_batch(["dishwasher filter", "ice maker"], top_k=3)
+        remote = client.search_batch(["dishwasher filter", "ice maker"], top_k=3)
+        assert [[p["id"] for p in r] for r in remote] == [[p["id"] for p in r] for r in local]
+        assert client.get_by_id(local[0][0]["id"].lower())["id"] == local[0][0]["id"]
+        assert client.get_by_id("PS00000000") is None
+    finally:
+        client.close()
+
+
+def test_catalog_indexes_are_served_without_a_worker_copy(served_store, monkeypatch):
+    store, socket_path = served_store
+    client = RemoteVectorStore(socket_path)
+    try:
+        ops = []
+        original_call = client._call
+        monkeypatch.setattr(client, "_call", lambda op, *args, **kwargs: ops.append(op) or original_call(op, *args, **kwargs))
+        model = store.metadata[0]["compatible_models"][0]
+        part_id = store.metadata[0]["id"]
+        
+        message = f"Does {part_id} fit {model.lower()}?"
+        assert RemoteEntityExtractor(client).extract(message) == EntityExtractor(store).extract(message)
+        assert RemoteSuggestIndex(client).suggest(model[:3], limit=4) == SuggestIndex(store).suggest(model[:3], limit=4)
+        local_graph, remote_graph = CompatGraph(store), RemoteCompatGraph(client)
+        assert remote_graph.refresh()["models"] == local_graph.refresh()["models"]
+        assert remote_graph.parts_for_model(model, limit=2) == local_graph.parts_for_model(model, limit=2)
+        assert remote_graph.related_parts(part_id, exclude=[part_id]) == local_graph.related_parts(part_id, exclude=[part_id])
+        assert client.search_by_model(model) == store.search_by_model(model)
+        remote_hits, local_hits = client.search_lexical("ice maker", top_k=3), store.search_lexical("ice maker", top_k=3)
+        assert [p["id"] for p in remote_hits] == [p["id"] for p in local_hits]
+        assert [p["score"] for p in remote_hits] == pytest.approx([p["score"] for p in local_hits], rel=1e-6)
+        
+        assert ops and OP_METADATA not in ops  # The worker never pulls the catalog
+    finally:
+        client.close()
+
+
+def test_version_change_is_pushed_to_clients(served_store, monkeypatch):
+    _, socket_path = served_store
+    reader, writer = RemoteVectorStore(socket_path), RemoteVectorStore(socket_path)
+    try:
+        version = reader.version
+        calls = []
+        original_call = reader._call
+        monkeypatch.setattr(reader, "_call", lambda *args, **kwargs: calls.append(args) or original_call(*args, **kwargs))
+        assert reader.version == version
+        assert not [args for args in calls if args[0] != OP_WATCH]  # Reading the version makes no request
+        
+        writer.upsert_products([dict(get_sample_products()[0], id="PS99999999", part_number="PS99999999")])
+        deadline = time.monotonic() + 2
+        while reader.version == version and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert reader.version == version + 1
+        assert any(p["id"] == "PS99999999" for p in reader.metadata)
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_watch_returns_on_change_or_timeout():
+    store = VectorStore()
+    store.initialize_from_products(get_sample_products())
+    service = SearchService(store)
+    assert service.watch(store.version, timeout=0.01) == store.version
+    assert service.watch(store.version - 1, timeout=5) == store.version
+    
+    result = []
+    watcher = threading.Thread(target=lambda: result.append(service.watch(store.version, timeout=5)))
+    watcher.start()
+    time.sleep(0.05)
+    service.load(get_sample_products())
+    watcher.join(2)
+    assert result == [store.version + 1]
@@ -0,0 +1,82 @@
+"""Session prefetch: model lookups, no waiting on unfinished prefetches, boosting"""
+
+import threading
+import time
+from session_prefetch import SessionPrefetcher
+
+
+class ProductServiceStub:
+    """search_by_model over a fixed part list; can be held to keep a prefetch running"""
+    
+    def __init__(self, parts):
+        self.parts = parts
+        self.vector_store = type("Store", (), {"version": 1})()
+        self.context_builder = type("Builder", (), {"get_snippet": lambda self, product: ""})()
+        self.release = threading.Event()
+        self.release.set()
+    
+    def search_by_model(self, model_number):
+        self.release.wait()
+        return list(self.parts)
+
+
+def parts(n):
+    return [{"id": f"PS{i}"} for i in range(n)]
+
+
+def wait_ready(prefetch):
+    prefetch.future.result(timeout=5)
+
+
+def test_model_parts_from_finished_prefetch():
+    prefetcher = SessionPrefetcher(ProductServiceStub(parts(5)), max_parts=10)
+    prefetch = prefetcher.start("WRF989SDAW")
+    wait_ready(prefetch)
+    assert [p["id"] for p in prefetcher.model_parts("wrf-989sdaw", prefetch)] == [f"PS{i}" for i in range(5)]
+    assert prefetcher.model_parts("KDTE334GPS0", prefetch) is None
+
+
+def test_capped_prefetch_falls_back_to_full_lookup():
+    prefetcher = SessionPrefetcher(ProductServiceStub(parts(12)), max_parts=10)
+    prefetch = prefetcher.start("WRF989SDAW")
+    wait_ready(prefetch)
+    assert len(prefetch.future.result()["parts"]) == 10
+    assert prefetcher.model_parts("WRF989SDAW", prefetch) is None
+    
+    exact = SessionPrefetcher(ProductServiceStub(parts(10)), max_parts=10)
+    prefetch = exact.start("WRF989SDAW")
+    wait_ready(prefetch)
+    assert len(exact.model_parts("WRF989SDAW", prefetch)) == 10
+
+
+def test_unfinished_prefetch_is_not_waited_for():
+    service = ProductServiceStub(parts(3))
+    service.release.clear()
+    prefetcher = SessionPrefetcher(service)
+    prefetch = prefetcher.start("WRF989SDAW")
+    try:
+        start = time.perf_counter()
+        assert prefetcher.model_parts("WRF989SDAW", prefetch) is None
+        assert time.perf_counter() - start < 0.1
+        assert not prefetcher.boosting(prefetch)
+    finally:
+        service.release.set()
+
+
+def test_rank_boost_and_restrict():
+    results = [{"id": "PS9"}, {"id": "PS1"}, {"id": "PS8"}, {"id": "PS0"}]
+    for mode, expected in (("boost", ["PS1", "PS0", "PS9"]), ("restrict", ["PS1", "PS0"])):
+        prefetcher = SessionPrefetcher(ProductServiceStub(parts(3)), mode=mode)
+        prefetch = prefetcher.start("WRF989SDAW")
+        wait_ready(prefetch)
+        assert [p["id"] for p in prefetcher.rank(results, prefetch, top_k=3)] == expected
+
+
+def test_catalog_change_invalidates_prefetch():
+    service = ProductServiceStub(parts(3))
+    prefetcher = SessionPrefetcher(service)
+    prefetch = prefetcher.start("WRF989SDAW")
+    wait_ready(prefetch)
+    service.vector_store.version = 2
+    assert prefetcher.model_parts("WRF989SDAW", prefetch) is None
+    assert prefetcher.start("WRF989SDAW", prefetch) is not prefetch
@@ -0,0 +1,117 @@
+"""Sharded vector store: partitioning, merge order and rebuilds in the search service"""
+
+import os
+import threading
+from search_server import SearchService, start_search_server_in_thread
+from sample_products import get_sample_products
+from sharded_store import ShardedVectorStore, merge_top_k, partition_products
+from vector_store import VectorStore
+
+
+def test_merge_top_k_orders_across_shards():
+    shard_hits = [
+        ([0, 3, 5], [0.9, 0.5, 0.1]),
+        ([1, 4], [0.8, 0.6]),
+        ([], []),
+        ([2], [0.95]),
+    ]
+    assert merge_top_k(shard_hits, 4) == ([2, 0, 1, 4], [0.95, 0.9, 0.8, 0.6])
+    positions, scores = merge_top_k(shard_hits, 10)
+    assert positions == [2, 0, 1, 4, 3, 5] and scores == sorted(scores, reverse=True)
+
+
+def test_partition_products_covers_catalog_once():
+    products = get_sample_products()
+    for mode in ("hash", "category"):
+        groups = partition_products(products, 3, mode)
+        assert sorted(i for rows in groups for i in rows) == list(range(len(products)))
+        assert all(rows == sorted(rows) for rows in groups)
+    
+    by_category = partition_products(products, 3, "category")
+    for rows in by_category:
+        shards_of_category = {products[i]['category'].lower() for i in rows}
+        for other in by_category:
+            if other is not rows:
+                assert not shards_of_category & {products[i]['category'].lower() for i in other}
+
+
+def test_sharded_search_matches_single_store():
+    products = get_sample_products()
+    single, sharded = VectorStore(), ShardedVectorStore(num_shards=3)
+    single.initialize_from_products(products)
+    sharded.initialize_from_products(products)
+    queries = ["dishwasher filter basket", "refrigerator water filter", "ice maker not working"]
+    expected_positions, expected_scores = single.search_positions(queries, len(products))
+    positions, scores = sharded.search_positions(queries, 5)
+    for q in range(len(queries)):
+        # The demo embedding has many ties, so compare scores rather than tie order
+        exact = dict(zip(expected_positions[q], expected_scores[q]))
+        assert [round(s, 5) for s in scores[q]] == [round(s, 5) for s in expected_scores[q][:5]]
+        assert all(abs(exact[p] - s) < 1e-5 for p, s in zip(positions[q], scores[q]))
+    sharded.close()
+
+
+def test_upsert_keeps_sharded_store():
+    store = ShardedVectorStore(num_shards=2, partition="category")
+    store.initialize_from_products(get_sample_products())
+    service = SearchService(store)
+    new_part = dict(get_sample_products()[0], id="PS99999999", part_number="PS99999999")
+    
+    service.upsert([new_part])
+    assert isinstance(service.store, ShardedVectorStore)
+    assert service.store.num_shards == 2 and service.store.partition == "category"
+    assert service.store.version == store.version + 1
+    assert "PS99999999" in service.store.id_index
+    
+    service.load(get_sample_products())
+    assert isinstance(service.store, ShardedVectorStore) and service.store.num_shards == 2
+
+
+def test_search_during_upsert_on_remote_shards(tmp_path):
+    paths = [os.path.join(str(tmp_path), f"shard-{i}.sock") for i in range(3)]
+    servers = [start_search_server_in_thread(VectorStore(), path) for path in paths]
+    store = ShardedVectorStore(shard_sockets=paths)
+    store.initialize_from_products(get_sample_products())
+    service = SearchService(store)
+    catalogs = {store.version: list(store.metadata)}
+    queries = ["dishwasher filter basket", "refrigerator water filter", "ice maker not working"]
+    
+    results, errors = [], []
+    stop = threading.Event()
+    
+    def search():
+        while not stop.is_set():
+            try:
+                results.append(service.search(queries, 5))
+            except Exception as e:
+                errors.append(e)
+    
+    searcher = threading.Thread(target=search)
+    searcher.start()
+    try:
+        # Copies of existing products rank for the same queries and land at new shard rows
+        for n in range(8):
+            new_parts = [dict(p, id=f"PS9{n}{i:06d}", part_number=f"PS9{n}{i:06d}") for i, p in enumerate(get_sample_products()[:4])]
+            service.upsert(new_parts)
+            catalogs[service.store.version] = list(service.store.metadata)
+    finally:
+        stop.set()
+        searcher.join(10)
+    
+    assert not errors and len(results) > 0
+    for version, all_positions, all_scores in results:
+        reference = VectorStore()
+        reference.initialize_from_products(catalogs[version])
+        expected_positions, expected_scores = reference.search_positions(queries, len(catalogs[version]))
+        for q in range(len(queries)):
+            # Every hit is a product of the catalog version the answer names, with its exact score
+            exact = dict(zip(expected_positions[q], expected_scores[q]))
+            assert len(all_positions[q]) == 5
+            assert all(abs(exact[p] - s) < 1e-5 for p, s in zip(all_positions[q], all_scores[q]))
+    
+    # The replaced store is closed and its shard clients never watched the servers
+    assert all(shard._closed.is_set() and shard._watcher is None for shard in store._remote)
+    service.store.close()
+    for server in servers:
+        server.shutdown()
+        server.server_close()
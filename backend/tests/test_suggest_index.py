@@ -0,0 +1,62 @@
+"""Typeahead prefix index for part and model numbers"""
+
+import pytest
+from suggest_index import SuggestIndex
+
+
+class CatalogStub:
+    def __init__(self, metadata):
+        self.metadata = metadata
+        self.version = 1
+
+
+def catalog():
+    return CatalogStub([
+        {"id": "PS11752778", "name": "Ice Maker", "reviews_count": 40, "compatible_models": ["WRF989SDAW", "WRF555SDFZ"]},
+        {"id": "PS11752779", "name": "Door Gasket", "reviews_count": 90, "compatible_models": ["WRF989SDAW"]},
+        {"id": "PS1175", "name": "Short Id", "reviews_count": 1, "compatible_models": "WDT780SAEM1"},
+    ])
+
+
+def values(result):
+    return [s["value"] for s in result["suggestions"]]
+
+
+def test_exact_match_first_then_popularity():
+    index = SuggestIndex(catalog())
+    assert values(index.suggest("ps1175")) == ["PS1175", "PS11752779", "PS11752778"]
+    assert values(index.suggest("PS117527")) == ["PS11752779", "PS11752778"]
+
+
+def test_models_ignore_case_and_separators():
+    index = SuggestIndex(catalog())
+    result = index.suggest("wrf-9")
+    assert result["suggestions"] == [{"value": "WRF989SDAW", "type": "model", "label": "2 compatible parts"}]
+    assert values(index.suggest("WRF", kind="model")) == ["WRF989SDAW", "WRF555SDFZ"]
+    assert values(index.suggest("WRF", kind="part")) == []
+    assert index.suggest("  ") == {"suggestions": [], "has_more": False}
+
+
+def test_limit_and_scan_cap_report_has_more():
+    index = SuggestIndex(catalog())
+    assert index.suggest("PS", limit=2)["has_more"] is True
+    assert index.suggest("PS", limit=3)["has_more"] is False
+    capped = SuggestIndex(catalog(), max_scan=1)
+    assert capped.suggest("PS", limit=5)["has_more"] is True
+
+
+def test_rebuilt_on_catalog_change():
+    store = catalog()
+    index = SuggestIndex(store)
+    assert values(index.suggest("KD")) == []
+    store.metadata = store.metadata + [{"id": "PS2", "compatible_models": ["KDTE334GPS0"]}]
+    store.version += 1
+    assert values(index.suggest("KD")) == ["KDTE334GPS0"]
+
+
+@pytest.mark.parametrize("query,status", [("prefix=PS", 200), ("prefix=", 400), ("prefix=PS&type=brand", 400)])
+def test_suggest_endpoint(app_client, query, status):
+    response = app_client.get(f"/api/suggest?{query}")
+    assert response.status_code == status
+    if status == 200:
+        assert all(s["value"].startswith("PS") for s in response.get_json()["response"]["data"]["suggestions"])
@@ -6,19 +6,82 @@ Uses FAISS for local vector database (no external dependencies)
 
 import json
 import os
+import tempfile
 import numpy as np
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
+from lexical_index import BM25Index
+from metrics import get_metrics_registry
+
+
+SEARCH_LATENCY = get_metrics_registry().histogram(
+    "vector_search_seconds", "Latency of catalog index searches", labelnames=("index",)
+)
+SEARCH_BATCH_SIZE = get_metrics_registry().histogram(
+    "vector_search_batch_size", "Queries per vector index search call",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500)
+)
+
+# Storage modes for the vector index
+QUANTIZATION_MODES = ("none", "int8")
+
+# Where the float32 rows used to re-rank int8 candidates are kept
+RERANK_STORAGE_MODES = ("mmap", "memory")
+
+# Rows scored per block when searching int8 codes with numpy (bounds the float copy made per block)
+INT8_BLOCK_ROWS = 16384
+
+
+class CatalogChanged(Exception):
+    """Raised by a search that reached an index already serving a newer catalog; retry on the current store"""
+
+
+def quantize_int8(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-dimension int8 scalar quantization
+    
+    Returns:
+        Tuple of (codes, scales) with embeddings ~= codes * scales
+    """
+    scales = np.abs(embeddings).max(axis=0) / 127.0 if len(embeddings) else np.ones(embeddings.shape[1])
+    scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(embeddings / scales), -127, 127).astype(np.int8)
+    return codes, scales
 
 
 class VectorStore:
     """Local vector store using FAISS for similarity search"""
     
-    def __init__(self, embedding_dim: int = 384):
-        """Initialize vector store with embedding dimension"""
+    def __init__(self, embedding_dim: int = 384, quantization: Optional[str] = None, rerank_factor: Optional[int] = None,
+                 rerank_storage: Optional[str] = None):
+        """
+        Initialize vector store with embedding dimension
+        
+        Args:
+            embedding_dim: Embedding size
+            quantization: 'none' (float32) or 'int8' scalar quantization, about 4x smaller
+                (can be set via VECTOR_QUANTIZATION)
+            rerank_factor: With int8, fetch top_k * rerank_factor candidates and re-rank them
+                with exact float scores; 0 disables re-ranking (can be set via VECTOR_RERANK_FACTOR)
+            rerank_storage: Where the float32 rows for re-ranking are kept: 'mmap' (an unlinked
+                temporary file in VECTOR_RERANK_DIR, paged in on demand) or 'memory'
+                (can be set via VECTOR_RERANK_STORAGE)
+        """
         self.embedding_dim = embedding_dim
+        self.quantization = quantization or os.environ.get("VECTOR_QUANTIZATION", "none")
+        if self.quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization '{self.quantization}'. Use one of: {', '.join(QUANTIZATION_MODES)}")
+        self.rerank_factor = rerank_factor if rerank_factor is not None else int(os.environ.get("VECTOR_RERANK_FACTOR", 4))
+        self.rerank_storage = rerank_storage or os.environ.get("VECTOR_RERANK_STORAGE", "mmap")
+        if self.rerank_storage not in RERANK_STORAGE_MODES:
+            raise ValueError(f"Unknown rerank storage '{self.rerank_storage}'. Use one of: {', '.join(RERANK_STORAGE_MODES)}")
         self.vectors = None
+        self.scales = None  # Per-dimension int8 scales (numpy int8 mode)
+        self.rerank_vectors = None  # Float32 rows for re-ranking int8 candidates
         self.metadata = []
+        self.id_index: Dict[str, int] = {}  # Upper-cased id / part_number -> position in metadata
+        self.lexical_index = BM25Index()
         self.initialized = False
+        self.version = 0  # Bumped on every rebuild so derived caches can invalidate
         
         # Try to import FAISS, fallback to numpy if unavailable
         try:
@@ -40,27 +103,61 @@ class VectorStore:
         self.metadata = products
         embeddings = self._generate_embeddings(products)
         self._build_index(embeddings)
+        self._build_id_index()
+        self.lexical_index.build(products)
         self.initialized = True
+        self.version += 1
         print(f"Vector store initialized with {len(products)} products")
     
+    def upsert_products(self, products: List[Dict]) -> None:
+        """
+        Add new products and replace existing ones (matched by id), then rebuild the indexes
+        
+        Like a reload, this bumps version, so caches derived from the catalog are dropped.
+        """
+        merged = list(self.metadata)
+        positions = {str(p.get('id', '')).upper(): i for i, p in enumerate(merged)}
+        for product in products:
+            key = str(product.get('id', '')).upper()
+            if key in positions:
+                merged[positions[key]] = product
+            else:
+                positions[key] = len(merged)
+                merged.append(product)
+        self.initialize_from_products(merged)
+    
+    def empty_copy(self) -> "VectorStore":
+        """Empty store with the same configuration, for building a replacement catalog"""
+        copy = VectorStore(embedding_dim=self.embedding_dim, quantization=self.quantization,
+                           rerank_factor=self.rerank_factor, rerank_storage=self.rerank_storage)
+        copy.version = self.version
+        return copy
+    
+    def _build_id_index(self) -> None:
+        """Map ids and part numbers to metadata positions (ids win over part numbers)"""
+        index = {}
+        for i, product in enumerate(self.metadata):
+            part_number = str(product.get('part_number') or '').upper()
+            if part_number:
+                index.setdefault(part_number, i)
+        for i, product in enumerate(self.metadata):
+            index[str(product.get('id', '')).upper()] = i
+        self.id_index = index
+    
     def _generate_embeddings(self, products: List[Dict]) -> np.ndarray:
         """
         Generate embeddings for products using simple TF-IDF style approach.
         For production, replace with actual embedding model (e.g., sentence-transformers).
         """
-        embeddings = []
-        
-        for product in products:
-            # Combine text fields for embedding
-            text = f"{product.get('name', '')} {product.get('description', '')} {product.get('category', '')}"
-            text = text.lower()
-            
-            # Simple embedding: one-hot encode keywords (for demo)
-            # In production, use: from sentence_transformers import SentenceTransformer
-            embedding = self._create_simple_embedding(text)
-            embeddings.append(embedding)
-        
-        return np.array(embeddings, dtype=np.float32)
+        # Simple embedding: one-hot encode keywords (for demo)
+        # In production, use: from sentence_transformers import SentenceTransformer
+        return self._create_simple_embeddings([self._product_text(p) for p in products])
+    
+    @staticmethod
+    def _product_text(product: Dict) -> str:
+        """Combine the text fields of a product for embedding"""
+        text = f"{product.get('name', '')} {product.get('description', '')} {product.get('category', '')}"
+        return text.lower()
     
     def _create_simple_embedding(self, text: str) -> np.ndarray:
         """Create a simple embedding vector from text"""
@@ -95,12 +192,48 @@ class VectorStore:
     
     def _build_index(self, embeddings: np.ndarray) -> None:
         """Build search index from embeddings"""
+        self.scales = None
+        self.rerank_vectors = None
+        if self.quantization == "int8":
+            if self.rerank_factor > 0:
+                self.rerank_vectors = self._store_rerank_vectors(embeddings)
+            if self.use_faiss:
+                self.vectors = self.faiss.IndexScalarQuantizer(self.embedding_dim, self.faiss.ScalarQuantizer.QT_8bit)
+                self.vectors.train(embeddings)
+                self.vectors.add(embeddings)
+            else:
+                self.vectors, self.scales = quantize_int8(embeddings)
+            return
+        
         if self.use_faiss:
             self.vectors = self.faiss.IndexFlatL2(self.embedding_dim)
             self.vectors.add(embeddings)
         else:
             self.vectors = embeddings
     
+    def _store_rerank_vectors(self, embeddings: np.ndarray) -> np.ndarray:
+        """
+        Float32 copy of the embeddings for exact re-ranking
+        
+        With 'mmap' the rows live in a temporary file that is unlinked at once: a search
+        only pages in its candidate rows, and clean pages can be dropped under memory pressure.
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if self.rerank_storage == "memory" or not len(embeddings):
+            return embeddings
+        with tempfile.TemporaryFile(dir=os.environ.get("VECTOR_RERANK_DIR")) as f:
+            rows = np.memmap(f, dtype=np.float32, mode='w+', shape=embeddings.shape)
+            rows[:] = embeddings
+            rows.flush()
+        return rows
+    
+    def _create_simple_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Embed several texts at once into a single (n, embedding_dim) matrix"""
+        matrix = np.zeros((len(texts), self.embedding_dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            matrix[row] = self._create_simple_embedding(text)
+        return matrix
+    
     def search(self, query: str, top_k: int = 5) -> List[Dict]:
         """
         Search for similar products given a query string.
@@ -109,50 +242,176 @@ class VectorStore:
         if not self.initialized:
             return []
         
-        # Generate query embedding
-        query_embedding = self._create_simple_embedding(query).reshape(1, -1)
+        return self.search_batch([query], top_k=top_k)[0]
+    
+    def search_batch(self, queries: List[str], top_k: int = 5) -> List[List[Dict]]:
+        """
+        Search for several queries with one embedding pass and one index call.
         
-        # Search
-        if self.use_faiss:
-            distances, indices = self.vectors.search(query_embedding, min(top_k, len(self.metadata)))
+        Args:
+            queries: Query strings
+            top_k: Number of results per query
+        
+        Returns:
+            One result list per query, in the same order as queries
+        """
+        if not self.initialized or not queries:
+            return [[] for _ in queries]
+        
+        with SEARCH_LATENCY.time(index="vector"):
+            batch_results = self._search_batch(queries, top_k)
+        SEARCH_BATCH_SIZE.observe(len(queries))
+        return batch_results
+    
+    def _search_batch(self, queries: List[str], top_k: int) -> List[List[Dict]]:
+        """Run the index search and attach product metadata (see search_batch)"""
+        batch_results = []
+        for row_indices, row_scores in zip(*self.search_positions(queries, top_k)):
             results = []
-            for idx, distance in zip(indices[0], distances[0]):
-                product = self.metadata[int(idx)].copy()
-                product['score'] = float(1 / (1 + distance))  # Convert distance to similarity
+            for idx, score in zip(row_indices, row_scores):
+                product = self.metadata[idx].copy()
+                product['score'] = score
                 results.append(product)
+            batch_results.append(results)
+        
+        return batch_results
+    
+    def search_positions(self, queries: List[str], top_k: int) -> Tuple[List[List[int]], List[List[float]]]:
+        """
+        Embed queries and search the index, without building result dictionaries
+        
+        Returns:
+            Tuple of (positions in metadata, scores), one list of each per query, best first
+        """
+        # Embed every query into one matrix (product texts are embedded lower-cased too)
+        query_embeddings = self._create_simple_embeddings([q.lower() for q in queries])
+        k = min(top_k, len(self.metadata))
+        
+        # Quantized scores are approximate: over-fetch, then re-rank exactly
+        rerank = self.quantization != "none" and self.rerank_factor > 0 and self.rerank_vectors is not None
+        fetch = min(len(self.metadata), k * self.rerank_factor) if rerank else k
+        
+        # Search
+        if self.use_faiss:
+            distances, indices = self.vectors.search(query_embeddings, fetch)
+            scores = 1 / (1 + distances)  # Convert distance to similarity
         else:
-            # Numpy-based search
-            similarities = np.dot(self.vectors, query_embedding.T).flatten()
-            top_indices = np.argsort(-similarities)[:top_k]
-            results = []
-            for idx in top_indices:
-                product = self.metadata[int(idx)].copy()
-                product['score'] = float(similarities[idx])
-                results.append(product)
+            # Numpy-based search: one matrix product for the whole batch
+            similarities = self._similarities(query_embeddings)
+            if fetch < similarities.shape[1]:
+                indices = np.argpartition(-similarities, fetch - 1, axis=1)[:, :fetch]
+            else:
+                indices = np.tile(np.arange(similarities.shape[1]), (len(queries), 1))
+            partial = np.take_along_axis(similarities, indices, axis=1)
+            order = np.argsort(-partial, axis=1, kind='stable')
+            indices = np.take_along_axis(indices, order, axis=1)
+            scores = np.take_along_axis(partial, order, axis=1)
+        
+        if rerank:
+            indices, scores = self._rerank(query_embeddings, indices, k)
+        
+        all_positions, all_scores = [], []
+        for row_indices, row_scores in zip(indices, scores):
+            # FAISS pads missing results with -1
+            kept = [(int(idx), float(score)) for idx, score in zip(row_indices, row_scores) if idx >= 0]
+            all_positions.append([idx for idx, _ in kept])
+            all_scores.append([score for _, score in kept])
+        
+        return all_positions, all_scores
+    
+    def _similarities(self, query_embeddings: np.ndarray) -> np.ndarray:
+        """Dot-product scores of every query against every stored vector (numpy path)"""
+        if self.scales is None:
+            return np.dot(query_embeddings, self.vectors.T)
+        
+        # int8: fold the scales into the queries and score the codes block by block
+        scaled = query_embeddings * self.scales
+        similarities = np.empty((len(query_embeddings), len(self.vectors)), dtype=np.float32)
+        for start in range(0, len(self.vectors), INT8_BLOCK_ROWS):
+            block = self.vectors[start:start + INT8_BLOCK_ROWS].astype(np.float32)
+            similarities[:, start:start + len(block)] = np.dot(scaled, block.T)
+        return similarities
+    
+    def _rerank(self, query_embeddings: np.ndarray, indices: np.ndarray, k: int) -> Tuple[List[List[int]], List[List[float]]]:
+        """Re-score quantized candidates against their stored float32 rows and keep the best k"""
+        all_indices, all_scores = [], []
+        for query, row in zip(query_embeddings, indices):
+            candidates = [int(i) for i in row if i >= 0]
+            vectors = np.asarray(self.rerank_vectors[candidates])
+            if self.use_faiss:
+                exact = 1 / (1 + np.sum((vectors - query) ** 2, axis=1))
+            else:
+                exact = np.dot(vectors, query)
+            order = np.argsort(-exact, kind='stable')[:k]
+            all_indices.append([candidates[i] for i in order])
+            all_scores.append([float(exact[i]) for i in order])
+        return all_indices, all_scores
+    
+    def memory_usage(self) -> Dict:
+        """Bytes held by the vector index and the float32 re-rank rows, compared with a float32 index"""
+        float_bytes = len(self.metadata) * self.embedding_dim * 4
+        if self.vectors is None:
+            index_bytes = 0
+        elif self.use_faiss:
+            code_size = self.vectors.code_size if self.quantization == "int8" else self.embedding_dim * 4
+            index_bytes = code_size * self.vectors.ntotal
+        else:
+            index_bytes = self.vectors.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+        rerank_bytes = self.rerank_vectors.nbytes if self.rerank_vectors is not None else 0
+        
+        return {
+            "quantization": self.quantization,
+            "vectors": len(self.metadata),
+            "index_bytes": int(index_bytes),
+            "rerank_bytes": int(rerank_bytes),
+            "rerank_storage": self.rerank_storage if rerank_bytes else None,
+            "total_bytes": int(index_bytes + rerank_bytes),
+            "float32_bytes": float_bytes,
+            "compression_ratio": round(float_bytes / index_bytes, 2) if index_bytes else None
+        }
+    
+    def search_lexical(self, query: str, top_k: int = 5) -> List[Dict]:
+        """
+        Search the prebuilt BM25 index for exact-term matches.
+        Returns top_k products with their BM25 scores.
+        """
+        if not self.initialized:
+            return []
+        
+        with SEARCH_LATENCY.time(index="lexical"):
+            hits = self.lexical_index.search(query, top_k=top_k)
+        
+        results = []
+        for idx, score in hits:
+            product = self.metadata[idx].copy()
+            product['score'] = score
+            results.append(product)
         
         return results
     
     def get_by_id(self, product_id: str) -> Dict:
-        """Get product by ID"""
-        for product in self.metadata:
-            if product.get('id') == product_id:
-                return product
-        return None
+        """Get product by ID or part number (case-insensitive)"""
+        i = self.id_index.get(str(product_id or '').upper())
+        return self.metadata[i] if i is not None else None
     
     def search_by_model(self, model_number: str) -> List[Dict]:
         """Search for products compatible with a specific model"""
+        return [self.metadata[i] for i in self.model_positions(model_number)]
+    
+    def model_positions(self, model_number: str) -> List[int]:
+        """Positions in metadata of products whose compatible models contain model_number"""
         model_number = model_number.lower()
-        results = []
+        positions = []
         
-        for product in self.metadata:
+        for i, product in enumerate(self.metadata):
             compat_models = product.get('compatible_models', [])
             if isinstance(compat_models, str):
                 compat_models = [compat_models]
             
             if any(model_number in str(m).lower() for m in compat_models):
-                results.append(product)
+                positions.append(i)
         
-        return results
+        return positions
     
     def save_to_file(self, filepath: str) -> None:
         """Save vector store to file for persistence"""
@@ -179,7 +438,10 @@ class VectorStore:
         
         embeddings = self._generate_embeddings(self.metadata)
         self._build_index(embeddings)
+        self._build_id_index()
+        self.lexical_index.build(self.metadata)
         self.initialized = True
+        self.version += 1
         
         print(f"Vector store loaded from {filepath}")
 
@@ -196,9 +458,24 @@ def get_vector_store() -> VectorStore:
     return _vector_store
 
 
+def create_vector_store() -> VectorStore:
+    """Factory function to create an empty vector store, sharded when VECTOR_SHARDS > 1"""
+    num_shards = int(os.environ.get("VECTOR_SHARDS", 1))
+    if num_shards > 1:
+        from sharded_store import ShardedVectorStore
+        return ShardedVectorStore(num_shards=num_shards, partition=os.environ.get("VECTOR_SHARD_BY", "hash"))
+    return VectorStore()
+
+
 def initialize_vector_store(products: List[Dict]) -> VectorStore:
     """Initialize the global vector store"""
     global _vector_store
-    _vector_store = VectorStore()
+    _vector_store = create_vector_store()
     _vector_store.initialize_from_products(products)
-    return _vector_store
\ No newline at end of file
+    return _vector_store
+
+
+def set_vector_store(store) -> None:
+    """Replace the global vector store (e.g. with a RemoteVectorStore client)"""
+    global _vector_store
+    _vector_store = store